@@ -1,12 +1,19 @@
 import streamlit as st
-import joblib
-import json
-import pandas as pd
-import math
 import time
-import base64
+import json
 from pathlib import Path
 
+import metrics
+import prediction
+from artifact_store import attach_artifact_store
+from assets import load_or_build_assets
+from leaderboard import Leaderboard
+from toss_analytics import UNKNOWN_SESSION, TossIndex, season_year
+from live_feed import LiveFeedProcessor, LiveMatchBoard, start_background_feed
+from prediction_table import load_or_build_prediction_table
+from result_cache import ResultCache
+from venue_index import venue_index
+
 # =====================================================
 # PAGE CONFIG
 # =====================================================
@@ -17,24 +24,31 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+rerun_start = time.perf_counter()
+
 # =====================================================
-# HELPER FUNCTION TO LOAD IMAGE
+# STATIC ASSETS
 # =====================================================
-def get_base64_image(image_path):
-    """Convert image to base64 for embedding in HTML"""
+# The logo is resized and compressed once into static/ (see assets.py) and
+# referenced by URL, so a rerun sends a short <img> tag instead of the image.
+@st.cache_resource
+def load_static_assets():
     try:
-        with open(image_path, "rb") as img_file:
-            return base64.b64encode(img_file.read()).decode()
-    except:
+        return load_or_build_assets()
+    except Exception:
         return None
 
-# Load IPL logo
-ipl_logo_base64 = get_base64_image("IPL_LOGO.png")
+with metrics.timed("app.logo"):
+    static_assets = load_static_assets()
+    ipl_logo_src = static_assets and static_assets.src(
+        "ipl_logo", st.get_option("server.enableStaticServing")
+    )
 
 # =====================================================
 # VIBRANT COLOR THEME CSS
 # =====================================================
-st.markdown("""
+with metrics.timed("app.css"):
+    st.markdown("""
 <style>
 @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@400;600;700&display=swap');
 
@@ -418,6 +432,30 @@ div[data-testid="stHorizontalBlock"] {
     background: transparent !important;
 }
 
+/* Single-pass panels: grids stand in for st.columns */
+.panel-grid {
+    display: grid;
+    gap: 16px;
+    margin: 12px 0;
+}
+
+.panel-grid.cols-2 {
+    grid-template-columns: repeat(2, 1fr);
+}
+
+.panel-grid.cols-4 {
+    grid-template-columns: repeat(4, 1fr);
+}
+
+.toss-recommendation {
+    background-color: #e6f6ff;
+    color: var(--primary-blue);
+    border-left: 6px solid var(--primary-blue);
+    border-radius: 8px;
+    padding: 14px 16px;
+    font-weight: 600;
+}
+
                      
 </style>
 """, unsafe_allow_html=True)
@@ -425,73 +463,121 @@ div[data-testid="stHorizontalBlock"] {
 # =====================================================
 # LOAD MODELS & DATA (CACHED)
 # =====================================================
+# Models and city stats are mapped read-only from build/artifact_store.bin,
+# shared by every worker process. The models are only materialised on the
+# first prediction that needs them; the analytics path never touches them.
 @st.cache_resource
-def load_artifacts():
-    win_model = joblib.load("win_probability_model.pkl")
-    margin_model = joblib.load("margin_model.pkl")
-    with open("city_stats.json") as f:
-        city_stats = json.load(f)
-    return win_model, margin_model, city_stats
+def load_artifact_store():
+    return attach_artifact_store()
 
-with st.spinner("Loading IPL Intelligence..."):
-    win_model, margin_model, city_stats = load_artifacts()
+@st.cache_resource
+def load_prediction_table():
+    return load_or_build_prediction_table(models, city_stats)
 
-# =====================================================
-# HELPER FUNCTIONS (CRICKET-REALISTIC)
-# =====================================================
-def cricket_realistic_probability(score, avg_win, ml_prob):
-    diff = score - avg_win
-    logistic = 1 / (1 + math.exp(-0.12 * diff))
-    cricket_prob = 0.30 + logistic * (0.97 - 0.30)
-    final = 0.65 * cricket_prob + 0.35 * ml_prob
-    return max(0.03, min(final, 0.97))
-
-def cricket_realistic_margin(score, avg_win, ml_margin):
-    diff = score - avg_win
-    if diff <= 0:
-        return None
-    base = diff * 0.6
-    final = 0.7 * base + 0.3 * ml_margin
-    return max(1, round(final))
+# Results outside the table, shared with the other workers through build/.
+@st.cache_resource
+def load_result_cache():
+    return ResultCache(prediction.artifact_hash())
 
-def predict_match(city, score):
-    stats = city_stats[city]
+# Per-player, per-venue, per-season totals from city_stats_pipeline.py, if it has run.
+@st.cache_resource
+def load_leaderboard():
+    return Leaderboard.load()
 
-    X = dict.fromkeys(win_model.feature_names_in_, 0)
-    X["year"] = 2025
-    X["innings_1st"] = 1
-    X["innings_2nd"] = 2
-    X["innings_score_1st"] = score
-    X["innings_score_2nd"] = 0
-    X["toss_winner_batted_first"] = 1
-    X["score_vs_avg"] = score - stats["avg_score"]
-    X["score_vs_winning_avg"] = score - stats["avg_winning_score"]
-    X["score_percentile"] = 0.5
-    X["is_high_score"] = int(score >= stats["avg_winning_score"])
-    X["innings_momentum"] = (score - 120) / 120
+# Bat-first / chase counters from city_stats_pipeline.py, if it has run.
+@st.cache_resource
+def load_toss_index():
+    return TossIndex.load()
 
-    city_col = f"city_{city}"
-    if city_col in X:
-        X[city_col] = 1
+models = load_artifact_store()
+city_stats = models.city_stats
 
-    X_df = pd.DataFrame([X])
+# =====================================================
+# PREDICTION
+# =====================================================
+def lookup_or_predict(city, score):
+    """Serve from the precomputed table, falling back to the live models"""
+    with st.spinner("Loading IPL Intelligence..."):
+        prediction_table = load_prediction_table()
+    cached = prediction_table.lookup(city, score)
+    metrics.cache("prediction_table", hit=cached is not None)
+    if cached is not None:
+        return cached
+    return load_result_cache().predict_match(
+        lambda c, s: prediction.predict_match(models.win_model, models.margin_model, city_stats, c, s),
+        city, score,
+    )
 
-    ml_prob = win_model.predict_proba(X_df)[0][1]
-    ml_margin = margin_model.predict(X_df)[0]
+# =====================================================
+# LIVE FEED
+# =====================================================
+# One processor per feed source and server process, shared by every session
+# watching it; the feed is consumed on a background thread.
+@st.cache_resource
+def start_live_feed(source):
+    processor = LiveFeedProcessor(LiveMatchBoard(models.win_model, city_stats))
+    start_background_feed(processor, source)
+    return processor
+
+@st.fragment(run_every=1.0)
+def render_live_panel(processor):
+    live_matches = sorted(list(processor.board.slots))
+    if not live_matches:
+        st.info("Waiting for the first delivery...")
+        return
+
+    match_id = st.selectbox("Live Match", live_matches, key="live_match")
+    history = processor.snapshot(match_id)
+    if not history:
+        return
+
+    balls_bowled, prob = history[-1]
+    row = processor.board.slots.get(match_id)
+    if row is not None:
+        runs = int(processor.board.runs[row])
+        wickets = int(processor.board.wickets[row])
+        target = int(processor.board.first_score[row]) + 1
+        st.markdown(
+            f'<div class="prediction-badge">Chasing {target}: {runs}/{wickets} '
+            f'after {balls_bowled // 6}.{balls_bowled % 6} overs</div>',
+            unsafe_allow_html=True
+        )
 
-    prob = cricket_realistic_probability(score, stats["avg_winning_score"], ml_prob)
-    margin = cricket_realistic_margin(score, stats["avg_winning_score"], ml_margin)
+    c1, c2 = st.columns(2)
+    with c1:
+        st.markdown(
+            f"""
+            <div class="metric-box">
+                <div class="metric-title">Batting First Win %</div>
+                <div class="metric-value">{prob * 100:.1f}%</div>
+            </div>
+            """,
+            unsafe_allow_html=True
+        )
+    with c2:
+        st.markdown(
+            f"""
+            <div class="metric-box">
+                <div class="metric-title">Chasing Team Win %</div>
+                <div class="metric-value">{(1 - prob) * 100:.1f}%</div>
+            </div>
+            """,
+            unsafe_allow_html=True
+        )
 
-    return prob, margin
+    st.line_chart(
+        {"Batting First Win %": [p * 100 for _, p in history]},
+        height=220
+    )
 
 # =====================================================
 # HEADER WITH IPL LOGO
 # =====================================================
-if ipl_logo_base64:
+if ipl_logo_src:
     st.markdown(f"""
     <div class="section-card" style="text-align:center;">
         <div class="header-container">
-            <img src="data:image/png;base64,{ipl_logo_base64}" class="ipl-logo">
+            <img src="{ipl_logo_src}" class="ipl-logo" width="120" height="120" alt="IPL">
             <h1 style="margin: 0;">IPL Match Prediction & Analytics</h1>
         </div>
         <p style="color: #64748b; margin-top: 10px;">Data-driven insights based on IPL 2023–2025</p>
@@ -506,257 +592,359 @@ else:
     """, unsafe_allow_html=True)
 
 # =====================================================
-# MAIN LAYOUT
+# PANEL TEMPLATES
 # =====================================================
-left, right = st.columns([1, 2], gap="large")
-
-# =====================================================
-# LEFT PANEL – CONFIG
-# =====================================================
-with left:
-    st.markdown('<div class="section-card">', unsafe_allow_html=True)
-    st.subheader("Match Configuration")
-
-    city = st.selectbox("Match City", sorted(city_stats.keys()))
+# Every panel is built as one HTML string and sent as a single element. The
+# analytics panels depend only on the city, so each city's HTML is built once
+# per process.
+ALL_SEASONS = "All Seasons"
+TOP_PLAYER_COUNTS = [5, 10, 25, 50]
+ANY = "All"
+
+def metric_box(title, value):
+    return (f'<div class="metric-box"><div class="metric-title">{title}</div>'
+            f'<div class="metric-value">{value}</div></div>')
+
+def player_box(rank, name, stat):
+    return (f'<div class="player-box"><div class="player-name">#{rank}  {name}</div>'
+            f'<div class="player-stats">{stat}</div></div>')
+
+def toss_box(title, value, label):
+    return (f'<div class="toss-stat-box"><div class="toss-stat-title">{title}</div>'
+            f'<div class="toss-stat-value">{value}</div>'
+            f'<div class="toss-stat-label">{label}</div></div>')
+
+def toss_section(city, toss_filters):
+    """(boxes, recommendation) HTML from match records, or the city_stats figures without them"""
+    toss_index = load_toss_index()
+    if not len(toss_index):
+        stats = city_stats[city]
+        boxes = (toss_box("Bat First Wins", f'{stats["bat_first_win_pct"]}%', "of matches, toss winner batting")
+                 + toss_box("Bowl First Wins", f'{stats["bowl_first_win_pct"]}%', "of matches, toss winner fielding"))
+        return boxes, stats["toss_recommendation"]
+
+    seasons, day_night, team = toss_filters
+    summary = toss_index.summary(city, seasons, day_night, team)
+    boxes = "".join(
+        toss_box(title, result["wins"],
+                 f'out of {result["matches"]} matches'
+                 + (f' · {result["rate"]:.0%} (95% CI {result["ci95"][0]:.0%}–{result["ci95"][1]:.0%})'
+                    if result["matches"] else ""))
+        for title, result in (("Bat First Wins", summary["bat_first"]), ("Chase Wins", summary["chase"]))
+    )
+    if summary["recommendation"] is None:
+        return boxes, "NOT ENOUGH MATCHES"
+    note = "" if summary["significant"] else " (within the margin of error)"
+    return boxes, summary["recommendation"] + note
+
+@st.cache_data(max_entries=256)
+def venue_panels(city, toss_filters=(None, None, None)):
+    """(summary, players) panel HTML for one city; toss_filters is (seasons, day_night, team)"""
+    stats = city_stats[city]
+    toss_boxes, recommendation = toss_section(city, toss_filters)
+
+    summary = (
+        f'<div class="section-card"><h3>📊 {city} Stadium Analytics</h3>'
+        '<div class="panel-grid cols-4">'
+        + metric_box("Avg 1st Innings", round(stats["avg_score"]))
+        + metric_box("Avg 2nd Innings", round(stats["avg_second_score"]))
+        + metric_box("Avg Winning 1st Inns", round(stats["avg_winning_score"]))
+        + metric_box("Highest Chase", stats["highest_chase"])
+        + f'</div><hr><div class="panel-grid cols-2">{toss_boxes}</div>'
+        f'<div class="toss-recommendation">🎯 Toss Recommendation: '
+        f'<strong>{recommendation}</strong></div></div>'
+    )
 
-    batting_team = st.text_input("Batting Team (optional)", value="")
-    bowling_team = st.text_input("Bowling Team (optional)", value="")
+    players = players_panel(
+        "2023–2025",
+        [(p["player"], p["runs"]) for p in stats["top_run_scorers"][:5]],
+        [(p["player"], p["wickets"]) for p in stats["top_wicket_takers"][:5]],
+    )
+    return summary, players
+
+def players_panel(period, run_scorers, wicket_takers):
+    scorers = "".join(player_box(i, player, f"⭐ {runs} runs") for i, (player, runs) in enumerate(run_scorers, 1))
+    takers = "".join(player_box(i, player, f"🔥 {wickets} wickets")
+                     for i, (player, wickets) in enumerate(wicket_takers, 1))
+    return (
+        f'<div class="section-card"><h3>🌟 Top Performers ({period})</h3>'
+        f'<div class="panel-grid cols-2"><div><h3>🏏 Top Run Scorers</h3>{scorers}</div>'
+        f'<div><h3>🎯 Top Wicket Takers</h3>{takers}</div></div></div>'
+    )
 
-    mode = st.radio(
-        "Analysis Mode",
-        ["First Innings Score Given", "Yet To Bat"]
+# With a leaderboard, any season and any number of players; queries are cached in the table.
+def leaderboard_players(city, season, top_n):
+    leaderboard = load_leaderboard()
+    season = None if season == ALL_SEASONS else season
+    return players_panel(
+        ALL_SEASONS if season is None else season,
+        leaderboard.top("runs", top_n, city=city, season=season),
+        leaderboard.top("wickets", top_n, city=city, season=season),
     )
 
-    if mode == "First Innings Score Given":
-        score = st.number_input(
-            "First Innings Score",
-            min_value=100,
-            max_value=300,
-            step=1,
-            value=170
-        )
-    
+def prediction_panels(prob, margin, batting_team, bowling_team):
+    """(win probability, match prediction) panel HTML"""
+    batting_prob = prob * 100
+    bowling_prob = 100 - batting_prob
+
+    # Determine color based on probability
+    if batting_prob >= 70:
+        stroke_color = "#00BFFF"  # Vivid Sky Blue
+    elif batting_prob >= 50:
+        stroke_color = "#39FF14"  # Neon Green
+    else:
+        stroke_color = "#00FFFF"  # Electric Cyan
+
+    # Calculate circle parameters
+    radius = 85
+    circumference = 2 * 3.14159 * radius
+    offset = circumference - (batting_prob / 100) * circumference
+
+    win_probability = (
+        '<div class="section-card"><h3>Win Probability</h3>'
+        '<p style="color: #64748b; font-size: 14px;">Based on current match situation</p>'
+        '<div class="circular-progress"><svg width="200" height="200">'
+        f'<circle class="progress-bg" cx="100" cy="100" r="{radius}"></circle>'
+        f'<circle class="progress-bar" cx="100" cy="100" r="{radius}" stroke="{stroke_color}" '
+        f'stroke-dasharray="{circumference}" stroke-dashoffset="{offset}"></circle></svg>'
+        f'<div class="progress-text">{int(batting_prob)}%</div></div>'
+        '<div class="progress-label">Win Chance</div>'
+        f'<div class="prob-bar"><div class="prob-team prob-batting" style="width: {batting_prob}%;">'
+        f'{batting_team if batting_team else "BATTING TEAM"}</div>'
+        f'<div class="prob-team prob-bowling" style="width: {bowling_prob}%;">'
+        f'{bowling_team if bowling_team else "BOWLING TEAM"}</div></div></div>'
+    )
 
-        predict_btn = st.button("🎯 Predict Outcome")
+    if margin and prob > 0.5:
+        team_name = batting_team if batting_team else "Batting Team"
+        badge = f'<div class="prediction-badge">🏆 {team_name} expected to win by {margin} runs</div>'
+    elif margin:
+        team_name = bowling_team if bowling_team else "Bowling Team"
+        badge = f'<div class="prediction-badge">🏆 {team_name} expected to win</div>'
+    else:
+        badge = ('<div class="prediction-badge" style="background: linear-gradient(135deg, #00FFFF, #00d4d4);">'
+                 '⚡ Very Close Match Expected</div>')
+
+    result_box = metric_box("Expected Margin", f"{margin} runs") if margin else metric_box("Match Status", "Tied")
+    match_prediction = (
+        f'<div class="section-card"><h3>Match Prediction</h3>{badge}'
+        f'<div class="panel-grid cols-2">{metric_box("Batting Team Win %", f"{batting_prob:.1f}%")}'
+        f'{result_box}</div></div>'
+    )
+    return win_probability, match_prediction
 
-    st.markdown('</div>', unsafe_allow_html=True)
+# =====================================================
+# VENUES
+# =====================================================
+# Cities by venue name, alias or misspelling ("Wankhede", "Bangalore", "Chinaswamy").
+def venue_options(query):
+    venues = venue_index(city_stats)
+    all_cities = sorted({venue.stats for venue in venues.filter(with_stats=True)})
+    if not query.strip():
+        return all_cities
+    found = venues.suggest(query)
+    if not found:
+        st.caption(f"No venue matches “{query}”")
+    return found or all_cities
 
 # =====================================================
-# RIGHT PANEL – OUTPUT
+# WHAT-IF SWEEP
 # =====================================================
-with right:
+# Every score from 100 to 300 at every chosen venue, sliced from the prediction
+# table (one batched model pass per artifact hash) and cached per city set.
+SWEEP_METRICS = {"Win Probability": "Win Probability (%)", "Expected Margin": "Expected Margin (runs)"}
+HEATMAP_SCORE_STEP = 5
+
+@st.cache_data(max_entries=64)
+def sweep_frames(source_hash, cities):
+    """{metric: (curves, heatmap rows)} for a city set; source_hash ties the entry to the models"""
+    import pandas as pd
+
+    cities, scores, probs, margins = load_prediction_table().sweep(cities)
+    frames = {}
+    for metric, values in (("Win Probability", probs * 100), ("Expected Margin", margins)):
+        curves = pd.DataFrame(values.T, index=pd.Index(scores, name="score"), columns=cities)
+        heatmap = curves.iloc[::HEATMAP_SCORE_STEP].reset_index().melt(
+            id_vars="score", var_name="city", value_name="value")
+        frames[metric] = curves, heatmap
+    return frames
+
+def heatmap_spec(metric):
+    return {
+        "mark": "rect",
+        "encoding": {
+            "x": {"field": "score", "type": "ordinal", "title": "First Innings Score",
+                  "axis": {"values": list(range(100, 301, 25))}},
+            "y": {"field": "city", "type": "nominal", "title": None},
+            "color": {"field": "value", "type": "quantitative", "title": SWEEP_METRICS[metric],
+                      "scale": {"scheme": "blues"}},
+            "tooltip": [{"field": "city"}, {"field": "score"},
+                        {"field": "value", "title": SWEEP_METRICS[metric], "format": ".1f"}],
+        },
+    }
+
+# Season window, day/night and team for the toss panel, from the values in the index.
+def toss_filter_inputs(toss_index):
+    years = sorted({season_year(season) for season in toss_index.values("season")} - {None})
+    seasons = None
+    if len(years) > 1:
+        seasons = st.select_slider("Toss Seasons", options=years, value=(years[0], years[-1]))
+    sessions = [s for s in toss_index.values("day_night") if s != UNKNOWN_SESSION]
+    day_night = st.selectbox("Day / Night", [ANY, *sessions]) if sessions else ANY
+    team = st.selectbox("Toss Team", [ANY, *toss_index.values("team")])
+    return seasons, None if day_night == ANY else day_night, None if team == ANY else team
 
-    stats = city_stats[city]
+# =====================================================
+# DASHBOARD
+# =====================================================
+# Widget changes rerun only this fragment: the CSS and the logo header above
+# are sent once per session, on its first (full) run.
+@st.fragment
+def dashboard():
+    left, right = st.columns([1, 2], gap="large")
 
     # -----------------------------
-    # MODE 1 – PREDICTION
+    # LEFT PANEL – CONFIG
     # -----------------------------
-    if mode == "First Innings Score Given" and predict_btn:
-        prob, margin = predict_match(city, score)
-
+    with left:
         st.markdown('<div class="section-card">', unsafe_allow_html=True)
-        st.subheader("Win Probability")
-        st.markdown('<p style="color: #64748b; font-size: 14px;">Based on current match situation</p>', unsafe_allow_html=True)
-
-        # Probability visualization - Circular Progress
-        batting_prob = prob * 100
-        bowling_prob = 100 - batting_prob
-
-        # Determine color based on probability
-        if batting_prob >= 70:
-            stroke_color = "#00BFFF"  # Vivid Sky Blue
-        elif batting_prob >= 50:
-            stroke_color = "#39FF14"  # Neon Green
-        else:
-            stroke_color = "#00FFFF"  # Electric Cyan
-
-        # Calculate circle parameters
-        radius = 85
-        circumference = 2 * 3.14159 * radius
-        offset = circumference - (batting_prob / 100) * circumference
-
-        # Display circular progress
-        st.markdown(f"""
-        <div class="circular-progress">
-            <svg width="200" height="200">
-                <circle class="progress-bg" cx="100" cy="100" r="{radius}"></circle>
-                <circle class="progress-bar" cx="100" cy="100" r="{radius}" 
-                        stroke="{stroke_color}"
-                        stroke-dasharray="{circumference}"
-                        stroke-dashoffset="{offset}">
-                </circle>
-            </svg>
-            <div class="progress-text">{int(batting_prob)}%</div>
-        </div>
-        <div class="progress-label">Win Chance</div>
-        """, unsafe_allow_html=True)
-
-        # Probability bar
-        st.markdown(f"""
-        <div class="prob-bar">
-            <div class="prob-team prob-batting" style="width: {batting_prob}%;">
-                {batting_team if batting_team else 'BATTING TEAM'}
-            </div>
-            <div class="prob-team prob-bowling" style="width: {bowling_prob}%;">
-                {bowling_team if bowling_team else 'BOWLING TEAM'}
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+        st.subheader("Match Configuration")
 
-        st.markdown('</div>', unsafe_allow_html=True)
+        city = st.selectbox("Match City", venue_options(st.text_input("Find Venue", value="")))
 
-        # Prediction Result
-        st.markdown('<div class="section-card">', unsafe_allow_html=True)
-        st.subheader("Match Prediction")
+        batting_team = st.text_input("Batting Team (optional)", value="")
+        bowling_team = st.text_input("Bowling Team (optional)", value="")
 
-        if margin and prob > 0.5:
-            team_name = batting_team if batting_team else "Batting Team"
-            st.markdown(
-                f'<div class="prediction-badge">🏆 {team_name} expected to win by {margin} runs</div>',
-                unsafe_allow_html=True
-            )
-        elif margin is None or prob <= 0.5:
-            team_name = bowling_team if bowling_team else "Bowling Team"
-            if margin:
-                st.markdown(
-                    f'<div class="prediction-badge">🏆 {team_name} expected to win</div>',
-                    unsafe_allow_html=True
-                )
-            else:
-                st.markdown(
-                    '<div class="prediction-badge" style="background: linear-gradient(135deg, #00FFFF, #00d4d4);">⚡ Very Close Match Expected</div>',
-                    unsafe_allow_html=True
-                )
-
-        c1, c2 = st.columns(2)
-        with c1:
-            st.markdown(
-                f"""
-                <div class="metric-box">
-                    <div class="metric-title">Batting Team Win %</div>
-                    <div class="metric-value">{batting_prob:.1f}%</div>
-                </div>
-                """,
-                unsafe_allow_html=True
+        mode = st.radio(
+            "Analysis Mode",
+            ["First Innings Score Given", "Yet To Bat", "Live Chase", "What-If Sweep"]
+        )
+
+        predict_btn = False
+        if mode == "First Innings Score Given":
+            score = st.number_input(
+                "First Innings Score",
+                min_value=100,
+                max_value=300,
+                step=1,
+                value=170
             )
 
-        with c2:
-            if margin:
-                st.markdown(
-                    f"""
-                    <div class="metric-box">
-                        <div class="metric-title">Expected Margin</div>
-                        <div class="metric-value">{margin} runs</div>
-                    </div>
-                    """,
-                    unsafe_allow_html=True
-                )
-            else:
-                st.markdown(
-                    """
-                    <div class="metric-box">
-                        <div class="metric-title">Match Status</div>
-                        <div class="metric-value">Tied</div>
-                    </div>
-                    """,
-                    unsafe_allow_html=True
-                )
+            predict_btn = st.button("🎯 Predict Outcome")
+
+        leaderboard = load_leaderboard()
+        if mode == "Yet To Bat" and len(leaderboard):
+            season = st.selectbox("Season", [ALL_SEASONS, *sorted(leaderboard.dimension_values("season"), reverse=True)])
+            top_n = st.selectbox("Top Players", TOP_PLAYER_COUNTS)
+
+        toss_filters = (None, None, None)
+        toss_index = load_toss_index()
+        if mode == "Yet To Bat" and len(toss_index):
+            toss_filters = toss_filter_inputs(toss_index)
+
+        if mode == "What-If Sweep":
+            all_cities = sorted(city_stats.keys())
+            sweep_venues = st.multiselect("Sweep Venues", all_cities, default=all_cities)
+            sweep_metric = st.radio("Sweep Metric", list(SWEEP_METRICS), horizontal=True)
+
+        if mode == "Live Chase":
+            feed_source = st.text_input(
+                "Live Feed (JSON-lines file or tcp://host:port)",
+                value="live_feed.jsonl"
+            )
 
         st.markdown('</div>', unsafe_allow_html=True)
 
     # -----------------------------
-    # MODE 2 – ANALYTICS
+    # RIGHT PANEL – OUTPUT
     # -----------------------------
-    if mode == "Yet To Bat":
-        st.markdown('<div class="section-card">', unsafe_allow_html=True)
-        st.subheader(f"📊 {city} Stadium Analytics")
-
-        m1, m2, m3, m4 = st.columns(4)
-
-        m1.metric("Avg 1st Innings", round(stats["avg_score"]))
-        m2.metric("Avg 2nd Innings", round(stats["avg_second_score"]))
-        m3.metric("Avg Winning 1st Inns", round(stats["avg_winning_score"]))
-        m4.metric("Highest Chase", stats["highest_chase"])
-
-        st.markdown("---")
-
-        # Calculate actual toss wins from percentages
-        # Assuming these are based on total matches, we'll use reasonable estimates
-        bat_first_pct = stats['bat_first_win_pct']
-        bowl_first_pct = stats['bowl_first_win_pct']
-        
-        # Calculate wins based on 8 total tosses (adjustable)
-        total_tosses = 8
-        bat_first_wins = round(total_tosses * bat_first_pct / 100)
-        bowl_first_wins = total_tosses - bat_first_wins
-
-        t1, t2 = st.columns(2)
-        
-        with t1:
-            st.markdown(
-                f"""
-                <div class="toss-stat-box">
-                    <div class="toss-stat-title">Bat First Wins</div>
-                    <div class="toss-stat-value">{bat_first_wins}</div>
-                    <div class="toss-stat-label">out of {total_tosses} matches</div>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
-        
-        with t2:
-            st.markdown(
-                f"""
-                <div class="toss-stat-box">
-                    <div class="toss-stat-title">Bowl First Wins</div>
-                    <div class="toss-stat-value">{bowl_first_wins}</div>
-                    <div class="toss-stat-label">out of {total_tosses} matches</div>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
+    # Panel slots are laid out first and each is filled, and streamed to the
+    # browser, as soon as its HTML is ready.
+    with right, metrics.timed("app.render"):
+
+        # MODE 1 – PREDICTION
+        if mode == "First Innings Score Given" and predict_btn:
+            probability_slot, result_slot = st.empty(), st.empty()
+            prob, margin = lookup_or_predict(city, score)
+            win_probability, match_prediction = prediction_panels(prob, margin, batting_team, bowling_team)
+            probability_slot.markdown(win_probability, unsafe_allow_html=True)
+            result_slot.markdown(match_prediction, unsafe_allow_html=True)
+
+        # MODE 2 – ANALYTICS
+        if mode == "Yet To Bat":
+            summary_slot, players_slot = st.empty(), st.empty()
+            summary, players = venue_panels(city, toss_filters)
+            if len(leaderboard):
+                players = leaderboard_players(city, season, top_n)
+            summary_slot.markdown(summary, unsafe_allow_html=True)
+            players_slot.markdown(players, unsafe_allow_html=True)
+
+        # MODE 4 – WHAT-IF SWEEP
+        if mode == "What-If Sweep":
+            st.markdown('<div class="section-card">', unsafe_allow_html=True)
+            st.subheader("📈 What-If Sweep")
+
+            if not sweep_venues:
+                st.info("Pick at least one venue to sweep.")
+            else:
+                with st.spinner("Loading IPL Intelligence..."):
+                    prediction_table = load_prediction_table()
+                curves, heatmap = sweep_frames(prediction_table.source_hash, tuple(sweep_venues))[sweep_metric]
+                st.line_chart(curves, x_label="First Innings Score", y_label=SWEEP_METRICS[sweep_metric])
+                st.vega_lite_chart(heatmap, heatmap_spec(sweep_metric), width="stretch")
 
-        st.success(f"🎯 Toss Recommendation: **{stats['toss_recommendation']}**")
+            st.markdown('</div>', unsafe_allow_html=True)
 
-        st.markdown('</div>', unsafe_allow_html=True)
+        # MODE 3 – LIVE CHASE
+        if mode == "Live Chase":
+            st.markdown('<div class="section-card">', unsafe_allow_html=True)
+            st.subheader("📡 Live Win Probability")
 
-        # -----------------------------
-        # TOP PLAYERS - ENHANCED BOXES (TOP 5)
-        # -----------------------------
-        st.markdown('<div class="section-card">', unsafe_allow_html=True)
-        st.subheader("🌟 Top Performers (2023–2025)")
-
-        p1, p2 = st.columns(2)
-
-        with p1:
-            st.markdown("### 🏏 Top Run Scorers")
-            for i, p in enumerate(stats["top_run_scorers"][:5], 1):
-                st.markdown(
-                    f"""
-                    <div class="player-box">
-                        <div class="player-name">#{i}  {p['player']}</div>
-                        <div class="player-stats">⭐ {p['runs']} runs</div>
-                    </div>
-                    """,
-                    unsafe_allow_html=True
-                )
-
-        with p2:
-            st.markdown("### 🎯 Top Wicket Takers")
-            for i, p in enumerate(stats["top_wicket_takers"][:5], 1):
-                st.markdown(
-                    f"""
-                    <div class="player-box">
-                        <div class="player-name">#{i}  {p['player']}</div>
-                        <div class="player-stats">🔥 {p['wickets']} wickets</div>
-                    </div>
-                    """,
-                    unsafe_allow_html=True
-                )
+            if not feed_source.startswith("tcp://") and not Path(feed_source).exists():
+                st.warning(f"Feed file not found: {feed_source}")
+            else:
+                render_live_panel(start_live_feed(feed_source))
 
-        st.markdown('</div>', unsafe_allow_html=True)
+            st.markdown('</div>', unsafe_allow_html=True)
+
+dashboard()
 
 # =====================================================
 # FOOTER
 # =====================================================
-st.caption("IPL analytics powered by ML models + cricket-aware logic | Seasons 2023–2025")
\ No newline at end of file
+st.caption("IPL analytics powered by ML models + cricket-aware logic | Seasons 2023–2025")
+
+# =====================================================
+# DEBUG PANEL (IPL_METRICS=1)
+# =====================================================
+# Its own fragment on a timer: dashboard() and the live panel rerun without
+# the rest of the script, so a panel drawn once per full run would go stale.
+METRICS_REFRESH_SECONDS = 2.0
+
+@st.fragment(run_every=METRICS_REFRESH_SECONDS)
+def metrics_panel():
+    snapshot = metrics.snapshot()
+
+    with st.expander("⏱ Pipeline Metrics", expanded=True):
+        st.table([
+            {
+                "Stage": stage,
+                "Calls": s["count"],
+                "Mean (ms)": f"{s['mean_ms']:.3f}",
+                "p99 ≤ (ms)": f"{s['p99_ms']:g}",
+                "Max (ms)": f"{s['max_ms']:.3f}",
+            }
+            for stage, s in sorted(snapshot["stages"].items())
+        ])
+        if snapshot["caches"]:
+            st.table([
+                {"Cache": name, "Hits": c["hits"], "Misses": c["misses"], "Hit Ratio": f"{c['hit_ratio']:.0%}"}
+                for name, c in sorted(snapshot["caches"].items())
+            ])
+        st.download_button("Download JSON", json.dumps(snapshot, indent=2), "ipl_metrics.json")
+        st.code(metrics.prometheus_text(), language="text")
+
+if metrics.ENABLED:
+    metrics.observe("app.rerun", time.perf_counter() - rerun_start)
+    with st.sidebar:
+        metrics_panel()
\ No newline at end of file
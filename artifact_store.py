@@ -0,0 +1,134 @@
+"""Read-only artifact store shared by every app worker through one mmap'd file.
+
+The store holds both models as flat tree arrays (see native_models.py) and the
+city stats table in the columnar layout of columnar_stats.py, so that every
+array can be viewed straight out of the mapping. Worker processes attach with
+attach_artifact_store(): the OS page cache holds a single copy of the data no
+matter how many workers map it.
+
+    python artifact_store.py        # build build/artifact_store.bin
+
+The store is tagged with artifact_hash(). A worker that finds it stale
+rebuilds it; the new file is swapped in atomically so concurrent workers
+never see a half-written store.
+"""
+import json
+import mmap
+import os
+from functools import cached_property
+
+import numpy as np
+
+import metrics
+from columnar_stats import ColumnarCityStats, columnar_city_arrays
+from native_models import load_margin_arrays, load_win_arrays, margin_model_from_arrays, win_model_from_arrays
+from prediction import BUILD_DIR, artifact_hash, load_city_stats
+
+STORE_PATH = BUILD_DIR / "artifact_store.bin"
+MAGIC = b"IPLSTORE"
+ALIGNMENT = 64
+
+
+# =====================================================
+# ARRAY FILE CONTAINER
+# =====================================================
+def write_array_file(path, arrays, meta=None):
+    """Write arrays after a JSON header, each one 64-byte aligned, via an atomic rename"""
+    index, offset = {}, 0
+    for name, array in arrays.items():
+        array = np.asarray(array, order="C")
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        index[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += array.nbytes
+
+    header = json.dumps({"meta": meta or {}, "arrays": index}).encode()
+    data_start = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + len(header).to_bytes(8, "little") + header)
+        for name, array in arrays.items():
+            f.seek(data_start + index[name]["offset"])
+            f.write(np.asarray(array, order="C").tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+class ArrayFile:
+    """Read-only, zero-copy views of the arrays in a file written by write_array_file"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not an array file")
+        header_len = int.from_bytes(self._mmap[len(MAGIC):len(MAGIC) + 8], "little")
+        header_end = len(MAGIC) + 8 + header_len
+        header = json.loads(self._mmap[len(MAGIC) + 8:header_end])
+        data_start = -(-header_end // ALIGNMENT) * ALIGNMENT
+
+        self.meta = header["meta"]
+        self.arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"], dtype=np.int64))
+            self.arrays[name] = np.frombuffer(
+                self._mmap, dtype=dtype, count=count, offset=data_start + spec["offset"]
+            ).reshape(spec["shape"])
+
+    def group(self, prefix):
+        """The arrays whose names start with prefix, with the prefix stripped"""
+        return {name[len(prefix):]: array for name, array in self.arrays.items() if name.startswith(prefix)}
+
+
+# =====================================================
+# BUILD & ATTACH
+# =====================================================
+def build_artifact_store(source_hash, path=STORE_PATH):
+    arrays = {}
+    arrays.update({f"win/{k}": v for k, v in load_win_arrays().items() if k != "source_hash"})
+    arrays.update({f"margin/{k}": v for k, v in load_margin_arrays().items() if k != "source_hash"})
+    city_arrays, city_meta = columnar_city_arrays(load_city_stats(), prefix="city/")
+    arrays.update(city_arrays)
+    write_array_file(path, arrays, {"source_hash": source_hash, **city_meta})
+
+
+class SharedArtifacts:
+    """Models and city stats backed by the mapped store; models are built on first access"""
+
+    def __init__(self, array_file):
+        self.file = array_file
+
+    @cached_property
+    def win_model(self):
+        return win_model_from_arrays(self.file.group("win/"))
+
+    @cached_property
+    def margin_model(self):
+        return margin_model_from_arrays(self.file.group("margin/"))
+
+    @cached_property
+    def city_stats(self):
+        return ColumnarCityStats(self.file.group("city/"), self.file.meta)
+
+
+def attach_artifact_store(path=STORE_PATH):
+    """Map the store read-only, rebuilding it first if missing or stale"""
+    source_hash = artifact_hash()
+    try:
+        store = ArrayFile(path)
+        if store.meta.get("source_hash") == source_hash:
+            metrics.cache("artifact_store", hit=True)
+            return SharedArtifacts(store)
+    except (OSError, ValueError):
+        pass
+    metrics.cache("artifact_store", hit=False)
+    with metrics.timed("artifacts.build_store"):
+        build_artifact_store(source_hash, path)
+    return SharedArtifacts(ArrayFile(path))
+
+
+if __name__ == "__main__":
+    build_artifact_store(artifact_hash())
+    print(f"Wrote {STORE_PATH} ({STORE_PATH.stat().st_size / 1024:.0f} KB)")
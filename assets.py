@@ -0,0 +1,145 @@
+"""Static image assets: resized, compressed and content-hashed at build time.
+
+Each source image is resized to the largest size the app shows it at (twice
+the CSS width, for high-density screens) and re-encoded: the logo as a
+palette PNG with alpha, the photo as WebP. The results go to static/ under
+content-hashed names, which Streamlit serves at app/static/<file> when
+server.enableStaticServing is on (see .streamlit/config.toml). A changed
+image gets a new URL, so browsers can keep the old one cached and revalidate
+it against its ETag instead of downloading it again.
+
+static/manifest.json records the hash of the sources and settings the files
+were built from; the app rebuilds them when it does not match.
+
+    python assets.py       # build static/ and print the size of each asset
+"""
+import base64
+import hashlib
+import io
+import json
+
+import metrics
+from prediction import BASE_DIR
+
+STATIC_DIR = BASE_DIR / "static"
+MANIFEST_PATH = STATIC_DIR / "manifest.json"
+STATIC_URL = "app/static"
+
+# name -> (source image, output width in px, format, encoder options)
+ASSET_SPECS = {
+    "ipl_logo": ("IPL_LOGO.png", 240, "PNG", {"colors": 64, "optimize": True}),
+    "ipl_logos": ("ipl_logos.jpg", 1100, "WEBP", {"quality": 80, "method": 6}),
+}
+MIME_TYPES = {"PNG": "image/png", "WEBP": "image/webp"}
+EXTENSIONS = {"PNG": "png", "WEBP": "webp"}
+
+
+def assets_hash(specs=ASSET_SPECS):
+    """SHA-256 over the source images and the settings they are encoded with"""
+    digest = hashlib.sha256(json.dumps(specs, sort_keys=True).encode())
+    for source, *_ in specs.values():
+        digest.update((BASE_DIR / source).read_bytes())
+    return digest.hexdigest()
+
+
+def encode_image(source, width, fmt, options):
+    """Resize `source` to `width` px (never upscaling) and encode it; returns (bytes, (w, h))"""
+    from PIL import Image
+
+    options = dict(options)
+    with Image.open(BASE_DIR / source) as image:
+        image.load()
+    if image.width > width:
+        image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+    if fmt == "PNG":
+        image = image.convert("RGBA").quantize(options.pop("colors"))
+    elif image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA")
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **options)
+    return buffer.getvalue(), image.size
+
+
+class StaticAssets:
+    """The built assets of one manifest; encoded bytes are read once per process"""
+
+    def __init__(self, manifest, static_dir=STATIC_DIR):
+        self.manifest = manifest
+        self.static_dir = static_dir
+        self._data_uris = {}
+
+    @property
+    def source_hash(self):
+        return self.manifest["source_hash"]
+
+    def url(self, name):
+        """Path of the asset under Streamlit's static file route"""
+        return f"{STATIC_URL}/{self.manifest['assets'][name]['file']}"
+
+    def data_uri(self, name):
+        """The asset inlined as a data URI, for when static serving is off"""
+        uri = self._data_uris.get(name)
+        if uri is None:
+            entry = self.manifest["assets"][name]
+            encoded = base64.b64encode((self.static_dir / entry["file"]).read_bytes()).decode()
+            uri = self._data_uris[name] = f"data:{entry['mime']};base64,{encoded}"
+        return uri
+
+    def src(self, name, static_serving):
+        return self.url(name) if static_serving else self.data_uri(name)
+
+
+@metrics.instrument("assets.build")
+def build_assets(static_dir=STATIC_DIR, specs=ASSET_SPECS):
+    """Encode every asset into static_dir and write its manifest"""
+    static_dir.mkdir(parents=True, exist_ok=True)
+    source_hash = assets_hash(specs)
+    assets = {}
+    for name, (source, width, fmt, options) in specs.items():
+        data, (w, h) = encode_image(source, width, fmt, options)
+        file = f"{name}.{hashlib.sha256(data).hexdigest()[:12]}.{EXTENSIONS[fmt]}"
+        (static_dir / file).write_bytes(data)
+        assets[name] = {
+            "file": file, "mime": MIME_TYPES[fmt], "width": w, "height": h,
+            "bytes": len(data), "source_bytes": (BASE_DIR / source).stat().st_size,
+        }
+
+    # Files from earlier builds are no longer referenced by anything.
+    current = {entry["file"] for entry in assets.values()}
+    for name in specs:
+        for old in static_dir.glob(f"{name}.*.*"):
+            if old.name not in current:
+                old.unlink()
+
+    manifest = {"source_hash": source_hash, "assets": assets}
+    (static_dir / MANIFEST_PATH.name).write_text(json.dumps(manifest, indent=2))
+    return StaticAssets(manifest, static_dir)
+
+
+def load_assets(source_hash, static_dir=STATIC_DIR):
+    """The built assets, or None if they are missing or were built from other sources"""
+    try:
+        manifest = json.loads((static_dir / MANIFEST_PATH.name).read_text())
+    except (OSError, ValueError):
+        return None
+    if manifest.get("source_hash") != source_hash:
+        return None
+    if not all((static_dir / entry["file"]).exists() for entry in manifest["assets"].values()):
+        return None
+    return StaticAssets(manifest, static_dir)
+
+
+def load_or_build_assets(static_dir=STATIC_DIR):
+    """Return assets matching the current sources, rebuilding them if stale"""
+    assets = load_assets(assets_hash(), static_dir)
+    metrics.cache("assets.manifest", hit=assets is not None)
+    return assets if assets is not None else build_assets(static_dir)
+
+
+if __name__ == "__main__":
+    assets = build_assets()
+    for name, entry in assets.manifest["assets"].items():
+        inline = len(assets.data_uri(name))
+        print(f"{name:<10} {entry['source_bytes']:>8} -> {entry['bytes']:>7} bytes  "
+              f"{entry['width']}x{entry['height']}  {STATIC_URL}/{entry['file']}  "
+              f"(inlined: {inline} bytes)")
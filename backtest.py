@@ -0,0 +1,328 @@
+"""Backtest and tune the win-probability and margin blending on played matches.
+
+Every completed match in a matches / deliveries pair (the layout
+city_stats_pipeline.py reads) is replayed through the prediction path. Its
+city and first-innings total go through the same venue resolution, feature
+encoding and models as predict_match. The blend's inputs for each match
+(avg_winning_score and the models' probability and margin) are cached
+under build/backtest/, keyed by the raw files and artifact_hash(). Scoring a
+set of blending constants is then arithmetic on a few arrays, without
+touching the models again.
+
+The report gives the Brier score, log loss and a reliability curve for the
+probability that the side batting first wins, and the mean absolute error of
+the expected margin against first- minus second-innings runs. The margin is
+how many runs the side batting first wins by, so it is only scored on the
+matches it is shown for where that side went on to win. PROBABILITY_GRID and
+MARGIN_GRID are searched with candidates split across a process pool. With
+--holdout-from, matches from that season on are left out of the search and
+reported separately:
+
+    python backtest.py --matches matches.csv --deliveries deliveries.csv --holdout-from 2024
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from native_models import load_margin_model, load_win_model
+from prediction import (BUILD_DIR, MARGIN_PARAMS, PROBABILITY_PARAMS, artifact_hash,
+                        cricket_realistic_margin_array, cricket_realistic_probability_array, load_city_stats,
+                        model_outputs)
+from toss_analytics import season_year
+from venue_index import venue_index
+
+BACKTEST_DIR = BUILD_DIR / "backtest"
+REPLAY_VERSION = 1
+REPLAY_FIELDS = ("city", "season", "score", "avg_win", "ml_prob", "ml_margin", "won", "margin")
+RELIABILITY_BINS = 10
+# Probabilities are clipped this far from 0 and 1 before taking logs.
+LOG_EPS = 1e-12
+
+# Grid values per searched constant. Each derived constant is 1 minus its
+# source, so the two blend weights sum to 1 and the clip is symmetric.
+PROBABILITY_GRID = {
+    "slope": [0.04, 0.08, 0.12, 0.16, 0.24],
+    "prob_floor": [0.10, 0.20, 0.30],
+    "prob_ceiling": [0.90, 0.97],
+    "cricket_weight": [0.0, 0.25, 0.50, 0.65, 0.80, 1.0],
+    "clip_low": [0.01, 0.03],
+}
+PROBABILITY_DERIVED = {"model_weight": "cricket_weight", "clip_high": "clip_low"}
+MARGIN_GRID = {
+    "margin_rate": [0.3, 0.45, 0.6, 0.75, 0.9, 1.2],
+    "base_weight": [0.0, 0.3, 0.5, 0.7, 0.85, 1.0],
+}
+MARGIN_DERIVED = {"model_weight": "base_weight"}
+
+
+# =====================================================
+# REPLAY
+# =====================================================
+def _stats_keys(names, city_stats):
+    """{name: city_stats key, or None if the venue index cannot place it}"""
+    index = venue_index(city_stats)
+    keys = {}
+    for name in set(names):
+        try:
+            keys[name] = name if name in city_stats else index.stats_key(name)
+        except (KeyError, TypeError):
+            keys[name] = None
+    return keys
+
+
+def replay(table, win_model, margin_model, city_stats):
+    """{field: array} over the matches of a match_table whose city has stats"""
+    keys = _stats_keys(table["city"].tolist(), city_stats)
+    cities = table["city"].map(keys)
+    table = table[cities.notna()]
+    cities = cities[cities.notna()].tolist()
+    scores = table["runs_1st"].to_numpy(float)
+    avg_win, ml_prob, ml_margin = model_outputs(win_model, margin_model, city_stats, cities, scores)
+    return {
+        "city": np.array(cities, dtype=str),
+        "season": np.array([season_year(season) or 0 for season in table["season"]]),
+        "score": scores,
+        "avg_win": np.asarray(avg_win, dtype=float),
+        "ml_prob": np.asarray(ml_prob, dtype=float),
+        "ml_margin": np.asarray(ml_margin, dtype=float),
+        "won": (table["winner"] == table["team_1st"]).to_numpy(float),
+        "margin": (table["runs_1st"] - table["runs_2nd"]).to_numpy(float),
+    }
+
+
+def replay_hash(paths):
+    digest = hashlib.sha256(json.dumps([REPLAY_VERSION, artifact_hash()]).encode())
+    for path in paths:
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()
+
+
+def load_or_replay(matches_path, deliveries_path, cache_dir=BACKTEST_DIR):
+    """(path of the cached replay, replay); parses the raw files and runs the models only on a miss"""
+    from train_models import match_table
+
+    path = cache_dir / f"replay_{replay_hash([matches_path, deliveries_path])[:16]}.npz"
+    if not path.exists():
+        data = replay(match_table(matches_path, deliveries_path), load_win_model(), load_margin_model(),
+                      load_city_stats())
+        save_replay(path, data)
+    return path, read_replay(path)
+
+
+def save_replay(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(path, **data)
+
+
+def read_replay(path):
+    with np.load(path) as data:
+        return {field: data[field] for field in REPLAY_FIELDS}
+
+
+# =====================================================
+# METRICS
+# =====================================================
+def blend(data, probability_params=PROBABILITY_PARAMS, margin_params=MARGIN_PARAMS):
+    """(win probabilities, margins) the app would show for each replayed match"""
+    probs = cricket_realistic_probability_array(data["score"], data["avg_win"], data["ml_prob"], probability_params)
+    margins = cricket_realistic_margin_array(data["score"], data["avg_win"], data["ml_margin"], margin_params)
+    return probs, margins
+
+
+def brier_score(probs, outcomes):
+    return float(np.mean((probs - outcomes) ** 2))
+
+
+def log_loss(probs, outcomes):
+    probs = np.clip(probs, LOG_EPS, 1 - LOG_EPS)
+    return float(-np.mean(outcomes * np.log(probs) + (1 - outcomes) * np.log1p(-probs)))
+
+
+def margin_mae(margins, actual, won):
+    """(MAE, matches) over the matches with a predicted margin that the side batting first won.
+
+    A predicted margin is a winning margin for the side batting first, while actual is
+    first- minus second-innings runs, negative when the chase succeeds. Those matches
+    have no winning margin in runs to compare against, so they are left out.
+    """
+    shown = ~np.isnan(margins) & (won == 1)
+    if not shown.any():
+        return None, 0
+    return float(np.mean(np.abs(margins[shown] - actual[shown]))), int(shown.sum())
+
+
+def reliability_curve(probs, outcomes, bins=RELIABILITY_BINS):
+    """[{bin, predicted, observed, matches}] for each equal-width probability bin with matches in it"""
+    which = np.minimum((probs * bins).astype(int), bins - 1)
+    counts = np.bincount(which, minlength=bins)
+    predicted = np.bincount(which, weights=probs, minlength=bins)
+    observed = np.bincount(which, weights=outcomes, minlength=bins)
+    return [{"bin": [i / bins, (i + 1) / bins], "predicted": predicted[i] / counts[i],
+             "observed": observed[i] / counts[i], "matches": int(counts[i])}
+            for i in range(bins) if counts[i]]
+
+
+def evaluate(data, probability_params=PROBABILITY_PARAMS, margin_params=MARGIN_PARAMS):
+    """Every reported metric for one set of constants"""
+    probs, margins = blend(data, probability_params, margin_params)
+    mae, shown = margin_mae(margins, data["margin"], data["won"])
+    return {
+        "matches": len(probs),
+        "brier": brier_score(probs, data["won"]),
+        "log_loss": log_loss(probs, data["won"]),
+        "margin_mae": mae,
+        "margin_matches": shown,
+        "reliability": reliability_curve(probs, data["won"]),
+    }
+
+
+def subset(data, rows):
+    return {field: values[rows] for field, values in data.items()}
+
+
+# =====================================================
+# SEARCH
+# =====================================================
+def grid_candidates(grid, defaults, derived):
+    """Full parameter dicts for every point of grid, unlisted constants kept at their defaults"""
+    candidates = []
+    for values in itertools.product(*grid.values()):
+        params = {**defaults, **dict(zip(grid, values))}
+        for name, source in derived.items():
+            params[name] = round(1 - params[source], 10)
+        candidates.append(params)
+    return candidates
+
+
+_data = None
+
+
+def _load_worker_replay(path, rows):
+    global _data
+    data = read_replay(path)
+    _data = data if rows is None else subset(data, rows)
+
+
+def score_candidates(kind, candidates):
+    """Log loss ("probability") or margin MAE ("margin") of each candidate on the worker's replay"""
+    data = _data
+    if kind == "probability":
+        return [log_loss(cricket_realistic_probability_array(data["score"], data["avg_win"], data["ml_prob"], p),
+                         data["won"]) for p in candidates]
+    return [margin_mae(cricket_realistic_margin_array(data["score"], data["avg_win"], data["ml_margin"], p),
+                       data["margin"], data["won"])[0] for p in candidates]
+
+
+def search(replay_path, rows=None, workers=None, probability_grid=PROBABILITY_GRID, margin_grid=MARGIN_GRID):
+    """{kind: (best params, best loss)}: lowest log loss for the probability, lowest MAE for the margin.
+
+    Candidates are split into one task per few dozen; workers load the cached
+    replay once, so tasks carry only parameters.
+    """
+    if rows is not None and not len(rows):
+        raise ValueError("no matches to search")
+    grids = {
+        "probability": grid_candidates(probability_grid, PROBABILITY_PARAMS, PROBABILITY_DERIVED),
+        "margin": grid_candidates(margin_grid, MARGIN_PARAMS, MARGIN_DERIVED),
+    }
+    workers = workers or os.cpu_count() or 1
+    tasks = []
+    for kind, candidates in grids.items():
+        step = max(1, -(-len(candidates) // (4 * workers)))
+        tasks += [(kind, candidates[i:i + step]) for i in range(0, len(candidates), step)]
+
+    if workers > 1:
+        with ProcessPoolExecutor(workers, initializer=_load_worker_replay, initargs=(replay_path, rows)) as pool:
+            losses = list(pool.map(score_candidates, *zip(*tasks)))
+    else:
+        _load_worker_replay(replay_path, rows)
+        losses = [score_candidates(*task) for task in tasks]
+
+    by_kind = {kind: [] for kind in grids}
+    for (kind, _), chunk in zip(tasks, losses):
+        by_kind[kind] += chunk
+    best = {}
+    for kind, candidates in grids.items():
+        scores = np.array([np.inf if loss is None else loss for loss in by_kind[kind]])
+        best[kind] = (candidates[int(np.argmin(scores))], float(scores.min()))
+    return best
+
+
+# =====================================================
+# REPORT
+# =====================================================
+def format_metrics(label, result):
+    mae = "n/a" if result["margin_mae"] is None else f"{result['margin_mae']:.2f} runs"
+    return (f"  {label:<18} brier {result['brier']:.4f}  log loss {result['log_loss']:.4f}  "
+            f"margin MAE {mae} ({result['margin_matches']} of {result['matches']} matches)")
+
+
+def format_reliability(curve):
+    return "\n".join(f"    {b['bin'][0]:.1f}-{b['bin'][1]:.1f}  predicted {b['predicted']:.3f}  "
+                     f"observed {b['observed']:.3f}  ({b['matches']} matches)" for b in curve)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--matches", type=Path, required=True)
+    parser.add_argument("--deliveries", type=Path, required=True)
+    parser.add_argument("--holdout-from", type=int, default=None,
+                        help="leave matches from this season on out of the search and report them apart")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-search", action="store_true", help="only report the current constants")
+    parser.add_argument("--output", type=Path, default=None, help="write the report as JSON")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    path, data = load_or_replay(args.matches, args.deliveries)
+    print(f"Replayed {len(data['score'])} matches in {time.perf_counter() - start:.1f}s ({path.name})")
+    if args.holdout_from is None:
+        splits = {"all matches": np.arange(len(data["score"]))}
+    else:
+        held = data["season"] >= args.holdout_from
+        splits = {"search seasons": np.flatnonzero(~held), "holdout seasons": np.flatnonzero(held)}
+    search_rows = next(iter(splits.values()))
+    if not len(search_rows) and not args.no_search:
+        raise ValueError(f"--holdout-from {args.holdout_from} holds out every match (the first season is "
+                         f"{data['season'].min()}), leaving none to search")
+
+    report = {"current": {"probability": PROBABILITY_PARAMS, "margin": MARGIN_PARAMS}}
+    settings = [("current", PROBABILITY_PARAMS, MARGIN_PARAMS)]
+    if not args.no_search:
+        start = time.perf_counter()
+        best = search(path, None if args.holdout_from is None else search_rows, args.workers)
+        count = len(grid_candidates(PROBABILITY_GRID, PROBABILITY_PARAMS, PROBABILITY_DERIVED)) + len(
+            grid_candidates(MARGIN_GRID, MARGIN_PARAMS, MARGIN_DERIVED))
+        print(f"Searched {count} candidates in {time.perf_counter() - start:.2f}s")
+        report["tuned"] = {kind: params for kind, (params, _) in best.items()}
+        settings.append(("tuned", best["probability"][0], best["margin"][0]))
+
+    for split, rows in splits.items():
+        print(f"{split} ({len(rows)} matches):")
+        if not len(rows):
+            continue
+        part = subset(data, rows)
+        for label, probability_params, margin_params in settings:
+            result = evaluate(part, probability_params, margin_params)
+            report.setdefault("metrics", {}).setdefault(split, {})[label] = result
+            print(format_metrics(label, result))
+            print(format_reliability(result["reliability"]))
+    if "tuned" in report:
+        print("Tuned constants:")
+        for kind, params in report["tuned"].items():
+            changed = {name: value for name, value in params.items() if value != report["current"][kind][name]}
+            print(f"  {kind}: {changed or 'unchanged'}")
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Score large fixture files of (city, first-innings score) rows offline.
+
+Input is CSV, JSON lines or Parquet and is read --chunksize rows at a time.
+The cities and scores of each chunk go to a worker process. Each worker
+loads the native models and city_stats once and scores a chunk with a single
+predict_matches call. Chunks are written in input order as their results
+come back. At most IN_FLIGHT chunks per worker are read ahead, so memory
+stays flat no matter how large the input is:
+
+    python batch_score.py fixtures.csv scored.csv --workers 4
+    python batch_score.py fixtures.parquet scored.parquet --city-column venue --score-column first_innings
+
+The output is the input plus three columns: city_key (the city_stats key the
+city resolved to), win_probability and expected_margin. City names are
+resolved through the venue index, the same way predict_match resolves them.
+A row whose city resolves to nothing, or whose score is missing, not a
+number or outside MIN_SCORE..MAX_SCORE (the range prediction_server.py
+accepts), gets empty outputs instead of stopping the run.
+"""
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from city_stats_pipeline import read_table
+from native_models import load_margin_model, load_win_model
+from prediction import MAX_SCORE, MIN_SCORE, load_city_stats, predict_matches
+from venue_index import normalize, venue_index
+
+CHUNK_SIZE = 50_000
+# Chunks queued per worker: one being scored, one ready to start.
+IN_FLIGHT = 2
+OUTPUT_COLUMNS = ("city_key", "win_probability", "expected_margin")
+# Resolved venue names kept per worker; cleared when full.
+MAX_CITY_KEYS = 4096
+
+
+# =====================================================
+# WORKER
+# =====================================================
+_models = None
+_city_keys = {}
+
+
+def _load_worker_models():
+    global _models
+    _models = (load_win_model(), load_margin_model(), load_city_stats())
+
+
+def _city_key(name, city_stats):
+    if isinstance(name, str) and name in city_stats:
+        return name
+    # Spelling variants of one venue ("wankhede", "Wankhede ") share an entry.
+    text = normalize(name)
+    key = _city_keys.get(text, False)
+    if key is False:
+        try:
+            # The raw name, since venue IDs ("ipl-mumbai") do not survive normalize().
+            key = venue_index(city_stats).stats_key(name if isinstance(name, str) else text)
+        except KeyError:
+            key = None
+        if len(_city_keys) >= MAX_CITY_KEYS:
+            _city_keys.clear()
+        _city_keys[text] = key
+    return key
+
+
+def score_chunk(cities, scores):
+    """(city keys, win probabilities, margins) for one chunk; None / NaN where a row cannot be scored"""
+    if _models is None:
+        _load_worker_models()
+    win_model, margin_model, city_stats = _models
+    keys = [_city_key(city, city_stats) for city in cities]
+    # Cells such as "185*" or "DNB" become NaN and get empty outputs.
+    scores = pd.to_numeric(pd.Series(scores), errors="coerce").to_numpy(dtype=float)
+    probs = np.full(len(scores), np.nan)
+    margins = np.full(len(scores), np.nan)
+    # NaN fails both comparisons, so missing and non-numeric scores are left out too.
+    valid = (scores >= MIN_SCORE) & (scores <= MAX_SCORE)
+    rows = np.flatnonzero(valid & np.array([key is not None for key in keys], dtype=bool))
+    if len(rows):
+        probs[rows], margins[rows] = predict_matches(
+            win_model, margin_model, city_stats, [keys[i] for i in rows], scores[rows]
+        )
+    return keys, probs, margins
+
+
+# =====================================================
+# OUTPUT
+# =====================================================
+class ChunkWriter:
+    """Appends DataFrame chunks to a CSV or Parquet file, the first chunk setting the columns"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._parquet = None
+        self._first = True
+
+    def write(self, frame):
+        if self.path.suffix == ".parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._parquet is None:
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                # Integer columns are stored as float64: a later chunk of the same column may hold NaN
+                # or a fraction.
+                schema = pa.schema([field.with_type(pa.float64()) if pa.types.is_integer(field.type) else field
+                                    for field in table.schema], metadata=table.schema.metadata)
+                table = table.cast(schema)
+                self._parquet = pq.ParquetWriter(self.path, schema)
+            else:
+                table = pa.Table.from_pandas(self._conform(frame), preserve_index=False).cast(self._parquet.schema)
+            self._parquet.write_table(table)
+        else:
+            frame.to_csv(self.path, mode="w" if self._first else "a", header=self._first, index=False)
+        self._first = False
+
+    def _conform(self, frame):
+        """frame with text cells in columns the first chunk typed as numbers coerced to NaN"""
+        import pyarrow as pa
+
+        # CSV and JSON chunks infer types one at a time, so a "DNB" in a later chunk makes a
+        # column text that was numeric in the first one.
+        for field in self._parquet.schema:
+            if pa.types.is_floating(field.type) and not pd.api.types.is_numeric_dtype(frame[field.name]):
+                frame = frame.assign(**{field.name: pd.to_numeric(frame[field.name], errors="coerce")})
+        return frame
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# =====================================================
+# DRIVER
+# =====================================================
+def score_file(input_path, output_path, workers=None, chunksize=CHUNK_SIZE, city_column="city",
+               score_column="score"):
+    """Score every row of input_path into output_path; returns the number of rows"""
+    workers = workers or os.cpu_count() or 1
+    rows = 0
+
+    def finish(chunk, result):
+        keys, probs, margins = result
+        # A string dtype even when every key is None, so later Parquet chunks match the first one's schema.
+        keys = pd.array(keys, dtype="string")
+        chunk = chunk.assign(**dict(zip(OUTPUT_COLUMNS, (keys, probs, margins))))
+        writer.write(chunk)
+        return len(chunk)
+
+    with ChunkWriter(output_path) as writer:
+        if workers == 1:
+            _load_worker_models()
+            for chunk in read_table(input_path, chunksize):
+                rows += finish(chunk, score_chunk(chunk[city_column].tolist(), chunk[score_column].to_numpy()))
+            return rows
+
+        with ProcessPoolExecutor(workers, initializer=_load_worker_models) as pool:
+            pending = deque()
+            for chunk in read_table(input_path, chunksize):
+                pending.append((chunk, pool.submit(score_chunk, chunk[city_column].tolist(),
+                                                   chunk[score_column].to_numpy())))
+                if len(pending) >= IN_FLIGHT * workers:
+                    chunk, future = pending.popleft()
+                    rows += finish(chunk, future.result())
+            while pending:
+                chunk, future = pending.popleft()
+                rows += finish(chunk, future.result())
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", type=Path, help="CSV, JSON lines (.jsonl) or Parquet file")
+    parser.add_argument("output", type=Path, help="CSV, or Parquet if it ends in .parquet")
+    parser.add_argument("--city-column", default="city")
+    parser.add_argument("--score-column", default="score")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    workers = args.workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    rows = score_file(args.input, args.output, workers, args.chunksize, args.city_column, args.score_column)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {rows} rows into {args.output} in {elapsed:.1f}s with {workers} worker(s): "
+          f"{rows / elapsed:,.0f} rows/s, {rows / elapsed / workers:,.0f} rows/s per core")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Bytes sent and time-to-render per rerun of the Streamlit app.
+
+Starts `streamlit run app2.py` headless and drives it over its websocket the
+way a browser does: each interaction sends a rerun request with the changed
+widget state, scoped to the widget's fragment when it has one. For every
+rerun it reports the bytes of the messages received, the number of deltas,
+and the time until the first delta and until the script finished. It then
+fetches the static assets the page references (see assets.py), once cold and
+once revalidated with the ETag a browser would send.
+
+    python benchmarks/bench_app_payload.py
+    python benchmarks/bench_app_payload.py --cities Mumbai Chennai Delhi --repeat 5
+"""
+import argparse
+import asyncio
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from websockets.asyncio.client import connect
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from assets import load_or_build_assets  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class AppSession:
+    """A minimal Streamlit client: tracks widget ids by label and sends reruns"""
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.widgets = {}       # label -> (widget id, fragment id)
+        self.state = {}         # widget id -> WidgetState sent with every rerun
+
+    async def rerun(self, changes=(), fragment_id=""):
+        """Send one rerun; returns (bytes, deltas, first delta seconds, finished seconds)"""
+        msg = BackMsg()
+        client_state = msg.rerun_script
+        client_state.fragment_id = fragment_id
+        triggers = []
+        for label, field, value in changes:
+            widget_id, _ = self.widgets[label]
+            if field == "trigger_value":
+                triggers.append((widget_id, field, value))
+            else:
+                self.state[widget_id] = (field, value)
+        for widget_id, (field, value) in list(self.state.items()) + [(w, (f, v)) for w, f, v in triggers]:
+            widget = client_state.widget_states.widgets.add()
+            widget.id = widget_id
+            setattr(widget, field, value)
+
+        start = time.perf_counter()
+        await self.websocket.send(msg.SerializeToString())
+        received = deltas = 0
+        first_delta = None
+        while True:
+            frame = await self.websocket.recv()
+            received += len(frame)
+            forward = ForwardMsg()
+            forward.ParseFromString(frame)
+            kind = forward.WhichOneof("type")
+            if kind == "delta":
+                deltas += 1
+                if first_delta is None:
+                    first_delta = time.perf_counter() - start
+                self._record_widget(forward.delta)
+            elif kind == "script_finished":
+                return received, deltas, first_delta or 0.0, time.perf_counter() - start
+
+    def _record_widget(self, delta):
+        if delta.WhichOneof("type") != "new_element":
+            return
+        element = getattr(delta.new_element, delta.new_element.WhichOneof("type"))
+        if hasattr(element, "id") and hasattr(element, "label") and element.id:
+            self.widgets[element.label] = (element.id, delta.fragment_id)
+
+    async def interact(self, label, field, value):
+        _, fragment_id = self.widgets[label]
+        return await self.rerun([(label, field, value)], fragment_id)
+
+
+async def drive(port, cities, repeat):
+    url = f"ws://127.0.0.1:{port}/_stcore/stream"
+    async with connect(url, subprotocols=["streamlit"], max_size=None) as websocket:
+        session = AppSession(websocket)
+        steps = [("initial load", await session.rerun())]
+        steps.append(("predict click", await session.interact("🎯 Predict Outcome", "trigger_value", True)))
+        steps.append(("Yet To Bat", await session.interact("Analysis Mode", "string_value", "Yet To Bat")))
+        for city in cities * repeat:
+            steps.append((f"city {city}", await session.interact("Match City", "string_value", city)))
+        return steps
+
+
+def fetch_assets(port):
+    """(name, bytes, revalidation status, Cache-Control) for every built asset"""
+    results = []
+    for name in load_or_build_assets().manifest["assets"]:
+        url = f"http://127.0.0.1:{port}/{load_or_build_assets().url(name)}"
+        with urllib.request.urlopen(url) as response:
+            body = response.read()
+            etag = response.headers.get("ETag")
+            cache_control = response.headers.get("Cache-Control") or "-"
+        request = urllib.request.Request(url, headers={"If-None-Match": etag} if etag else {})
+        try:
+            with urllib.request.urlopen(request) as response:
+                status = response.status
+        except urllib.error.HTTPError as exc:
+            status = exc.code
+        results.append((name, len(body), status, cache_control))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cities", nargs="+", default=["Mumbai", "Chennai", "Delhi"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--script", default="app2.py",
+                        help="serve_app.py serves the static assets with cache headers")
+    args = parser.parse_args()
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", args.script, "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=REPO_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                time.sleep(0.2)
+        steps = asyncio.run(drive(port, args.cities, args.repeat))
+        static = fetch_assets(port)
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{'rerun':<20} {'bytes':>9} {'deltas':>7} {'first delta':>12} {'finished':>10}")
+    for name, (received, deltas, first_delta, finished) in steps:
+        print(f"{name:<20} {received:>9} {deltas:>7} {first_delta * 1000:>10.1f}ms {finished * 1000:>8.1f}ms")
+    city_steps = [step for name, step in steps if name.startswith("city ")][len(args.cities):]
+    if city_steps:
+        print(f"\ncity change (median of {len(city_steps)}, first pass excluded): "
+              f"{statistics.median(s[0] for s in city_steps):.0f} bytes, "
+              f"{statistics.median(s[3] for s in city_steps) * 1000:.1f}ms")
+
+    print(f"\n{'static asset':<20} {'bytes':>9} {'revalidated':>12}  Cache-Control")
+    for name, size, status, cache_control in static:
+        print(f"{name:<20} {size:>9} {status:>12}  {cache_control}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Per-rerun cost of the logo header: CPU time and bytes sent.
+
+Compares reading and base64-encoding IPL_LOGO.png into a data URI on every
+rerun (the previous header) with the built assets, referenced by URL or, when
+static serving is off, inlined from bytes encoded once per process.
+
+    python benchmarks/bench_assets.py
+"""
+import argparse
+import base64
+import statistics
+import sys
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from assets import load_or_build_assets  # noqa: E402
+
+HEADER = '<div class="header-container"><img src="{}" class="ipl-logo"><h1>IPL Match Prediction & Analytics</h1></div>'
+
+
+def per_rerun_base64():
+    with open(REPO_DIR / "IPL_LOGO.png", "rb") as img_file:
+        return "data:image/png;base64," + base64.b64encode(img_file.read()).decode()
+
+
+def measure(fn, repeat, number=1000):
+    """(median microseconds per call, bytes of the header HTML)"""
+    header = HEADER.format(fn())
+    runs = []
+    for _ in range(repeat):
+        start = time.process_time()
+        for _ in range(number):
+            HEADER.format(fn())
+        runs.append((time.process_time() - start) / number)
+    return statistics.median(runs) * 1e6, len(header.encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    assets = load_or_build_assets()
+    cases = {
+        "read + base64 every rerun": per_rerun_base64,
+        "built asset, data URI": lambda: assets.src("ipl_logo", static_serving=False),
+        "built asset, static URL": lambda: assets.src("ipl_logo", static_serving=True),
+    }
+    print(f"{'logo header':<28} {'CPU/rerun':>11} {'header bytes':>13}")
+    for name, fn in cases.items():
+        cpu, size = measure(fn, args.repeat)
+        print(f"{name:<28} {cpu:>9.1f}us {size:>13}")
+
+    print()
+    for name, entry in assets.manifest["assets"].items():
+        print(f"{name:<10} {entry['source_bytes']:>8} -> {entry['bytes']:>7} bytes  "
+              f"{entry['width']}x{entry['height']} {entry['mime']}")
+
+
+if __name__ == "__main__":
+    main()
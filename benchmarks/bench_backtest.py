@@ -0,0 +1,82 @@
+"""Backtest replay and blending-constant search time over synthetic match tables.
+
+Builds a match table of random first-innings totals at the cities in
+city_stats.json, with results drawn around each city's avg_winning_score.
+It then times the one-off replay through the models, the grid search over
+the cached replay with each worker count, and, for comparison, the cost of
+every candidate without the cache: a batched replay each, or one
+predict_match per match (estimated from a sample).
+
+    python benchmarks/bench_backtest.py --matches 10000 100000 --workers 1 2
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from backtest import (MARGIN_DERIVED, MARGIN_GRID, PROBABILITY_DERIVED, PROBABILITY_GRID,  # noqa: E402
+                      grid_candidates, replay, save_replay, search)
+from native_models import load_margin_model, load_win_model  # noqa: E402
+from prediction import MARGIN_PARAMS, PROBABILITY_PARAMS, load_city_stats, predict_match  # noqa: E402
+
+SAMPLE = 500
+
+
+def match_table(n, city_stats, seed=0):
+    rng = np.random.default_rng(seed)
+    cities = np.array(list(city_stats))[rng.integers(0, len(city_stats), n)]
+    avg_win = np.array([city_stats[city]["avg_winning_score"] for city in cities])
+    runs_1st = np.round(rng.normal(avg_win - 10, 25)).clip(60, 280)
+    won = rng.random(n) < 1 / (1 + np.exp(-0.05 * (runs_1st - avg_win)))
+    runs_2nd = np.where(won, runs_1st - rng.integers(1, 40, n), runs_1st + rng.integers(1, 6, n))
+    return pd.DataFrame({"city": cities, "season": rng.integers(2008, 2026, n), "runs_1st": runs_1st,
+                         "runs_2nd": runs_2nd, "team_1st": "A", "winner": np.where(won, "A", "B")})
+
+
+def candidate_count():
+    return (len(grid_candidates(PROBABILITY_GRID, PROBABILITY_PARAMS, PROBABILITY_DERIVED))
+            + len(grid_candidates(MARGIN_GRID, MARGIN_PARAMS, MARGIN_DERIVED)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--matches", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2])
+    args = parser.parse_args()
+
+    win_model, margin_model, city_stats = load_win_model(), load_margin_model(), load_city_stats()
+    candidates = candidate_count()
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.matches:
+            table = match_table(n, city_stats)
+            start = time.perf_counter()
+            data = replay(table, win_model, margin_model, city_stats)
+            replay_time = time.perf_counter() - start
+            path = Path(tmp) / f"replay_{n}.npz"
+            save_replay(path, data)
+
+            sample = table.head(SAMPLE)
+            start = time.perf_counter()
+            for city, score in zip(sample["city"], sample["runs_1st"]):
+                predict_match(win_model, margin_model, city_stats, city, score)
+            per_match = (time.perf_counter() - start) / len(sample)
+
+            print(f"{n} matches, {candidates} candidates")
+            print(f"  replay through the models    {replay_time:8.2f}s (once per data and model version)")
+            for workers in args.workers:
+                start = time.perf_counter()
+                search(path, workers=workers)
+                print(f"  search, {workers} worker(s)          {time.perf_counter() - start:8.2f}s")
+            print(f"  replay per candidate         {replay_time * candidates:8.0f}s (estimated, no cache)")
+            print(f"  predict_match per candidate  {per_match * n * candidates:8.0f}s (estimated, no cache)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Batch scoring throughput and memory over synthetic fixture files.
+
+Writes fixture files of random (city, score) rows, a few with unknown
+venues or missing scores, then scores each one with batch_score.score_file
+and reports rows/s and rows/s per worker. With --trace-memory each file is
+scored once more under tracemalloc, which is several times slower, and the
+peak is printed. It is traced in this process only, so it is exact for
+--workers 1 and covers the reader and writer otherwise. Either way it should
+not grow with the row count.
+
+    python benchmarks/bench_batch_score.py --rows 200000 1000000 --workers 1 2 --trace-memory
+"""
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from batch_score import score_file  # noqa: E402
+from prediction import load_city_stats  # noqa: E402
+
+
+def write_fixture(path, n, cities, seed=0):
+    rng = np.random.default_rng(seed)
+    names = np.array(cities + ["Wankhede Stadium", "Unknown Ground"])
+    scores = rng.integers(100, 260, n).astype(float)
+    scores[rng.random(n) < 0.001] = np.nan
+    frame = pd.DataFrame({"fixture_id": np.arange(n), "city": names[rng.integers(0, len(names), n)],
+                          "score": scores})
+    if path.suffix == ".parquet":
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_csv(path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[200_000, 1_000_000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--formats", nargs="+", default=["csv", "parquet"], choices=["csv", "parquet"])
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--trace-memory", action="store_true")
+    args = parser.parse_args()
+
+    cities = list(load_city_stats())
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for fmt in args.formats:
+            for n in args.rows:
+                source = tmp / f"fixtures_{n}.{fmt}"
+                write_fixture(source, n, cities)
+                for workers in args.workers:
+                    start = time.perf_counter()
+                    rows = score_file(source, tmp / f"scored.{fmt}", workers, args.chunksize)
+                    elapsed = time.perf_counter() - start
+                    line = (f"{fmt:<8} {rows:>9} rows  {workers} worker(s)  {rows / elapsed:>10,.0f} rows/s  "
+                            f"{rows / elapsed / workers:>10,.0f} rows/s per worker")
+                    if args.trace_memory:
+                        tracemalloc.start()
+                        score_file(source, tmp / f"scored.{fmt}", workers, args.chunksize)
+                        _, peak = tracemalloc.get_traced_memory()
+                        tracemalloc.stop()
+                        line += f"  peak {peak / 2**20:6.1f} MiB"
+                    print(line)
+
+
+if __name__ == "__main__":
+    main()
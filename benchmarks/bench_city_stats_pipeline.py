@@ -0,0 +1,81 @@
+"""Ingestion benchmark for city_stats_pipeline.py.
+
+Generates synthetic seasons of ball-by-ball data, ingests them in chunks, and
+reports throughput and peak traced memory. Peak memory should stay flat as
+seasons are added. The last run also times an incremental update that adds
+one new match to the saved aggregates.
+
+    python benchmarks/bench_city_stats_pipeline.py --seasons 5 20
+"""
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from city_stats_pipeline import CityStatsAggregator  # noqa: E402
+from synthetic_ipl import generate  # noqa: E402
+
+
+def ingest(data_dir, chunksize):
+    aggregator = CityStatsAggregator()
+    tracemalloc.start()
+    start = time.perf_counter()
+    aggregator.ingest(data_dir / "matches.csv", data_dir / "deliveries.csv", chunksize)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return aggregator, elapsed, peak
+
+
+def incremental_update(aggregator, data_dir, work_dir):
+    """Save the aggregates, then time loading them and adding one new match"""
+    matches = pd.read_csv(data_dir / "matches.csv")
+    match = matches.iloc[-1].to_dict()
+    deliveries = pd.read_csv(data_dir / "deliveries.csv")
+    deliveries = deliveries[deliveries["match_id"] == match["id"]].copy()
+
+    # Replay the last match under a new id, as next season's first fixture.
+    match["id"] = deliveries["match_id"] = int(matches["id"].max()) + 1
+    deliveries = deliveries.to_dict("records")
+    state_path = work_dir / "state.json"
+    aggregator.save_state(state_path)
+
+    start = time.perf_counter()
+    restored = CityStatsAggregator.load_state(state_path)
+    loaded = time.perf_counter()
+    restored.add_match(match, deliveries)
+    restored.city_stats()
+    done = time.perf_counter()
+    return (loaded - start) * 1000, (done - loaded) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seasons", type=int, nargs="+", default=[5, 20])
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        for seasons in args.seasons:
+            data_dir = work_dir / f"seasons_{seasons}"
+            n_deliveries = generate(data_dir, seasons)
+            aggregator, elapsed, peak = ingest(data_dir, args.chunksize)
+            print(
+                f"seasons={seasons:>3}  deliveries={n_deliveries:>9}  time={elapsed:6.2f}s  "
+                f"throughput={n_deliveries / elapsed:>9.0f} deliveries/s  peak memory={peak / 2**20:6.1f}MB"
+            )
+
+        load_ms, update_ms = incremental_update(aggregator, data_dir, work_dir)
+        print(f"incremental: load state {load_ms:.1f}ms, add one match + export {update_ms:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Load-time and memory benchmark: city_stats.json vs the columnar format.
+
+Scales the real city_stats.json up to N venues by cloning rows with jittered
+numbers and renamed players. For each size it reports file size, time to load
+and look up one venue, memory held after loading, and the per-lookup cost
+of a single field and of a full venue view.
+
+    python benchmarks/bench_columnar_stats.py --venues 10 1000 100000
+"""
+import argparse
+import gc
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from columnar_stats import load_columnar_stats, write_columnar_stats  # noqa: E402
+from prediction import load_city_stats  # noqa: E402
+
+
+def scaled_city_stats(n_venues, seed=0):
+    rng = random.Random(seed)
+    base = load_city_stats()
+    templates = list(base.values())
+    stats = {}
+    for i in range(n_venues):
+        name = list(base)[i] if i < len(base) else f"Venue {i}"
+        row = json.loads(json.dumps(templates[i % len(templates)]))
+        if i >= len(base):
+            for field in ("avg_score", "avg_second_score", "avg_winning_score", "highest_chase"):
+                row[field] += rng.randint(-15, 15)
+            for board in ("top_run_scorers", "top_wicket_takers"):
+                for entry in row[board]:
+                    entry["player"] = f"{entry['player']} {rng.randint(0, n_venues)}"
+        stats[name] = row
+    return stats
+
+
+def measure(load, lookup_venue):
+    """(load + first lookup in ms, bytes retained by the loaded object)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    stats = load()
+    stats[lookup_venue]["avg_score"]
+    elapsed = time.perf_counter() - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return stats, elapsed * 1000, retained
+
+
+def per_lookup_us(fn, venues, repeat=20_000):
+    start = time.perf_counter()
+    for i in range(repeat):
+        fn(venues[i % len(venues)])
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--venues", type=int, nargs="+", default=[10, 1000, 100_000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_venues in args.venues:
+            stats = scaled_city_stats(n_venues)
+            json_path, columnar_path = Path(tmp) / f"{n_venues}.json", Path(tmp) / f"{n_venues}.bin"
+            json_path.write_text(json.dumps(stats, indent=4))
+            write_columnar_stats(stats, columnar_path)
+            venues = random.Random(1).choices(list(stats), k=1000)
+            del stats
+
+            def load_json():
+                with open(json_path) as f:
+                    return json.load(f)
+
+            columnar, col_ms, col_mem = measure(lambda: load_columnar_stats(columnar_path), venues[0])
+            json_stats, json_ms, json_mem = measure(load_json, venues[0])
+
+            print(f"venues={n_venues}")
+            print(f"  json      size={json_path.stat().st_size / 1024:9.0f}KB  load+lookup={json_ms:9.2f}ms  "
+                  f"heap={json_mem / 2**20:8.2f}MB  "
+                  f"field={per_lookup_us(lambda v: json_stats[v]['avg_score'], venues):6.2f}us  "
+                  f"venue={per_lookup_us(lambda v: json_stats[v], venues):6.2f}us")
+            print(f"  columnar  size={columnar_path.stat().st_size / 1024:9.0f}KB  load+lookup={col_ms:9.2f}ms  "
+                  f"heap={col_mem / 2**20:8.2f}MB  "
+                  f"field={per_lookup_us(lambda v: columnar.value(v, 'avg_score'), venues):6.2f}us  "
+                  f"venue={per_lookup_us(lambda v: columnar[v], venues):6.2f}us")
+            del json_stats, columnar
+
+
+if __name__ == "__main__":
+    main()
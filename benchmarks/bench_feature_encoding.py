@@ -0,0 +1,115 @@
+"""Feature encoding cost per prediction: time and memory allocated.
+
+Compares rebuilding the feature matrix on every call (the previous
+build_feature_matrix: column map, city lookups and a zeroed matrix per call)
+with the cached FeatureEncoder, dense and CSR, and then full predict_match /
+predict_matches calls on the native models. Allocation is measured with
+tracemalloc: the peak traced bytes above the starting point, per call.
+
+    python benchmarks/bench_feature_encoding.py --rows 1 10000
+"""
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from native_models import load_margin_model, load_win_model  # noqa: E402
+from prediction import PREDICTION_YEAR, feature_encoder, load_city_stats, predict_match, predict_matches  # noqa: E402
+
+
+def rebuild_feature_matrix(feature_names, city_stats, cities, scores):
+    """The per-call encoding FeatureEncoder replaced"""
+    columns = {name: i for i, name in enumerate(feature_names)}
+    scores = np.asarray(scores, dtype=float)
+    unique_cities, city_idx = np.unique(np.asarray(cities, dtype=str), return_inverse=True)
+
+    avg_score = np.array([city_stats[c]["avg_score"] for c in unique_cities], dtype=float)[city_idx]
+    avg_win = np.array([city_stats[c]["avg_winning_score"] for c in unique_cities], dtype=float)[city_idx]
+
+    X = np.zeros((len(scores), len(columns)))
+    X[:, columns["year"]] = PREDICTION_YEAR
+    X[:, columns["innings_1st"]] = 1
+    X[:, columns["innings_2nd"]] = 2
+    X[:, columns["innings_score_1st"]] = scores
+    X[:, columns["innings_score_2nd"]] = 0
+    X[:, columns["toss_winner_batted_first"]] = 1
+    X[:, columns["score_vs_avg"]] = scores - avg_score
+    X[:, columns["score_vs_winning_avg"]] = scores - avg_win
+    X[:, columns["score_percentile"]] = 0.5
+    X[:, columns["is_high_score"]] = scores >= avg_win
+    X[:, columns["innings_momentum"]] = (scores - 120) / 120
+
+    city_cols = np.array([columns.get(f"city_{c}", -1) for c in unique_cities])[city_idx]
+    rows = np.flatnonzero(city_cols >= 0)
+    X[rows, city_cols[rows]] = 1
+    return X, avg_win
+
+
+def measure(fn, repeat):
+    """(median ms per call, peak bytes allocated by one call)"""
+    fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times) * 1000, peak - base
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 10_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    city_stats = load_city_stats()
+    win_model, margin_model = load_win_model(), load_margin_model()
+    names = win_model.feature_names_in_
+    encoder = feature_encoder(names, city_stats)
+
+    rng = np.random.default_rng(0)
+    venues = list(city_stats)
+    for rows in args.rows:
+        cities = [venues[i] for i in rng.integers(len(venues), size=rows)]
+        scores = rng.integers(100, 301, size=rows).astype(float)
+        cases = {
+            "features: rebuild per call": lambda: rebuild_feature_matrix(names, city_stats, cities, scores),
+            "features: encoder": lambda: encoder.encode(cities, scores),
+            "features: encoder (CSR)": lambda: encoder.encode_sparse(cities, scores),
+            "predict_matches": lambda: predict_matches(win_model, margin_model, city_stats, cities, scores),
+            "predict_matches (CSR)": lambda: predict_matches(win_model, margin_model, city_stats, cities, scores,
+                                                             sparse=True),
+        }
+        if rows == 1:
+            cases["features: encoder.encode_one"] = lambda: encoder.encode_one(cities[0], scores[0])
+            cases["predict_match"] = lambda: predict_match(win_model, margin_model, city_stats, cities[0], scores[0])
+
+        print(f"rows={rows}")
+        for name, fn in cases.items():
+            elapsed, peak = measure(fn, args.repeat)
+            print(f"  {name:<30} {elapsed:9.3f}ms  {peak / 1024:10.1f} KiB allocated  "
+                  f"({peak / rows:8.0f} B/row)")
+
+        dense, _ = encoder.encode(cities, scores)
+        sparse, _ = encoder.encode_sparse(cities, scores)
+        sparse_bytes = sparse.data.nbytes + sparse.indices.nbytes + sparse.indptr.nbytes
+        print(f"  matrix size: dense {dense.nbytes / 1024:.1f} KiB, CSR {sparse_bytes / 1024:.1f} KiB "
+              f"({sparse.nnz / rows:.1f} stored values per row of {dense.shape[1]})")
+
+
+if __name__ == "__main__":
+    main()
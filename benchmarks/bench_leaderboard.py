@@ -0,0 +1,84 @@
+"""Leaderboard query latency over a large player-venue-season table.
+
+Fills a Leaderboard with random (player, city, season, team, opponent) rows,
+then times uncached top-k queries with and without filters, a cached
+query, and adding one match (with the cache invalidation it triggers).
+
+    python benchmarks/bench_leaderboard.py --rows 100000 1000000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from leaderboard import Leaderboard  # noqa: E402
+
+QUERIES = [
+    ("runs, top 10", dict(stat="runs", k=10)),
+    ("wickets, top 50", dict(stat="wickets", k=50)),
+    ("strike rate, top 10", dict(stat="strike_rate", k=10)),
+    ("runs by city, top 5", dict(stat="runs", k=5, city="City 3")),
+    ("economy by city + season", dict(stat="economy", k=10, city="City 3", season=2015)),
+    ("runs by team vs opponent", dict(stat="runs", k=10, team="Team 1", opponent="Team 2")),
+]
+
+
+def random_records(rng, n, players, cities, seasons, teams):
+    for _ in range(n):
+        team, opponent = rng.sample(range(teams), 2)
+        balls = rng.randint(1, 60)
+        bowled = rng.choice([0, 0, 6, 12, 18, 24])
+        yield (f"Player {rng.randrange(players)}", f"City {rng.randrange(cities)}",
+               2008 + rng.randrange(seasons), f"Team {team}", f"Team {opponent}",
+               {"runs": rng.randint(0, 2 * balls), "balls": balls, "wickets": rng.randint(0, bowled // 12),
+                "balls_bowled": bowled, "runs_conceded": rng.randint(bowled, 2 * bowled)})
+
+
+def per_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--players", type=int, default=5000)
+    parser.add_argument("--cities", type=int, default=40)
+    parser.add_argument("--seasons", type=int, default=18)
+    parser.add_argument("--teams", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    for n in args.rows:
+        rng = random.Random(0)
+        board = Leaderboard()
+        start = time.perf_counter()
+        board.add_many(random_records(rng, n, args.players, args.cities, args.seasons, args.teams))
+        build = time.perf_counter() - start
+        print(f"{len(board)} rows, {len(board.values['player'])} players (filled in {build:.1f}s)")
+
+        for label, query in QUERIES:
+            def uncached():
+                board._cache.clear()
+                board.top(**query)
+            print(f"  {label:<28} {per_call(uncached, args.repeat) * 1e6:9.1f}us")
+        board.top(**QUERIES[0][1])
+        print(f"  {'cached query':<28} {per_call(lambda: board.top(**QUERIES[0][1]), args.repeat) * 1e6:9.1f}us")
+
+        # One match: 22 players' slices at one city and season.
+        for label, query in QUERIES:
+            board.top(**query)
+        match = list(random_records(rng, 22, args.players, 1, 1, 2))
+        elapsed = per_call(lambda: board.add_many(match), 1)
+        print(f"  {'add one match':<28} {elapsed * 1e6:9.1f}us  ({len(board._cache)} of {len(QUERIES)} "
+              "cached queries kept)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Replay benchmark for the live win-probability feed.
+
+Generates synthetic second-innings chases for thousands of concurrent matches
+and replays them ball by ball. Each round delivers one ball to every match
+that is still live. A round is one processor batch, so its latency is the
+worst-case latency of each delivery in it.
+
+    python benchmarks/bench_live_replay.py --matches 1000 5000
+    python benchmarks/bench_live_replay.py --write-feed live_feed.jsonl --matches 4
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from artifact_store import attach_artifact_store  # noqa: E402
+from live_feed import BALLS_PER_INNINGS, LiveFeedProcessor, LiveMatchBoard  # noqa: E402
+
+RUN_WEIGHTS = {0: 35, 1: 35, 2: 10, 3: 1, 4: 13, 6: 6}
+
+
+def synthetic_rounds(n_matches, cities, seed=0):
+    """Start events, then one list of ball events per round until every chase ends"""
+    rng = random.Random(seed)
+    outcomes, weights = list(RUN_WEIGHTS), list(RUN_WEIGHTS.values())
+    matches = {
+        f"match-{i}": {"target": rng.randint(140, 230), "runs": 0, "wickets": 0}
+        for i in range(n_matches)
+    }
+    starts = [
+        {"type": "start", "match_id": match_id, "city": rng.choice(cities),
+         "first_innings_score": state["target"] - 1}
+        for match_id, state in matches.items()
+    ]
+
+    rounds = []
+    for balls_remaining in range(BALLS_PER_INNINGS - 1, -1, -1):
+        events = []
+        for match_id, state in matches.items():
+            if state["runs"] >= state["target"] or state["wickets"] >= 10:
+                continue
+            runs = rng.choices(outcomes, weights)[0]
+            wicket = int(rng.random() < 0.045)
+            state["runs"] += runs
+            state["wickets"] += wicket
+            events.append({"type": "ball", "match_id": match_id, "runs": runs,
+                           "wicket": wicket, "balls_remaining": balls_remaining})
+        if events:
+            rounds.append(events)
+    return starts, rounds
+
+
+def replay(n_matches, store):
+    city_stats = store.city_stats
+    starts, rounds = synthetic_rounds(n_matches, list(city_stats))
+    processor = LiveFeedProcessor(LiveMatchBoard(store.win_model, city_stats), history=0)
+
+    processor.process(starts)
+    latencies = []
+    start = time.perf_counter()
+    for events in rounds:
+        t0 = time.perf_counter()
+        processor.process(events)
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000
+    print(
+        f"matches={n_matches:>6}  deliveries={processor.deliveries:>8}  "
+        f"round p50={np.percentile(ms, 50):7.2f}ms  p99={np.percentile(ms, 99):7.2f}ms  "
+        f"max={ms.max():7.2f}ms  throughput={processor.deliveries / elapsed:10.0f} deliveries/s"
+    )
+
+
+def write_feed(path, n_matches, city_stats):
+    starts, rounds = synthetic_rounds(n_matches, list(city_stats))
+    with open(path, "w") as f:
+        for event in starts + [event for events in rounds for event in events]:
+            f.write(json.dumps(event) + "\n")
+    print(f"Wrote {n_matches} matches to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--matches", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--write-feed", type=Path, help="write a synthetic feed file and exit")
+    args = parser.parse_args()
+
+    store = attach_artifact_store()
+    if args.write_feed:
+        write_feed(args.write_feed, args.matches[0], store.city_stats)
+        return
+    for n_matches in args.matches:
+        replay(n_matches, store)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Model-call latency: pickled models vs the native tree arrays.
+
+Times the win and margin model calls (predict_proba + predict) on a prebuilt
+feature matrix, for one row and for a large batch, with three backends:
+
+- pickle: the unpickled scikit-learn / XGBoost models (pandas input)
+- walk:   native models walking every tree level by level (CompiledTrees)
+- tables: native models evaluated through TreeTables
+
+    python benchmarks/bench_native_inference.py --rows 1 10000
+"""
+import argparse
+import statistics
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from native_models import load_margin_model, load_win_model  # noqa: E402
+from prediction import build_feature_matrix, load_artifacts, model_input  # noqa: E402
+
+
+def time_models(win_model, margin_model, X, repeat):
+    def call():
+        win_model.predict_proba(model_input(win_model, X))
+        margin_model.predict(model_input(margin_model, X))
+
+    call()
+    runs = []
+    number = max(1, 1000 // len(X))
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        runs.append((time.perf_counter() - start) / number)
+    return statistics.median(runs) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 10_000])
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    win_model, margin_model, city_stats = load_artifacts()
+    walk_win, walk_margin = load_win_model(), load_margin_model()
+    walk_win.tables = walk_margin.tables = None
+    backends = {
+        "pickle": (win_model, margin_model),
+        "walk": (walk_win, walk_margin),
+        "tables": (load_win_model(), load_margin_model()),
+    }
+
+    rng = np.random.default_rng(0)
+    cities = list(city_stats)
+    for rows in args.rows:
+        X, _ = build_feature_matrix(
+            win_model.feature_names_in_, city_stats,
+            [cities[i] for i in rng.integers(len(cities), size=rows)], rng.integers(100, 301, size=rows),
+        )
+        timings = {name: time_models(win, margin, X, args.repeat) for name, (win, margin) in backends.items()}
+        line = "  ".join(f"{name}={ms:8.2f}ms" for name, ms in timings.items())
+        print(f"rows={rows:>7}  {line}  tables vs pickle: {timings['pickle'] / timings['tables']:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Per-process memory with 1, 4 and 16 concurrent workers.
+
+Every worker is a fresh interpreter (multiprocessing "spawn"), like a
+separate Streamlit process. It loads the artifacts, makes a prediction for
+every city, reads every city's stats and then reports its memory while all
+workers are still alive:
+
+- pickle: each worker unpickles its own models and parses city_stats.json
+- shared: each worker attaches build/artifact_store.bin read-only
+
+RSS counts shared pages in full. PSS splits them between the processes that
+map them, and USS counts only the pages private to the process.
+
+    python benchmarks/bench_shared_memory.py --workers 1 4 16
+"""
+import argparse
+import multiprocessing
+import statistics
+import sys
+import warnings
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+
+def memory_kb():
+    """Rss, Pss and Private_* totals from /proc/self/smaps_rollup, in kB"""
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "uss": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def worker(mode, barrier, results):
+    warnings.filterwarnings("ignore")
+    import prediction
+
+    if mode == "pickle":
+        win_model, margin_model, city_stats = prediction.load_artifacts()
+    else:
+        from artifact_store import attach_artifact_store
+
+        store = attach_artifact_store()
+        win_model, margin_model, city_stats = store.win_model, store.margin_model, store.city_stats
+
+    cities = list(city_stats)
+    prediction.predict_matches(win_model, margin_model, city_stats, cities, [180] * len(cities))
+    for city in cities:
+        city_stats[city]["top_run_scorers"]
+
+    barrier.wait()
+    results.put(memory_kb())
+    barrier.wait()
+
+
+def measure(mode, n_workers):
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(n_workers)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(mode, barrier, results)) for _ in range(n_workers)]
+    for proc in procs:
+        proc.start()
+    samples = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    from artifact_store import attach_artifact_store
+
+    attach_artifact_store()  # build the store up front so no worker measures a rebuild
+
+    print(f"{'mode':<7} {'workers':>7} {'RSS/proc':>10} {'PSS/proc':>10} {'USS/proc':>10} {'total PSS':>11}")
+    for mode in ("pickle", "shared"):
+        for n_workers in args.workers:
+            samples = measure(mode, n_workers)
+            mean = {key: statistics.mean(s[key] for s in samples) / 1024 for key in ("rss", "pss", "uss")}
+            total_pss = sum(s["pss"] for s in samples) / 1024
+            print(
+                f"{mode:<7} {n_workers:>7} {mean['rss']:>8.1f}MB {mean['pss']:>8.1f}MB "
+                f"{mean['uss']:>8.1f}MB {total_pss:>9.1f}MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Latency benchmark for the Monte Carlo chase simulator.
+
+Times simulate_chase plus its summary for each request size, in-process and
+through the process pool, and checks the result against the latency budget.
+Also prints how well the simulated totals match each venue's city_stats.
+
+    python benchmarks/bench_simulation.py --sims 10000 100000 1000000 --budget-ms 200
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from prediction import load_city_stats  # noqa: E402
+from simulation import simulate_chase  # noqa: E402
+
+
+def time_request(stats, n, parallel, repeat):
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        simulate_chase(stats, 185, n=n, seed=i, parallel=parallel).summary()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sims", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--budget-ms", type=float, default=200.0, help="latency budget for 100k simulations")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    city_stats = load_city_stats()
+    print("calibration (100k sims per venue):")
+    for city, stats in city_stats.items():
+        totals = simulate_chase(stats, stats["avg_score"], n=100_000, seed=0).totals
+        print(f"  {city:<10} mean={totals.mean():6.1f} (avg_second_score {stats['avg_second_score']})  "
+              f"p97.7={np.percentile(totals, 97.7):4.0f} (highest_chase {stats['highest_chase']})")
+
+    stats = city_stats["Mumbai"]
+    simulate_chase(stats, 185, n=1000, seed=0, parallel=True)  # start the pool
+    print("\nlatency (simulate + summary, median):")
+    for n in args.sims:
+        serial = time_request(stats, n, False, args.repeat)
+        pooled = time_request(stats, n, True, args.repeat)
+        print(f"  sims={n:>9}  in-process={serial:8.1f}ms  pool={pooled:8.1f}ms  "
+              f"throughput={n / min(serial, pooled) * 1000:>10.0f} sims/s")
+        if n == 100_000:
+            best = min(serial, pooled)
+            verdict = "within" if best <= args.budget_ms else "OVER"
+            print(f"  100k simulations: {best:.1f}ms, {verdict} the {args.budget_ms:g}ms budget")
+
+
+if __name__ == "__main__":
+    main()
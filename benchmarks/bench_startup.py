@@ -0,0 +1,89 @@
+"""Cold-start benchmark: import time and time-to-first-prediction.
+
+Each scenario runs in a fresh interpreter, so nothing is warm in sys.modules.
+
+- pickle:    joblib-unpickle both models (imports scikit-learn and XGBoost)
+- native:    load the flat-array models from build/native_models/
+- analytics: run the "Yet To Bat" page through Streamlit's AppTest and check
+             that no model was loaded
+
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+PREDICTION_SCENARIO = """
+import json, sys, time, warnings
+warnings.filterwarnings("ignore")
+t0 = time.perf_counter()
+import prediction
+{import_models}
+t1 = time.perf_counter()
+win_model, margin_model, city_stats = {load}
+prediction.predict_match(win_model, margin_model, city_stats, "Mumbai", 185)
+t2 = time.perf_counter()
+print(json.dumps({{"import_s": t1 - t0, "first_prediction_s": t2 - t0,
+                   "sklearn_imported": "sklearn" in sys.modules}}))
+"""
+
+SCENARIOS = {
+    "pickle": PREDICTION_SCENARIO.format(
+        import_models="",
+        load="prediction.load_artifacts()",
+    ),
+    "native": PREDICTION_SCENARIO.format(
+        import_models="from native_models import LazyModels",
+        load="(lambda m: (m.win_model, m.margin_model, prediction.load_city_stats()))(LazyModels())",
+    ),
+    "analytics": """
+import json, sys, time, warnings
+warnings.filterwarnings("ignore")
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file("app2.py", default_timeout=120).run()
+at.radio[0].set_value("Yet To Bat").run()
+t2 = time.perf_counter()
+assert not at.exception, at.exception
+print(json.dumps({"import_s": t1 - t0, "first_prediction_s": t2 - t0,
+                  "sklearn_imported": "sklearn" in sys.modules,
+                  "models_loaded": any(k in sys.modules for k in ("xgboost", "joblib"))}))
+""",
+}
+
+
+def run_scenario(code):
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=REPO_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    # Make sure the native files exist so the native runs measure loading, not conversion.
+    subprocess.run([sys.executable, "native_models.py"], cwd=REPO_DIR, check=True,
+                   capture_output=True)
+
+    for name, code in SCENARIOS.items():
+        runs = [run_scenario(code) for _ in range(args.runs)]
+        imports = statistics.median(r["import_s"] for r in runs) * 1000
+        first = statistics.median(r["first_prediction_s"] for r in runs) * 1000
+        extra = f"  models loaded={runs[0]['models_loaded']}" if "models_loaded" in runs[0] else ""
+        print(
+            f"{name:<10} import={imports:8.1f}ms  ready={first:8.1f}ms  "
+            f"sklearn imported={runs[0]['sklearn_imported']}{extra}"
+        )
+
+
+if __name__ == "__main__":
+    main()
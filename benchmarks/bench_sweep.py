@@ -0,0 +1,56 @@
+"""What-if sweep cost: one predict_match per (city, score) vs one batched pass.
+
+Sweeps every score from SCORE_MIN to SCORE_MAX at every city three ways, with
+the native models:
+
+- loop:   predict_match once per (city, score) pair
+- batch:  build_prediction_table, one predict_matches call for every pair
+- cached: PredictionTable.sweep on a table that already has this city set
+
+    python benchmarks/bench_sweep.py
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from native_models import load_margin_model, load_win_model  # noqa: E402
+from prediction import artifact_hash, load_city_stats, predict_match  # noqa: E402
+from prediction_table import SCORE_MAX, SCORE_MIN, build_prediction_table  # noqa: E402
+
+
+def timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    win_model, margin_model, city_stats = load_win_model(), load_margin_model(), load_city_stats()
+    cities = sorted(city_stats)
+    scores = range(SCORE_MIN, SCORE_MAX + 1)
+    pairs = len(cities) * len(scores)
+
+    _, loop = timed(lambda: [predict_match(win_model, margin_model, city_stats, city, score)
+                             for city in cities for score in scores])
+    table, batch = timed(lambda: build_prediction_table(win_model, margin_model, city_stats, artifact_hash()),
+                         args.repeat)
+    table.sweep(cities)
+    _, cached = timed(lambda: table.sweep(cities), 10_000)
+
+    print(f"{len(cities)} cities x {len(scores)} scores = {pairs} predictions")
+    print(f"  loop   {loop * 1000:9.1f}ms")
+    print(f"  batch  {batch * 1000:9.1f}ms  ({loop / batch:.0f}x)")
+    print(f"  cached {cached * 1e6:9.2f}us")
+
+
+if __name__ == "__main__":
+    main()
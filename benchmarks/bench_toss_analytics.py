@@ -0,0 +1,83 @@
+"""Toss index update and query latency.
+
+Adds random match results to a TossIndex, then times summaries with
+different filters uncached and memoized, and adding one more match.
+
+    python benchmarks/bench_toss_analytics.py --matches 10000 100000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from toss_analytics import TossIndex  # noqa: E402
+
+QUERIES = [
+    ("city", dict(city="City 3")),
+    ("city + season window", dict(city="City 3", seasons=(2015, 2020))),
+    ("city + window + night + team", dict(city="City 3", seasons=(2015, 2020), day_night="night", team="Team 1")),
+    ("team, every city", dict(team="Team 1")),
+    ("everything", dict()),
+]
+
+
+def random_match(rng, cities, seasons, teams):
+    batting_first, chasing = rng.sample([f"Team {i}" for i in range(teams)], 2)
+    toss_winner = rng.choice([batting_first, chasing])
+    decision = "bat" if toss_winner == batting_first else "field"
+    winner = rng.choice([batting_first, chasing, batting_first, chasing, None])
+    return (f"City {rng.randrange(cities)}", 2008 + rng.randrange(seasons), batting_first, chasing,
+            toss_winner, decision, winner, rng.choice(["day", "night", "night", "night"]))
+
+
+def per_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--matches", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--cities", type=int, default=40)
+    parser.add_argument("--seasons", type=int, default=18)
+    parser.add_argument("--teams", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=1000)
+    args = parser.parse_args()
+
+    for n in args.matches:
+        rng = random.Random(0)
+        matches = [random_match(rng, args.cities, args.seasons, args.teams) for _ in range(n)]
+        index = TossIndex()
+        start = time.perf_counter()
+        for match in matches:
+            index.add_match(*match)
+        elapsed = time.perf_counter() - start
+        print(f"{n} matches, {len(index)} counter rows (added at {elapsed / n * 1e6:.1f}us per match)")
+
+        for label, query in QUERIES:
+            def uncached():
+                index._memo.clear()
+                index.summary(**query)
+            print(f"  {label:<30} {per_call(uncached, args.repeat) * 1e6:8.1f}us")
+        query = QUERIES[2][1]
+        index.summary(**query)
+        print(f"  {'memoized':<30} {per_call(lambda: index.summary(**query), args.repeat) * 1e6:8.1f}us")
+
+        for _, query in QUERIES:
+            index.summary(**query)
+        extra = random_match(rng, args.cities, args.seasons, args.teams)
+        elapsed = per_call(lambda: index.add_match(*extra), 1)
+        print(f"  {'add one match':<30} {elapsed * 1e6:8.1f}us  ({len(index._memo)} of {len(QUERIES)} "
+              "memoized summaries kept)")
+        elapsed = per_call(lambda: index.summary(**QUERIES[0][1]), 1)
+        print(f"  {'first query after it':<30} {elapsed * 1e6:8.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Throughput benchmark for the tournament simulator, in seasons per second.
+
+Builds a synthetic mid-season league (ten teams, the second half of a double
+round-robin still to play) and simulates it in-process and through the
+process pool.
+
+    python benchmarks/bench_tournament.py --seasons 100000 1000000
+    python benchmarks/bench_tournament.py --write-example /tmp/ipl_league   # fixtures.json + table.json
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from artifact_store import attach_artifact_store  # noqa: E402
+from synthetic_ipl import HOME_CITY, TEAMS  # noqa: E402
+from tournament import fixture_probabilities, simulate_tournament  # noqa: E402
+
+
+def synthetic_league(seed=0):
+    """(remaining fixtures, points table) halfway through a double round-robin"""
+    rng = random.Random(seed)
+    pairs = [(home, away) for home in TEAMS for away in TEAMS if home != away]
+    rng.shuffle(pairs)
+    played, remaining = pairs[:len(pairs) // 2], pairs[len(pairs) // 2:]
+
+    table = {team: {"points": 0, "nrr": round(rng.uniform(-1, 1), 3)} for team in TEAMS}
+    for home, away in played:
+        table[rng.choice([home, away])]["points"] += 2
+
+    fixtures = []
+    for home, away in remaining:
+        fixture = {"team1": home, "team2": away, "city": HOME_CITY[home]}
+        if rng.random() < 0.5:
+            fixture["batting_first"] = rng.choice([home, away])
+            fixture["score"] = rng.randint(160, 210)
+        fixtures.append(fixture)
+    return fixtures, table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seasons", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--write-example", type=Path, help="write fixtures.json and table.json and exit")
+    args = parser.parse_args()
+
+    fixtures, table = synthetic_league()
+    if args.write_example:
+        args.write_example.mkdir(parents=True, exist_ok=True)
+        (args.write_example / "fixtures.json").write_text(json.dumps(fixtures, indent=2))
+        (args.write_example / "table.json").write_text(json.dumps(table, indent=2))
+        print(f"Wrote {len(fixtures)} fixtures and a {len(table)}-team table to {args.write_example}")
+        return
+
+    store = attach_artifact_store()
+    start = time.perf_counter()
+    p_team1 = fixture_probabilities(fixtures, store.win_model, store.margin_model, store.city_stats)
+    print(f"{len(fixtures)} fixture probabilities in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    simulate_tournament(fixtures, table, p_team1, 1000, seed=0, parallel=True)  # start the pool
+    for seasons in args.seasons:
+        for parallel in (False, True):
+            start = time.perf_counter()
+            result = simulate_tournament(fixtures, table, p_team1, seasons, seed=1, parallel=parallel)
+            elapsed = time.perf_counter() - start
+            print(f"seasons={seasons:>9}  {'pool' if parallel else 'in-process':<10}  time={elapsed:6.2f}s  "
+                  f"throughput={seasons / elapsed:>10.0f} seasons/s")
+
+    print()
+    for row in result.table():
+        print(f"  {row['team']:<30} {row['expected_points']:6.1f} pts  "
+              f"playoffs {row['qualify_prob']:6.1%}  top-2 {row['top2_prob']:6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Wall-clock time of the training pipeline as the number of cores grows.
+
+Generates synthetic seasons, then times feature building with a cold and a
+warm feature cache, the cross-validated grid search with 1, 2, 4, ...
+worker processes, and a warm-start refit.
+
+    python benchmarks/bench_training.py --seasons 10 --workers 1 2 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from synthetic_ipl import generate  # noqa: E402
+from train_models import (WARM_ROUNDS, fit_models, load_or_build_features, search,  # noqa: E402
+                          warm_start_params)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seasons", type=int, default=10)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        generate(tmp, args.seasons)
+        matches, deliveries = tmp / "matches.csv", tmp / "deliveries.csv"
+        cache_dir = tmp / "features"
+
+        (path, X, y_win, y_margin), cold = timed(load_or_build_features, matches, deliveries, cache_dir=cache_dir)
+        _, warm = timed(load_or_build_features, matches, deliveries, cache_dir=cache_dir)
+        print(f"{len(X)} matches, {X.shape[1]} features  (os.cpu_count() = {os.cpu_count()})")
+        print(f"features: {cold * 1000:.0f}ms parsing the raw files, {warm * 1000:.1f}ms from the cache")
+
+        baseline = None
+        for workers in args.workers:
+            best, elapsed = timed(search, path, y_win, workers)
+            baseline = baseline or elapsed
+            print(f"search, {workers:>2} workers: {elapsed:7.2f}s  ({baseline / elapsed:4.2f}x)")
+
+        models, full = timed(fit_models, X, y_win, y_margin, best["win"][0], best["margin"][0])
+        _, warm_fit = timed(fit_models, X, y_win, y_margin, warm_start_params(models[0], WARM_ROUNDS),
+                            warm_start_params(models[1], WARM_ROUNDS), models)
+        print(f"final fit: {full:.2f}s from scratch, {warm_fit:.2f}s warm start (+{WARM_ROUNDS} trees)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Venue index lookup latency with thousands of synthetic venues.
+
+Builds an index of --venues venues spread over several leagues and seasons,
+each with a city name, a stadium name and an alias, then times exact
+resolution, word-prefix search, fuzzy search with a typo, and filtered search.
+
+    python benchmarks/bench_venue_index.py --venues 10 1000 10000
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from venue_index import Venue, VenueIndex  # noqa: E402
+
+LEAGUES = ["IPL", "WPL", "BBL", "PSL", "CPL", "SA20"]
+CONSONANTS = "bcdfghjklmnprstvwyz"
+VOWELS = "aeiou"
+
+
+def synthetic_venues(n, seed=0):
+    rng = random.Random(seed)
+    venues = []
+    for i in range(n):
+        city = "".join(rng.choice(CONSONANTS) + rng.choice(VOWELS) for _ in range(rng.randint(2, 4))).title()
+        league = rng.choice(LEAGUES)
+        first = rng.randint(2008, 2024)
+        venues.append(Venue(
+            f"{league.lower()}-{i}", f"{city} {i}", stats=None, leagues=[league],
+            seasons=range(first, rng.randint(first, 2025) + 1),
+            aliases=[f"{city} {rng.choice(['International', 'Municipal', 'Park'])} Stadium {i}", f"{city[:4]} Oval {i}"],
+        ))
+    return venues
+
+
+def typo(text, rng):
+    i = rng.randrange(1, len(text) - 1)
+    return text[:i] + text[i + 1:]
+
+
+def measure(fn, queries, repeat):
+    fn(queries[0])
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for query in queries:
+            fn(query)
+        runs.append((time.perf_counter() - start) / len(queries))
+    return statistics.median(runs) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--venues", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    for n in args.venues:
+        venues = synthetic_venues(n)
+        start = time.perf_counter()
+        index = VenueIndex(venues)
+        build = time.perf_counter() - start
+
+        sample = [rng.choice(venues) for _ in range(args.queries)]
+        cases = {
+            "resolve (exact alias)": (lambda q: index.resolve(q), [v.aliases[1] for v in sample]),
+            "search (word prefix)": (lambda q: index.search(q), [v.aliases[0].split()[1][:4] for v in sample]),
+            "search (typo)": (lambda q: index.search(q), [typo(v.name, rng) for v in sample]),
+            "resolve (typo)": (lambda q: index.resolve(q), [typo(v.aliases[0], rng) for v in sample]),
+            "search (league + season)": (lambda q: index.search(q, league="IPL", season=2020),
+                                         [typo(v.name, rng) for v in sample]),
+        }
+        print(f"venues={n} ({len(index.alias_text)} names, built in {build * 1000:.0f}ms)")
+        for name, (fn, queries) in cases.items():
+            print(f"  {name:<26} {measure(fn, queries, args.repeat):8.1f}us")
+
+
+if __name__ == "__main__":
+    main()
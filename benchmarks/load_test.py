@@ -0,0 +1,124 @@
+"""Local load test for prediction_server.py.
+
+Starts the server twice, first with micro-batching disabled and then with it
+enabled. Each run is driven by concurrent keep-alive clients, and the script
+reports p50/p99 latency and requests/sec for both. The result cache is turned
+off so every request reaches the models.
+
+    python benchmarks/load_test.py --clients 64 --requests 50
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+CITIES = sorted(json.loads((REPO_DIR / "city_stats.json").read_text()))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def post(reader, writer, body):
+    writer.write(
+        b"POST /predict HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        + f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    status = await reader.readline()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+    await reader.readexactly(length)
+    if b" 200 " not in status:
+        raise RuntimeError(f"unexpected response: {status!r}")
+
+
+async def client(port, n_requests, rows_per_request, latencies):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    rng = random.Random()
+    try:
+        for _ in range(n_requests):
+            matches = [
+                {"city": rng.choice(CITIES), "score": rng.randint(100, 300)}
+                for _ in range(rows_per_request)
+            ]
+            body = json.dumps({"matches": matches}).encode()
+            start = time.perf_counter()
+            await post(reader, writer, body)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def wait_until_ready(port, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise TimeoutError("prediction server did not start")
+
+
+async def run_load(port, clients, requests, rows_per_request):
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, requests, rows_per_request, latencies) for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    return np.array(latencies), elapsed
+
+
+def benchmark(mode, batch_window_ms, args):
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, str(REPO_DIR / "prediction_server.py"), "--port", str(port),
+         "--batch-window-ms", str(batch_window_ms), "--no-cache"],
+        cwd=REPO_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        asyncio.run(wait_until_ready(port))
+        asyncio.run(run_load(port, 4, 5, args.rows))  # warm-up
+        latencies, elapsed = asyncio.run(run_load(port, args.clients, args.requests, args.rows))
+    finally:
+        server.terminate()
+        server.wait()
+
+    ms = latencies * 1000
+    print(
+        f"{mode:<8} window={batch_window_ms:>4g}ms  requests={len(ms):>6}  "
+        f"p50={np.percentile(ms, 50):7.2f}ms  p99={np.percentile(ms, 99):7.2f}ms  "
+        f"throughput={len(ms) / elapsed:8.1f} req/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=64, help="concurrent connections")
+    parser.add_argument("--requests", type=int, default=50, help="requests per connection")
+    parser.add_argument("--rows", type=int, default=1, help="matches per request body")
+    parser.add_argument("--batch-window-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    benchmark("single", 0, args)
+    benchmark("batched", args.batch_window_ms, args)
+
+
+if __name__ == "__main__":
+    main()
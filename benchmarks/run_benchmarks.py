@@ -0,0 +1,219 @@
+"""Benchmark suite with a saved baseline and regression check.
+
+Cases:
+
+- predict_match.*:   one predict_match call (pickled models and native models)
+- predict_matches.*: every city x every score 100-300 in one batch, rows/s
+- load_artifacts.cold: unpickling both models in a fresh interpreter
+- city_stats.*:      one venue lookup (JSON dict, columnar store)
+- app.*:             one AppTest script rerun of each analysis mode
+
+    python benchmarks/run_benchmarks.py --save-baseline      # record benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py                      # compare; exit 1 on regression
+    python benchmarks/run_benchmarks.py --threshold 0.5 --only "predict_match*"
+
+Timings are the median of several repeats. A case regresses when it is worse
+than the baseline by more than --threshold (a fraction, default 0.25).
+Baselines only make sense on the machine that recorded them.
+"""
+import argparse
+import fnmatch
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from prediction import artifact_hash, load_artifacts, load_city_stats, predict_match, predict_matches  # noqa: E402
+from prediction_table import SCORE_MAX, SCORE_MIN  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_THRESHOLD = 0.25
+
+COLD_LOAD = """
+import json, time, warnings
+warnings.filterwarnings("ignore")
+t0 = time.perf_counter()
+from prediction import load_artifacts
+load_artifacts()
+print(json.dumps(time.perf_counter() - t0))
+"""
+
+
+# =====================================================
+# TIMING
+# =====================================================
+def time_call(fn, number=1, repeat=7):
+    """Median seconds per call over `repeat` runs of `number` calls"""
+    fn()
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        runs.append((time.perf_counter() - start) / number)
+    return statistics.median(runs)
+
+
+def ms(seconds):
+    return {"value": seconds * 1000, "unit": "ms", "higher_is_better": False}
+
+
+def per_second(count, seconds, unit):
+    return {"value": count / seconds, "unit": unit, "higher_is_better": True}
+
+
+# =====================================================
+# CASES
+# =====================================================
+def bench_predictions(quick):
+    from artifact_store import attach_artifact_store
+
+    win_model, margin_model, city_stats = load_artifacts()
+    store = attach_artifact_store()
+    backends = {
+        "pickle": (win_model, margin_model),
+        "native": (store.win_model, store.margin_model),
+    }
+    score_range = range(SCORE_MIN, SCORE_MAX + 1)
+    cities = [city for city in city_stats for _ in score_range]
+    scores = [score for _ in city_stats for score in score_range]
+
+    results = {}
+    for name, (win, margin) in backends.items():
+        single = time_call(lambda: predict_match(win, margin, city_stats, "Mumbai", 185),
+                           number=20 if quick else 100)
+        batch = time_call(lambda: predict_matches(win, margin, city_stats, cities, scores),
+                          number=1, repeat=3 if quick else 7)
+        results[f"predict_match.{name}"] = ms(single)
+        results[f"predict_matches.{name}"] = per_second(len(scores), batch, "rows/s")
+    return results
+
+
+def bench_cold_load(quick):
+    runs = []
+    for _ in range(2 if quick else 5):
+        out = subprocess.run([sys.executable, "-c", COLD_LOAD], cwd=REPO_DIR,
+                             capture_output=True, text=True, check=True)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {"load_artifacts.cold": ms(statistics.median(runs))}
+
+
+def bench_city_stats(quick):
+    from artifact_store import attach_artifact_store
+
+    city_stats = load_city_stats()
+    columnar = attach_artifact_store().city_stats
+    number = 2000 if quick else 20000
+    return {
+        "city_stats.dict": ms(time_call(lambda: city_stats["Mumbai"]["avg_winning_score"], number)),
+        "city_stats.columnar": ms(time_call(lambda: columnar["Mumbai"]["avg_winning_score"], number)),
+    }
+
+
+def bench_app(quick):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(REPO_DIR / "app2.py"), default_timeout=120).run()
+    repeat = 3 if quick else 7
+
+    def rerun(action):
+        action().run()
+        assert not at.exception, at.exception
+
+    # Every click is a full rerun that renders a prediction.
+    at.radio[0].set_value("First Innings Score Given").run()
+    predict = time_call(lambda: rerun(at.button[0].click), repeat=repeat)
+
+    at.radio[0].set_value("Yet To Bat").run()
+    analytics = time_call(lambda: rerun(lambda: at), repeat=repeat)
+    return {"app.predict_rerun": ms(predict), "app.analytics_rerun": ms(analytics)}
+
+
+# Case names per suite, so --only can skip whole suites.
+SUITES = [
+    (bench_predictions, ["predict_match.pickle", "predict_matches.pickle",
+                         "predict_match.native", "predict_matches.native"]),
+    (bench_cold_load, ["load_artifacts.cold"]),
+    (bench_city_stats, ["city_stats.dict", "city_stats.columnar"]),
+    (bench_app, ["app.predict_rerun", "app.analytics_rerun"]),
+]
+
+
+# =====================================================
+# BASELINE
+# =====================================================
+def compare(results, baseline, threshold):
+    """(name, change, regressed) for each case present in both runs; change > 0 is worse"""
+    rows = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None or not base["value"]:
+            continue
+        ratio = result["value"] / base["value"]
+        change = (1 / ratio - 1) if result["higher_is_better"] else (ratio - 1)
+        rows.append((name, change, change > threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction of the baseline")
+    parser.add_argument("--only", nargs="+", default=["*"], help="glob patterns over case names")
+    parser.add_argument("--output", type=Path, help="also write this run's results as JSON")
+    parser.add_argument("--quick", action="store_true", help="fewer repeats")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    results = {}
+    for bench, names in SUITES:
+        selected = [name for name in names if any(fnmatch.fnmatch(name, p) for p in args.only)]
+        if not selected:
+            continue
+        suite_results = bench(args.quick)
+        for name in selected:
+            results[name] = suite_results[name]
+            print(f"{name:<26} {results[name]['value']:>12.4g} {results[name]['unit']}", flush=True)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "artifact_hash": artifact_hash(),
+            "recorded": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    if args.save_baseline:
+        if args.baseline.exists():
+            previous = json.loads(args.baseline.read_text())["results"]
+            report["results"] = {**previous, **results}
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Saved baseline to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline first")
+        return
+    rows = compare(results, json.loads(args.baseline.read_text())["results"], args.threshold)
+    print(f"\nvs baseline (threshold {args.threshold:.0%}):")
+    for name, change, regressed in rows:
+        print(f"  {name:<26} {change:+8.1%}  {'REGRESSION' if regressed else 'ok'}")
+    if any(regressed for _, _, regressed in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
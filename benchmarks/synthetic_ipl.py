@@ -0,0 +1,117 @@
+"""Synthetic IPL match and ball-by-ball data for benchmarks.
+
+Writes matches.csv and deliveries.csv in the column layout of the public IPL
+ball-by-ball datasets, which the ingestion pipeline reads:
+
+    python benchmarks/synthetic_ipl.py --seasons 20 --out /tmp/ipl_synthetic
+"""
+import argparse
+import csv
+import random
+from pathlib import Path
+
+CITIES = ["Ahmedabad", "Bengaluru", "Chennai", "Delhi", "Hyderabad",
+          "Jaipur", "Kolkata", "Lucknow", "Mumbai", "Punjab"]
+TEAMS = ["Gujarat Titans", "Royal Challengers Bengaluru", "Chennai Super Kings",
+         "Delhi Capitals", "Sunrisers Hyderabad", "Rajasthan Royals",
+         "Kolkata Knight Riders", "Lucknow Super Giants", "Mumbai Indians", "Punjab Kings"]
+HOME_CITY = dict(zip(TEAMS, CITIES))
+
+MATCH_COLUMNS = ["id", "season", "city", "date", "team1", "team2", "toss_winner",
+                 "toss_decision", "winner", "result", "result_margin", "target_runs", "day_night"]
+DELIVERY_COLUMNS = ["match_id", "inning", "batting_team", "bowling_team", "over", "ball",
+                    "batter", "bowler", "batsman_runs", "extra_runs", "total_runs",
+                    "is_wicket", "dismissal_kind"]
+
+RUN_OUTCOMES = [0, 1, 2, 3, 4, 6]
+RUN_WEIGHTS = [34, 37, 9, 1, 13, 6]
+DISMISSALS = ["caught", "caught", "caught", "bowled", "lbw", "run out", "stumped"]
+
+
+def squad(team):
+    initials = "".join(word[0] for word in team.split())
+    return [f"{initials} Batter {i}" for i in range(1, 12)], [f"{initials} Bowler {i}" for i in range(1, 7)]
+
+
+def play_innings(rng, match_id, inning, batting, bowling, target, venue_boost):
+    batters, _ = squad(batting)
+    _, bowlers = squad(bowling)
+    rows, runs, wickets, striker = [], 0, 0, 0
+    for over in range(20):
+        bowler = bowlers[over % len(bowlers)]
+        for ball in range(1, 7):
+            batter = batters[min(striker, 10)]
+            if rng.random() < 0.05:
+                rows.append([match_id, inning, batting, bowling, over, ball, batter, bowler,
+                             0, 1, 1, 0, ""])
+                runs += 1
+            wicket = rng.random() < 0.045
+            scored = 0 if wicket else rng.choices(RUN_OUTCOMES, RUN_WEIGHTS)[0] + (rng.random() < venue_boost)
+            runs += scored
+            rows.append([match_id, inning, batting, bowling, over, ball, batter, bowler,
+                         scored, 0, scored, int(wicket), rng.choice(DISMISSALS) if wicket else ""])
+            if wicket:
+                wickets += 1
+                striker = wickets + 1
+            elif scored % 2:
+                striker = wickets if striker != wickets else wickets + 1
+            if wickets >= 10 or (target and runs >= target):
+                return rows, runs
+    return rows, runs
+
+
+def generate(out_dir, seasons, first_season=2008, matches_per_season=74, seed=0):
+    """Write matches.csv and deliveries.csv; returns the number of deliveries"""
+    rng = random.Random(seed)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    venue_boost = {city: rng.uniform(0.02, 0.15) for city in CITIES}
+    n_deliveries = 0
+    match_id = 100000
+
+    with open(out_dir / "matches.csv", "w", newline="") as mf, \
+            open(out_dir / "deliveries.csv", "w", newline="") as df:
+        matches, deliveries = csv.writer(mf), csv.writer(df)
+        matches.writerow(MATCH_COLUMNS)
+        deliveries.writerow(DELIVERY_COLUMNS)
+        for season in range(first_season, first_season + seasons):
+            for n in range(matches_per_season):
+                match_id += 1
+                team1, team2 = rng.sample(TEAMS, 2)
+                city = HOME_CITY[team1]
+                toss_winner = rng.choice([team1, team2])
+                toss_decision = "field" if rng.random() < 0.7 else "bat"
+                batting_first = toss_winner if toss_decision == "bat" else (team2 if toss_winner == team1 else team1)
+                chasing = team2 if batting_first == team1 else team1
+
+                first_rows, first = play_innings(rng, match_id, 1, batting_first, chasing, None, venue_boost[city])
+                second_rows, second = play_innings(rng, match_id, 2, chasing, batting_first, first + 1,
+                                                   venue_boost[city] + 0.02)
+                if second > first:
+                    winner, result, margin = chasing, "wickets", 10 - sum(r[11] for r in second_rows)
+                elif first > second:
+                    winner, result, margin = batting_first, "runs", first - second
+                else:
+                    winner, result, margin = "", "tie", ""
+
+                date = f"{season}-{3 + n // 25:02d}-{1 + n % 25:02d}"
+                day_night = "day" if n % 5 == 4 else "night"
+                matches.writerow([match_id, season, city, date, team1, team2, toss_winner,
+                                  toss_decision, winner, result, margin, first + 1, day_night])
+                deliveries.writerows(first_rows)
+                deliveries.writerows(second_rows)
+                n_deliveries += len(first_rows) + len(second_rows)
+    return n_deliveries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seasons", type=int, default=20)
+    parser.add_argument("--out", type=Path, default=Path("/tmp/ipl_synthetic"))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    n = generate(args.out, args.seasons, seed=args.seed)
+    print(f"Wrote {args.seasons} seasons ({n} deliveries) to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
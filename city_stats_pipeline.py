@@ -0,0 +1,331 @@
+"""Build city_stats.json from raw match and ball-by-ball data, incrementally.
+
+Input follows the public IPL ball-by-ball datasets: a matches file (id, season,
+city, toss_winner, toss_decision, winner, ...) and a deliveries file (match_id,
+inning, batting_team, batter, bowler, batsman_runs, total_runs, is_wicket,
+dismissal_kind, ...), as CSV, JSON lines or Parquet.
+
+Deliveries are streamed in chunks. Only running aggregates are kept: per-city
+counters, per-player totals and the current top-k lists. Innings totals are
+held only for matches still in progress in the stream, so memory does not
+grow with the number of deliveries. The aggregates can be saved and reloaded,
+so adding one new match updates every field without rescanning history.
+Each city's first-innings totals are also counted into the score
+distributions that predict_match reads score_percentile from, every
+player's per-venue, per-season totals into the leaderboard table
+(leaderboard.py), and each result into the toss index (toss_analytics.py).
+A day_night column in the matches file, if present, is used as the session:
+
+    python city_stats_pipeline.py --matches matches.csv --deliveries deliveries.csv \\
+        --state build/city_stats_state.json --output city_stats.json
+
+Deliveries of a match must be contiguous in the stream, as they are in
+those datasets.
+"""
+import argparse
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from leaderboard import LEADERBOARD_PATH, Leaderboard
+from prediction import BUILD_DIR, CITY_STATS_PATH
+from score_distributions import SCORE_DISTRIBUTIONS_PATH, ScoreDistributions
+from toss_analytics import TOSS_INDEX_PATH, TossIndex
+
+STATE_PATH = BUILD_DIR / "city_stats_state.json"
+TOP_K = 5
+NON_BOWLER_DISMISSALS = {"run out", "retired hurt", "retired out", "obstructing the field"}
+# extras_type values that are not a ball faced / a legal delivery / runs off the bowler.
+NOT_FACED = {"wides"}
+NOT_LEGAL = {"wides", "noballs"}
+NOT_CONCEDED = {"byes", "legbyes"}
+COUNTERS = (
+    "matches", "first_innings", "first_innings_runs", "second_innings", "second_innings_runs",
+    "bat_first_wins", "bat_first_winning_runs", "highest_chase", "toss_bat_wins", "toss_field_wins",
+)
+
+
+# =====================================================
+# RUNNING TOP-K
+# =====================================================
+class TopK:
+    """Top k players by a running total that only ever increases"""
+
+    def __init__(self, k=TOP_K, leaders=None):
+        self.k = k
+        self.leaders = dict(leaders or {})
+
+    def offer(self, player, total):
+        if player in self.leaders or len(self.leaders) < self.k:
+            self.leaders[player] = total
+            return
+        # Rank order is (-total, name), as in ranked(): the weakest leader is the
+        # last one, and a newcomer displaces it if it would rank ahead of it.
+        # Totals only grow, so the leaders match a full sort whatever the offer order.
+        weakest = max(self.leaders, key=lambda p: (-self.leaders[p], p))
+        if (-total, player) < (-self.leaders[weakest], weakest):
+            del self.leaders[weakest]
+            self.leaders[player] = total
+
+    def ranked(self):
+        return sorted(self.leaders.items(), key=lambda item: (-item[1], item[0]))
+
+
+# =====================================================
+# AGGREGATOR
+# =====================================================
+class CityStatsAggregator:
+    def __init__(self, top_k=TOP_K):
+        self.top_k = top_k
+        self.counters = {}
+        self.batter_runs = {}
+        self.bowler_wickets = {}
+        self.top_runs = {}
+        self.top_wickets = {}
+        self.score_distributions = ScoreDistributions()
+        self.leaderboard = Leaderboard()
+        self.toss_index = TossIndex()
+        self.seen_matches = set()
+        self._open_innings = {}
+
+    def _city(self, city):
+        if city not in self.counters:
+            self.counters[city] = dict.fromkeys(COUNTERS, 0)
+            self.batter_runs[city] = {}
+            self.bowler_wickets[city] = {}
+            self.top_runs[city] = TopK(self.top_k)
+            self.top_wickets[city] = TopK(self.top_k)
+        return self.counters[city]
+
+    # -----------------------------
+    # INGESTION
+    # -----------------------------
+    def ingest(self, matches_path, deliveries_path, chunksize=100_000):
+        """Stream one matches file and its deliveries file into the aggregates"""
+        matches = {}
+        for chunk in read_table(matches_path, chunksize):
+            for row in chunk.itertuples(index=False):
+                if row.id not in self.seen_matches:
+                    matches[row.id] = row
+        for chunk in read_table(deliveries_path, chunksize):
+            self.add_deliveries(chunk, matches)
+        self._close_matches(matches, keep=None)
+
+    def add_match(self, match, deliveries):
+        """Fold one finished match (a dict) and its deliveries (list of dicts) into the aggregates.
+
+        A match already ingested is skipped, as in ingest.
+        """
+        if match["id"] in self.seen_matches:
+            return
+        matches = {match["id"]: pd.Series(match)}
+        self.add_deliveries(pd.DataFrame(deliveries), matches)
+        self._close_matches(matches, keep=None)
+
+    def add_deliveries(self, chunk, matches):
+        chunk = chunk[(chunk["inning"] <= 2) & chunk["match_id"].isin(list(matches))]
+        if chunk.empty:
+            return
+        cities = chunk["match_id"].map({match_id: row.city for match_id, row in matches.items()})
+
+        innings = chunk.groupby(["match_id", "inning"], sort=False).agg(
+            runs=("total_runs", "sum"), team=("batting_team", "first")
+        )
+        for (match_id, inning), row in innings.iterrows():
+            state = self._open_innings.setdefault(match_id, {"runs": {}, "teams": {}})
+            state["runs"][inning] = state["runs"].get(inning, 0) + int(row.runs)
+            state["teams"].setdefault(inning, row.team)
+
+        batting = chunk.groupby([cities, chunk["batter"]], sort=False)["batsman_runs"].sum()
+        for (city, batter), runs in batting.items():
+            self._city(city)
+            totals = self.batter_runs[city]
+            totals[batter] = totals.get(batter, 0) + int(runs)
+            self.top_runs[city].offer(batter, totals[batter])
+
+        credited = (chunk["is_wicket"] == 1) & ~chunk["dismissal_kind"].isin(NON_BOWLER_DISMISSALS)
+        bowling = chunk[credited].groupby([cities[credited], chunk.loc[credited, "bowler"]], sort=False).size()
+        for (city, bowler), wickets in bowling.items():
+            self._city(city)
+            totals = self.bowler_wickets[city]
+            totals[bowler] = totals.get(bowler, 0) + int(wickets)
+            self.top_wickets[city].offer(bowler, totals[bowler])
+
+        seasons = chunk["match_id"].map({match_id: row.season for match_id, row in matches.items()})
+        self._add_player_slices(chunk, cities, seasons, credited)
+
+        # The last match in the chunk may continue in the next one.
+        self._close_matches(matches, keep=chunk["match_id"].iloc[-1])
+
+    def _add_player_slices(self, chunk, cities, seasons, credited):
+        """Fold the chunk into the leaderboard's (player, city, season, team, opponent) totals"""
+        extras = chunk["extras_type"].fillna("") if "extras_type" in chunk else pd.Series("", index=chunk.index)
+        balls = pd.DataFrame({
+            "city": cities, "season": seasons,
+            "batting_team": chunk["batting_team"], "bowling_team": chunk["bowling_team"],
+            "batter": chunk["batter"], "bowler": chunk["bowler"],
+            "runs": chunk["batsman_runs"],
+            "balls": ~extras.isin(NOT_FACED),
+            "wickets": credited,
+            "balls_bowled": ~extras.isin(NOT_LEGAL),
+            "runs_conceded": chunk["total_runs"] - chunk["extra_runs"].where(extras.isin(NOT_CONCEDED), 0),
+        })
+        batting = balls.groupby(["batter", "city", "season", "batting_team", "bowling_team"], sort=False)[
+            ["runs", "balls"]].sum()
+        bowling = balls.groupby(["bowler", "city", "season", "bowling_team", "batting_team"], sort=False)[
+            ["wickets", "balls_bowled", "runs_conceded"]].sum()
+        for totals in (batting, bowling):
+            self.leaderboard.add_columns(
+                [totals.index.get_level_values(i).tolist() for i in range(totals.index.nlevels)],
+                {field: totals[field].to_numpy() for field in totals.columns},
+            )
+
+    def _close_matches(self, matches, keep):
+        for match_id in [m for m in self._open_innings if m != keep]:
+            state = self._open_innings.pop(match_id)
+            self._finish_match(matches.pop(match_id), state["runs"], state["teams"])
+            self.seen_matches.add(match_id)
+
+    def _finish_match(self, match, runs, teams):
+        c = self._city(match.city)
+        c["matches"] += 1
+        first, second = runs.get(1), runs.get(2)
+        if first is not None:
+            c["first_innings"] += 1
+            c["first_innings_runs"] += first
+            self.score_distributions.add(match.city, first)
+        if second is not None:
+            c["second_innings"] += 1
+            c["second_innings_runs"] += second
+
+        winner = match.winner if isinstance(match.winner, str) else None
+        if winner and winner == teams.get(1) and first is not None:
+            c["bat_first_wins"] += 1
+            c["bat_first_winning_runs"] += first
+        elif winner and winner == teams.get(2) and second is not None:
+            c["highest_chase"] = max(c["highest_chase"], second)
+
+        if winner and winner == match.toss_winner:
+            c["toss_bat_wins" if match.toss_decision == "bat" else "toss_field_wins"] += 1
+
+        self.toss_index.add_match(
+            match.city, match.season, teams.get(1), teams.get(2), _text(match.toss_winner),
+            _text(match.toss_decision), winner if winner in (teams.get(1), teams.get(2)) else None,
+            _text(getattr(match, "day_night", None)),
+        )
+
+    # -----------------------------
+    # OUTPUT
+    # -----------------------------
+    def city_stats(self):
+        """The aggregates in the exact layout of city_stats.json"""
+        stats = {}
+        for city, c in self.counters.items():
+            if not c["matches"]:
+                continue
+            avg_score = c["first_innings_runs"] / c["first_innings"] if c["first_innings"] else 0
+            bat_pct = round(100 * c["toss_bat_wins"] / c["matches"], 1)
+            bowl_pct = round(100 * c["toss_field_wins"] / c["matches"], 1)
+            stats[city] = {
+                "avg_score": round(avg_score),
+                "avg_second_score": round(c["second_innings_runs"] / c["second_innings"]) if c["second_innings"] else 0,
+                "avg_winning_score": round(c["bat_first_winning_runs"] / c["bat_first_wins"])
+                if c["bat_first_wins"] else round(avg_score),
+                "highest_chase": c["highest_chase"],
+                "bat_first_win_pct": bat_pct,
+                "bowl_first_win_pct": bowl_pct,
+                "toss_recommendation": "BAT FIRST" if bat_pct > bowl_pct else "BOWL FIRST",
+                "top_run_scorers": [{"player": p, "runs": r} for p, r in self.top_runs[city].ranked()],
+                "top_wicket_takers": [{"player": p, "wickets": w} for p, w in self.top_wickets[city].ranked()],
+            }
+        return stats
+
+    def save_state(self, path=STATE_PATH, leaderboard_path=None):
+        """Write the aggregates to path and the leaderboard beside it (or to leaderboard_path)"""
+        if self._open_innings:
+            raise RuntimeError("cannot save while a match is only partly ingested")
+        state = {
+            "top_k": self.top_k,
+            "counters": self.counters,
+            "batter_runs": self.batter_runs,
+            "bowler_wickets": self.bowler_wickets,
+            "top_runs": {city: top.leaders for city, top in self.top_runs.items()},
+            "top_wickets": {city: top.leaders for city, top in self.top_wickets.items()},
+            "score_distributions": self.score_distributions.to_json(),
+            "toss_index": self.toss_index.to_json(),
+            "seen_matches": sorted((getattr(m, "item", lambda: m)() for m in self.seen_matches), key=str),
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(state))
+        self.leaderboard.save(leaderboard_path or _leaderboard_beside(path))
+
+    @classmethod
+    def load_state(cls, path=STATE_PATH, leaderboard_path=None):
+        state = json.loads(Path(path).read_text())
+        aggregator = cls(state["top_k"])
+        aggregator.counters = state["counters"]
+        aggregator.batter_runs = state["batter_runs"]
+        aggregator.bowler_wickets = state["bowler_wickets"]
+        aggregator.top_runs = {c: TopK(aggregator.top_k, v) for c, v in state["top_runs"].items()}
+        aggregator.top_wickets = {c: TopK(aggregator.top_k, v) for c, v in state["top_wickets"].items()}
+        aggregator.score_distributions = ScoreDistributions.from_json(state.get("score_distributions", {}))
+        aggregator.toss_index = TossIndex.from_json(state.get("toss_index", []))
+        aggregator.leaderboard = Leaderboard.load(leaderboard_path or _leaderboard_beside(path))
+        aggregator.seen_matches = set(state["seen_matches"])
+        return aggregator
+
+
+def _text(value):
+    """value if it is a string, else None (pandas reads empty cells as NaN)"""
+    return value if isinstance(value, str) else None
+
+
+def _leaderboard_beside(state_path):
+    return Path(state_path).with_suffix(".leaderboard.npz")
+
+
+def read_table(path, chunksize):
+    """Iterate a CSV, JSON-lines or Parquet file in DataFrame chunks"""
+    path = Path(path)
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        return (batch.to_pandas() for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize))
+    if path.suffix in (".jsonl", ".ndjson"):
+        return pd.read_json(path, lines=True, chunksize=chunksize)
+    if path.suffix == ".json":
+        return iter([pd.read_json(path)])
+    return pd.read_csv(path, chunksize=chunksize)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--matches", type=Path, required=True)
+    parser.add_argument("--deliveries", type=Path, required=True)
+    parser.add_argument("--state", type=Path, default=STATE_PATH,
+                        help="running aggregates; updated in place so later runs only add new matches")
+    parser.add_argument("--output", type=Path, default=CITY_STATS_PATH)
+    parser.add_argument("--distributions-output", type=Path, default=SCORE_DISTRIBUTIONS_PATH)
+    parser.add_argument("--leaderboard", type=Path, default=LEADERBOARD_PATH,
+                        help="per-player, per-venue, per-season totals; kept in step with --state")
+    parser.add_argument("--toss-output", type=Path, default=TOSS_INDEX_PATH)
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--fresh", action="store_true", help="ignore any saved state")
+    args = parser.parse_args()
+
+    if args.state.exists() and not args.fresh:
+        aggregator = CityStatsAggregator.load_state(args.state, args.leaderboard)
+    else:
+        aggregator = CityStatsAggregator()
+    aggregator.ingest(args.matches, args.deliveries, args.chunksize)
+    aggregator.save_state(args.state, args.leaderboard)
+    with open(args.output, "w") as f:
+        json.dump(aggregator.city_stats(), f, indent=4)
+    aggregator.score_distributions.save(args.distributions_output)
+    aggregator.toss_index.save(args.toss_output)
+    print(f"Wrote stats for {len(aggregator.counters)} cities to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""Columnar binary format for venue statistics.
+
+One row per venue:
+
+- numeric fields are typed arrays (int32/int64/float64, chosen per field)
+- short text fields such as toss_recommendation are dictionary-encoded codes
+- venue names and player names live in offset-indexed UTF-8 string pools
+- an open-addressing hash table (crc32, linear probing) maps venue names to
+  rows, so a lookup touches a few slots rather than building an index on load
+- each leaderboard is a CSR-style layout: per-venue offsets into flat
+  (player id, value) arrays
+
+The file uses the array container from artifact_store.py, so it can be mapped
+and read with zero copies. ColumnarCityStats gives back the same
+dict-of-dicts view the app reads from city_stats.json.
+
+    python columnar_stats.py --input city_stats.json --output build/city_stats.bin
+"""
+import argparse
+import json
+import zlib
+from collections.abc import Mapping
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+
+from prediction import BUILD_DIR, CITY_STATS_PATH
+
+COLUMNAR_PATH = BUILD_DIR / "city_stats.bin"
+
+
+# =====================================================
+# STRING POOLS
+# =====================================================
+def encode_strings(strings):
+    """(offsets, data) for a list of strings; string i is data[offsets[i]:offsets[i + 1]]"""
+    encoded = [s.encode() for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+class StringPool:
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = memoryview(data)
+
+    def raw(self, i):
+        start, end = self.offsets[i:i + 2].tolist()
+        return self.data[start:end]
+
+    def __getitem__(self, i):
+        return bytes(self.raw(i)).decode()
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+def build_hash_slots(strings):
+    """Open-addressing table of row numbers keyed by crc32 of the UTF-8 name; -1 marks an empty slot"""
+    size = 1 << max(3, (2 * len(strings) - 1).bit_length())
+    slots = np.full(size, -1, dtype=np.int64)
+    for row, name in enumerate(strings):
+        slot = zlib.crc32(name.encode()) & (size - 1)
+        while slots[slot] != -1:
+            slot = (slot + 1) & (size - 1)
+        slots[slot] = row
+    return slots
+
+
+def _int_dtype(values):
+    return np.int32 if all(-2**31 <= v < 2**31 for v in values) else np.int64
+
+
+# =====================================================
+# ENCODING
+# =====================================================
+def columnar_city_arrays(city_stats, prefix=""):
+    """Encode a city_stats dict into (arrays, meta) for write_array_file"""
+    venues = list(city_stats)
+    rows = [city_stats[venue] for venue in venues]
+    fields = list(rows[0]) if rows else []
+    arrays, schema = {}, []
+
+    arrays[f"{prefix}venue/offsets"], arrays[f"{prefix}venue/data"] = encode_strings(venues)
+    arrays[f"{prefix}venue/slots"] = build_hash_slots(venues)
+
+    players = {}
+    for field in fields:
+        values = [row[field] for row in rows]
+        if all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+            arrays[f"{prefix}{field}"] = np.array(values, dtype=_int_dtype(values))
+            schema.append([field, "numeric", None])
+        elif all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+            arrays[f"{prefix}{field}"] = np.array(values, dtype=np.float64)
+            schema.append([field, "numeric", None])
+        elif all(isinstance(v, str) for v in values):
+            categories = sorted(set(values))
+            codes = {category: i for i, category in enumerate(categories)}
+            arrays[f"{prefix}{field}"] = np.array([codes[v] for v in values], dtype=np.int32)
+            arrays[f"{prefix}{field}/offsets"], arrays[f"{prefix}{field}/data"] = encode_strings(categories)
+            schema.append([field, "category", None])
+        elif all(isinstance(v, list) for v in values):
+            entries = [entry for board in values for entry in board]
+            value_key = next((k for entry in entries for k in entry if k != "player"), "value")
+            player_ids = [players.setdefault(entry["player"], len(players)) for entry in entries]
+            entry_values = [entry[value_key] for entry in entries]
+            offsets = np.zeros(len(values) + 1, dtype=np.int64)
+            np.cumsum([len(board) for board in values], out=offsets[1:])
+            arrays[f"{prefix}{field}/offsets"] = offsets
+            arrays[f"{prefix}{field}/player"] = np.array(player_ids, dtype=np.int32)
+            arrays[f"{prefix}{field}/value"] = (
+                np.array(entry_values, dtype=_int_dtype(entry_values))
+                if all(isinstance(v, int) for v in entry_values)
+                else np.array(entry_values, dtype=np.float64)
+            )
+            schema.append([field, "leaderboard", value_key])
+        else:
+            raise ValueError(f"cannot store field {field!r} in columnar form")
+
+    arrays[f"{prefix}player/offsets"], arrays[f"{prefix}player/data"] = encode_strings(list(players))
+    return arrays, {"schema": schema}
+
+
+def write_columnar_stats(city_stats, path=COLUMNAR_PATH):
+    from artifact_store import write_array_file
+
+    arrays, meta = columnar_city_arrays(city_stats)
+    write_array_file(path, arrays, meta)
+
+
+# =====================================================
+# READING
+# =====================================================
+class ColumnarCityStats(Mapping):
+    """Per-venue dict view over columnar arrays; lookups are O(1) and read only that row"""
+
+    def __init__(self, arrays, meta):
+        self.arrays = arrays
+        self.schema = meta["schema"]
+        self.venues = StringPool(arrays["venue/offsets"], arrays["venue/data"])
+        self.players = StringPool(arrays["player/offsets"], arrays["player/data"])
+        self._slots = arrays["venue/slots"]
+
+    def row(self, venue):
+        """Row number of a venue, or None"""
+        key = venue.encode()
+        mask = len(self._slots) - 1
+        slot = zlib.crc32(key) & mask
+        while True:
+            row = int(self._slots[slot])
+            if row == -1:
+                return None
+            if self.venues.raw(row) == key:
+                return row
+            slot = (slot + 1) & mask
+
+    def _row(self, venue):
+        row = self.row(venue)
+        if row is None:
+            raise KeyError(venue)
+        return row
+
+    @cached_property
+    def _categories(self):
+        categories = {}
+        for field, kind, _ in self.schema:
+            if kind == "category":
+                pool = StringPool(self.arrays[f"{field}/offsets"], self.arrays[f"{field}/data"])
+                categories[field] = [pool[i] for i in range(len(pool))]
+        return categories
+
+    def column(self, field):
+        """The whole numeric column for a field, in venue order"""
+        return self.arrays[field]
+
+    def value(self, venue, field):
+        """One numeric field of one venue, without building the venue dict"""
+        return self.arrays[field][self._row(venue)].item()
+
+    def __getitem__(self, venue):
+        row = self._row(venue)
+        stats = {}
+        for field, kind, value_key in self.schema:
+            if kind == "numeric":
+                stats[field] = self.arrays[field][row].item()
+            elif kind == "category":
+                stats[field] = self._categories[field][self.arrays[field][row]]
+            else:
+                start, end = self.arrays[f"{field}/offsets"][row:row + 2].tolist()
+                players = self.arrays[f"{field}/player"][start:end].tolist()
+                values = self.arrays[f"{field}/value"][start:end].tolist()
+                stats[field] = [
+                    {"player": self.players[p], value_key: v} for p, v in zip(players, values)
+                ]
+        return stats
+
+    def __iter__(self):
+        return (self.venues[i] for i in range(len(self.venues)))
+
+    def __len__(self):
+        return len(self.venues)
+
+    def __contains__(self, venue):
+        return isinstance(venue, str) and self.row(venue) is not None
+
+
+def load_columnar_stats(path=COLUMNAR_PATH):
+    """Map a columnar stats file read-only"""
+    from artifact_store import ArrayFile
+
+    array_file = ArrayFile(path)
+    return ColumnarCityStats(array_file.arrays, array_file.meta)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input", type=Path, default=CITY_STATS_PATH)
+    parser.add_argument("--output", type=Path, default=COLUMNAR_PATH)
+    args = parser.parse_args()
+
+    with open(args.input) as f:
+        city_stats = json.load(f)
+    write_columnar_stats(city_stats, args.output)
+    print(f"Wrote {len(city_stats)} venues to {args.output} ({args.output.stat().st_size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""Player leaderboards over a per-player, per-venue, per-season aggregate table.
+
+Each row of the table is one (player, city, season, team, opponent) slice with
+running batting and bowling totals (FIELDS). Keys are stored as integer codes
+in one array, totals in another, and every dimension value keeps a posting
+list of its rows, so a filtered query only reads the rows of its rarest
+filter. A query sums the selected rows per player with np.bincount, computes
+the stat, picks the k best with a partial selection and orders them with a
+heap, without sorting every player:
+
+    board = Leaderboard.load()
+    board.top("runs", 5, city="Mumbai")
+    board.top("economy", 50, season=2024, opponent="Chennai Super Kings")
+
+Results are cached per query. New matches are added with add_many, which only
+drops the cached queries whose filters match a slice the matches touched.
+city_stats_pipeline.py keeps the table up to date and saves it to
+LEADERBOARD_PATH.
+"""
+import heapq
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+LEADERBOARD_PATH = Path(__file__).resolve().parent / "build" / "leaderboard.npz"
+DIMENSIONS = ("player", "city", "season", "team", "opponent")
+FIELDS = ("runs", "balls", "wickets", "balls_bowled", "runs_conceded")
+FIELD_INDEX = {field: i for i, field in enumerate(FIELDS)}
+# Rate stats need this many balls faced (strike rate) or bowled (economy) to rank.
+MIN_BALLS = 60
+CACHE_SIZE = 1024
+
+
+class Stat:
+    """A total (numerator alone) or a rate scale * numerator / balls"""
+
+    def __init__(self, numerator, balls=None, scale=1, higher_is_better=True):
+        self.numerator = numerator
+        self.balls = balls
+        self.scale = scale
+        self.higher_is_better = higher_is_better
+        self.fields = (numerator,) if balls is None else (numerator, balls)
+
+    def values(self, totals):
+        if self.balls is None:
+            return totals[self.numerator]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.scale * totals[self.numerator] / totals[self.balls]
+
+    def eligible(self, totals, values, min_balls):
+        if self.balls is None:
+            return values > 0
+        return totals[self.balls] >= max(min_balls, 1)
+
+
+STATS = {
+    "runs": Stat("runs"),
+    "wickets": Stat("wickets"),
+    "strike_rate": Stat("runs", "balls", 100),
+    "economy": Stat("runs_conceded", "balls_bowled", 6, higher_is_better=False),
+}
+
+
+def _grow(array, used):
+    """array with room for at least twice `used` columns, the first `used` kept"""
+    grown = np.zeros((array.shape[0], max(1024, 2 * used)), dtype=array.dtype)
+    grown[:, :used] = array[:, :used]
+    return grown
+
+
+class Leaderboard:
+    def __init__(self):
+        # Per dimension: values in code order and value -> code.
+        self.values = {dim: [] for dim in DIMENSIONS}
+        self.codes = {dim: {} for dim in DIMENSIONS}
+        self.rows = {}
+        # Column-major, so each dimension and field is one contiguous array for np.bincount.
+        self.keys = np.empty((len(DIMENSIONS), 0), dtype=np.intp)
+        self.totals = np.empty((len(FIELDS), 0))
+        # Running per-player totals over every row, for queries without filters.
+        self.player_sums = np.empty((len(FIELDS), 0))
+        # (dimension, code) -> rows; arrays are rebuilt when a slice gains rows.
+        self.postings = {}
+        self._posting_arrays = {}
+        # Queries may come from several threads (app sessions share one table).
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.rows)
+
+    # -----------------------------
+    # UPDATES
+    # -----------------------------
+    def _code(self, dim, value):
+        value = getattr(value, "item", lambda: value)()
+        codes = self.codes[dim]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+            self.values[dim].append(value)
+            if dim == "player" and code == self.player_sums.shape[1]:
+                self.player_sums = _grow(self.player_sums, code)
+        return code
+
+    def _add_row(self, key):
+        row = len(self.rows)
+        if row == self.keys.shape[1]:
+            self.keys = _grow(self.keys, row)
+            self.totals = _grow(self.totals, row)
+        self.keys[:, row] = key
+        self.totals[:, row] = 0
+        for dim, code in enumerate(key[1:], 1):
+            self.postings.setdefault((dim, code), []).append(row)
+            self._posting_arrays.pop((dim, code), None)
+        self.rows[key] = row
+        return row
+
+    def add_many(self, records):
+        """Add (player, city, season, team, opponent, {field: value}) records"""
+        records = list(records)
+        names = [[record[i] for record in records] for i in range(len(DIMENSIONS))]
+        totals = {field: [record[-1].get(field, 0) for record in records] for field in FIELDS}
+        self.add_columns(names, totals)
+
+    def add_columns(self, names, totals):
+        """add_many with one sequence per dimension and {field: sequence of values}.
+
+        Cached queries are dropped only if their filters match a touched slice.
+        """
+        keys = zip(*([self._code(dim, value) for value in column] for dim, column in zip(DIMENSIONS, names)))
+        rows = self.rows
+        rows = np.array([rows[key] if key in rows else self._add_row(key) for key in keys], dtype=np.intp)
+        if not len(rows):
+            return
+        players = self.keys[0, rows]
+        for field, values in totals.items():
+            values = np.asarray(values, dtype=float)
+            np.add.at(self.totals[FIELD_INDEX[field]], rows, values)
+            np.add.at(self.player_sums[FIELD_INDEX[field]], players, values)
+        self._invalidate(set(zip(*names[1:])))
+
+    def _invalidate(self, touched):
+        with self._lock:
+            for query in list(self._cache):
+                filters = query[3:]
+                if any(all(f is None or f == value for f, value in zip(filters, slice_)) for slice_ in touched):
+                    del self._cache[query]
+
+    # -----------------------------
+    # QUERIES
+    # -----------------------------
+    def _posting(self, dim, code):
+        rows = self._posting_arrays.get((dim, code))
+        if rows is None:
+            rows = self._posting_arrays[(dim, code)] = np.array(self.postings[(dim, code)], dtype=np.intp)
+        return rows
+
+    def _select(self, filters):
+        """Rows matching every filter, or None for all rows; an empty array if a value is unknown"""
+        wanted = []
+        for dim, value in enumerate(filters, 1):
+            if value is None:
+                continue
+            code = self.codes[DIMENSIONS[dim]].get(value)
+            if code is None:
+                return np.empty(0, dtype=np.intp)
+            wanted.append((dim, code))
+        if not wanted:
+            return None
+        wanted.sort(key=lambda item: len(self.postings[item]))
+        rows = self._posting(*wanted[0])
+        for dim, code in wanted[1:]:
+            rows = rows[self.keys[dim, rows] == code]
+        return rows
+
+    def player_totals(self, city=None, season=None, team=None, opponent=None, fields=FIELDS):
+        """{field: per-player total} over the rows matching the filters, indexed by player code"""
+        rows = self._select((city, season, team, opponent))
+        size = len(self.values["player"])
+        if rows is None:
+            return {field: self.player_sums[FIELD_INDEX[field], :size] for field in fields}
+        players = self.keys[0, rows]
+        return {field: np.bincount(players, weights=self.totals[FIELD_INDEX[field], rows], minlength=size)
+                for field in fields}
+
+    def top(self, stat="runs", k=10, city=None, season=None, team=None, opponent=None, min_balls=MIN_BALLS):
+        """[(player, value)] for the k best players by stat, best first; ties go to the earlier name"""
+        if stat not in STATS:
+            raise ValueError(f"unknown stat {stat!r}; expected one of {', '.join(STATS)}")
+        query = (stat, k, min_balls, city, season, team, opponent)
+        with self._lock:
+            cached = self._cache.get(query)
+            if cached is not None:
+                self._cache.move_to_end(query)
+                return cached
+
+        spec = STATS[stat]
+        totals = self.player_totals(city, season, team, opponent, spec.fields)
+        value = spec.values(totals)
+        candidates = np.flatnonzero(spec.eligible(totals, value, min_balls))
+        score = value[candidates] if spec.higher_is_better else -value[candidates]
+        if len(candidates) > k > 0:
+            # Keep everything tied with the k-th best, so the heap can break ties by name.
+            kth = np.partition(score, len(score) - k)[len(score) - k]
+            candidates, score = candidates[score >= kth], score[score >= kth]
+        names = self.values["player"]
+        best = heapq.nsmallest(k, zip((-score).tolist(), candidates.tolist()), key=lambda item: (item[0], names[item[1]]))
+        cast = int if spec.balls is None else float
+        result = [(names[player], cast(value[player])) for _, player in best]
+
+        with self._lock:
+            self._cache[query] = result
+            if len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return result
+
+    def dimension_values(self, dim):
+        return list(self.values[dim])
+
+    # -----------------------------
+    # STORAGE
+    # -----------------------------
+    def save(self, path=LEADERBOARD_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        n = len(self.rows)
+        # Seasons may be years or labels such as "2007/08"; everything is stored as text.
+        names = {f"names_{dim}": np.array([str(v) for v in self.values[dim]], dtype=str) for dim in DIMENSIONS}
+        with open(path, "wb") as f:
+            np.savez(f, keys=self.keys[:, :n].astype(np.int32), totals=self.totals[:, :n].astype(np.int64), **names)
+
+    @classmethod
+    def load(cls, path=LEADERBOARD_PATH):
+        """The saved table, or an empty one if there is no file"""
+        board = cls()
+        try:
+            data = np.load(path)
+        except FileNotFoundError:
+            return board
+        for dim in DIMENSIONS:
+            for name in data[f"names_{dim}"].tolist():
+                board._code(dim, int(name) if dim == "season" and name.isdigit() else name)
+        board.keys, board.totals = data["keys"].astype(np.intp), data["totals"].astype(float)
+        board.rows = {key: row for row, key in enumerate(zip(*board.keys.tolist()))}
+        players = len(board.values["player"])
+        board.player_sums = np.array([np.bincount(board.keys[0], weights=column, minlength=players)
+                                      for column in board.totals]).reshape(len(FIELDS), players)
+        for dim in range(1, len(DIMENSIONS)):
+            order = np.argsort(board.keys[dim], kind="stable")
+            codes, starts = np.unique(board.keys[dim, order], return_index=True)
+            for code, rows in zip(codes.tolist(), np.split(order, starts[1:])):
+                board.postings[(dim, code)] = rows.tolist()
+                board._posting_arrays[(dim, code)] = rows
+        return board
@@ -0,0 +1,312 @@
+"""Ball-by-ball live win probability for second-innings chases.
+
+A feed is a stream of JSON objects, one per line, from a file or a TCP socket:
+
+    {"type": "start", "match_id": "m1", "city": "Mumbai", "first_innings_score": 185}
+    {"type": "ball", "match_id": "m1", "runs": 4, "wicket": 0, "balls_remaining": 113}
+    {"type": "end", "match_id": "m1"}
+
+Each match owns one row of a preallocated feature matrix, filled once when it
+starts. A delivery only rewrites that row's innings_score_2nd slot with the
+chasing side's projected total. Every delivery waiting in the queue is then
+scored with one win-model call, so the per-delivery cost stays flat however
+many matches run at once. Events are applied in feed order: a batch is split
+wherever the event type changes, so a match that ends and restarts within
+one batch keeps only its new state.
+
+Probabilities are for the side that batted first, like the rest of the app.
+"""
+import asyncio
+import itertools
+import json
+import threading
+from collections import deque
+
+import numpy as np
+
+from prediction import build_feature_matrix, model_input
+
+BALLS_PER_INNINGS = 120
+WICKETS = 10
+PRIOR_BALLS = 30  # balls of venue scoring rate blended into the live run rate
+
+
+# =====================================================
+# CHASE MODEL
+# =====================================================
+def project_second_innings(runs, wickets, balls_remaining, venue_rate):
+    """Projected chase total from the live run rate, the venue rate and wickets in hand"""
+    balls_bowled = BALLS_PER_INNINGS - balls_remaining
+    rate = (runs + venue_rate * PRIOR_BALLS) / (balls_bowled + PRIOR_BALLS)
+    resources = np.clip(1 - wickets / WICKETS, 0, 1) ** 0.6
+    return runs + rate * balls_remaining * resources
+
+
+def chase_state_probability(projected, first_innings_score, balls_remaining):
+    """Probability that the chase falls short, narrowing as the balls run out"""
+    spread = 1.2 * np.sqrt(balls_remaining) + 1
+    z = (projected - first_innings_score - 0.5) / spread
+    return 1 / (1 + np.exp(1.7 * z))
+
+
+# =====================================================
+# MATCH BOARD
+# =====================================================
+class LiveMatchBoard:
+    """Per-match chase state in preallocated arrays, one row per live match"""
+
+    STATE_FIELDS = ("runs", "wickets", "balls_remaining", "first_score", "venue_rate", "probability")
+
+    def __init__(self, win_model, city_stats, capacity=1024):
+        self.win_model = win_model
+        self.city_stats = city_stats
+        self.score_2nd_col = list(win_model.feature_names_in_).index("innings_score_2nd")
+        self.slots = {}
+        self.match_ids = []
+        self._free = []
+        self.features = np.zeros((0, len(win_model.feature_names_in_)), dtype=np.float32)
+        for name in self.STATE_FIELDS:
+            setattr(self, name, np.zeros(0))
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        """Reallocate every array with `capacity` rows, keeping the live ones"""
+        used = len(self.match_ids)
+        features = np.zeros((capacity, self.features.shape[1]), dtype=np.float32)
+        features[:used] = self.features
+        self.features = features
+        for name in self.STATE_FIELDS:
+            values = np.zeros(capacity)
+            values[:used] = getattr(self, name)
+            setattr(self, name, values)
+        self._free.extend(range(capacity - 1, used - 1, -1))
+        self.match_ids.extend([None] * (capacity - used))
+
+    def start_matches(self, match_ids, cities, first_innings_scores):
+        """Fill a feature row per match; venue constants are written once here"""
+        for match_id in match_ids:
+            self.end_match(match_id)
+        if len(self._free) < len(match_ids):
+            capacity = len(self.match_ids)
+            self._grow(max(2 * capacity, capacity + len(match_ids) - len(self._free)))
+
+        rows = np.array([self._free.pop() for _ in match_ids], dtype=np.int64)
+        X, _ = build_feature_matrix(self.win_model.feature_names_in_, self.city_stats,
+                                    cities, first_innings_scores)
+        self.features[rows] = X
+        self.runs[rows] = 0
+        self.wickets[rows] = 0
+        self.balls_remaining[rows] = BALLS_PER_INNINGS
+        self.first_score[rows] = first_innings_scores
+        self.venue_rate[rows] = [self.city_stats[c]["avg_second_score"] / BALLS_PER_INNINGS for c in cities]
+        for match_id, row in zip(match_ids, rows):
+            self.slots[match_id] = int(row)
+            self.match_ids[row] = match_id
+        return self.update_rows(rows)
+
+    def end_match(self, match_id):
+        row = self.slots.pop(match_id, None)
+        if row is not None:
+            self.match_ids[row] = None
+            self.probability[row] = np.nan
+            self._free.append(row)
+
+    def apply_deliveries(self, rows, runs, wickets, balls_remaining):
+        """Fold a batch of deliveries into the chase state and rescore the touched matches"""
+        rows = np.asarray(rows, dtype=np.int64)
+        np.add.at(self.runs, rows, runs)
+        np.add.at(self.wickets, rows, wickets)
+        np.minimum.at(self.balls_remaining, rows, balls_remaining)
+        return self.update_rows(np.unique(rows))
+
+    def update_rows(self, rows):
+        """Rewrite the projected-score slot and rescore the given rows in one model call"""
+        runs, wickets, balls = self.runs[rows], self.wickets[rows], self.balls_remaining[rows]
+        first_score = self.first_score[rows]
+        projected = project_second_innings(runs, wickets, balls, self.venue_rate[rows])
+        self.features[rows, self.score_2nd_col] = projected
+
+        features = self.features[rows]
+        ml_prob = self.win_model.predict_proba(model_input(self.win_model, features))[:, 1]
+        cricket_prob = chase_state_probability(projected, first_score, balls)
+        prob = np.clip(0.65 * cricket_prob + 0.35 * ml_prob, 0.01, 0.99)
+
+        chased = runs > first_score
+        finished = ~chased & ((wickets >= WICKETS) | (balls <= 0))
+        prob = np.where(chased, 0.0, prob)
+        prob = np.where(finished, np.where(runs == first_score, 0.5, 1.0), prob)
+        self.probability[rows] = prob
+        return rows, prob
+
+
+# =====================================================
+# FEED PROCESSING
+# =====================================================
+class LiveFeedProcessor:
+    """Drain a feed in batches: everything queued since the last pass is scored together"""
+
+    def __init__(self, board, max_batch=65536, history=240):
+        self.board = board
+        self.max_batch = max_batch
+        self.history_length = history
+        self.history = {}
+        self.deliveries = 0
+        self.dropped = 0
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """callback(match_ids, probabilities) is called after every scored batch"""
+        self._subscribers.append(callback)
+
+    def process(self, events):
+        """Apply one batch of feed events in order; returns (match_ids, probabilities) that changed.
+
+        Consecutive events of one type are applied together, one model call per
+        run of starts or deliveries, so an end or a restart only affects the
+        events after it.
+        """
+        match_ids, changed_probs = [], []
+        for kind, group in itertools.groupby(events, key=lambda e: e.get("type", "ball")):
+            group = list(group)
+            if kind == "start":
+                rows, probs = self._start(group)
+            elif kind == "ball":
+                rows, probs = self._deliver(group)
+            else:
+                if kind == "end":
+                    self._end(group)
+                continue
+            if len(rows):
+                ids = [self.board.match_ids[row] for row in rows]
+                self._record(ids, rows, probs)
+                match_ids.extend(ids)
+                changed_probs.append(probs)
+
+        probs = np.concatenate(changed_probs) if changed_probs else np.zeros(0)
+        for callback in self._subscribers:
+            callback(match_ids, probs)
+        return match_ids, probs
+
+    def _start(self, events):
+        # The last start of a match_id wins; a restarted match_id begins a new curve.
+        events = list({e["match_id"]: e for e in events}.values())
+        self._forget(e["match_id"] for e in events)
+        return self.board.start_matches(
+            [e["match_id"] for e in events],
+            [e["city"] for e in events],
+            [e["first_innings_score"] for e in events],
+        )
+
+    def _deliver(self, events):
+        slots = self.board.slots
+        known = [e for e in events if e["match_id"] in slots]
+        self.dropped += len(events) - len(known)
+        if not known:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        self.deliveries += len(known)
+        return self.board.apply_deliveries(
+            [slots[e["match_id"]] for e in known],
+            [e.get("runs", 0) for e in known],
+            [int(bool(e.get("wicket", 0))) for e in known],
+            [e["balls_remaining"] for e in known],
+        )
+
+    def _end(self, events):
+        for event in events:
+            self.board.end_match(event["match_id"])
+        self._forget(e["match_id"] for e in events)
+
+    def _record(self, match_ids, rows, probs):
+        if not self.history_length:
+            return
+        balls_bowled = BALLS_PER_INNINGS - self.board.balls_remaining[rows]
+        with self._lock:
+            for match_id, bowled, prob in zip(match_ids, balls_bowled, probs):
+                series = self.history.get(match_id)
+                if series is None:
+                    series = self.history[match_id] = deque(maxlen=self.history_length)
+                series.append((int(bowled), float(prob)))
+
+    def _forget(self, match_ids):
+        """Drop the history of matches that ended, so a long feed does not keep every curve"""
+        with self._lock:
+            for match_id in match_ids:
+                self.history.pop(match_id, None)
+
+    def snapshot(self, match_id):
+        """Copy of the (balls bowled, probability) history for one live match"""
+        with self._lock:
+            return list(self.history.get(match_id, ()))
+
+    async def run(self, events):
+        """Consume an async iterator of events until it is exhausted"""
+        queue = asyncio.Queue()
+
+        async def pump():
+            async for event in events:
+                queue.put_nowait(event)
+            queue.put_nowait(None)
+
+        pump_task = asyncio.ensure_future(pump())
+        done = False
+        while not done:
+            batch = [await queue.get()]
+            while not queue.empty() and len(batch) < self.max_batch:
+                batch.append(queue.get_nowait())
+            if batch[-1] is None:
+                batch.pop()
+                done = True
+            if batch:
+                self.process(batch)
+            await asyncio.sleep(0)
+        await pump_task
+
+
+# =====================================================
+# FEED SOURCES
+# =====================================================
+async def read_feed_file(path, follow=False, poll_interval=0.2):
+    """Yield events from a JSON-lines file; with follow=True keep tailing it"""
+    with open(path) as f:
+        while True:
+            line = f.readline()
+            if not line:
+                if not follow:
+                    return
+                await asyncio.sleep(poll_interval)
+                continue
+            if line.strip():
+                yield json.loads(line)
+            # Let the processor drain between lines, so a replayed file is scored as it is read.
+            await asyncio.sleep(0)
+
+
+async def read_feed_socket(host, port):
+    """Yield events from a TCP socket sending JSON lines"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while line := await reader.readline():
+            if line.strip():
+                yield json.loads(line)
+    finally:
+        writer.close()
+
+
+def open_feed(source, follow=False):
+    """Feed from "tcp://host:port" or a file path"""
+    if source.startswith("tcp://"):
+        host, _, port = source[len("tcp://"):].rpartition(":")
+        return read_feed_socket(host, int(port))
+    return read_feed_file(source, follow=follow)
+
+
+def start_background_feed(processor, source, follow=True):
+    """Run the processor on its own thread and event loop; returns the thread"""
+    thread = threading.Thread(
+        target=lambda: asyncio.run(processor.run(open_feed(source, follow))),
+        name="live-feed",
+        daemon=True,
+    )
+    thread.start()
+    return thread
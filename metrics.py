@@ -0,0 +1,224 @@
+"""Opt-in instrumentation: per-stage timings, call counts and cache hit/miss counts.
+
+Off unless IPL_METRICS=1 is set (or enable() is called). When off, timed()
+hands back a shared no-op context manager and the other recorders return
+after one flag check, so the hooks can stay in hot paths.
+
+    with metrics.timed("predict.features"):
+        ...
+
+    @metrics.instrument("artifacts.load_pickle")
+    def load_artifacts(): ...
+
+    metrics.cache("prediction_table", hit=True)
+
+Every stage keeps a latency histogram (Prometheus-style cumulative buckets).
+Export with prometheus_text(), snapshot() or write_json_log(). Setting
+IPL_METRICS_LOG=path also appends a snapshot to that file on exit.
+"""
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from functools import wraps
+from pathlib import Path
+
+ENABLED = os.environ.get("IPL_METRICS", "") not in ("", "0")
+LOG_PATH = os.environ.get("IPL_METRICS_LOG")
+
+# Upper bounds in seconds, from 50us to 10s.
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+           0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0)
+
+
+# =====================================================
+# REGISTRY
+# =====================================================
+class Histogram:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile"""
+        rank, seen = q * self.count, 0
+        for bound, n in zip(BUCKETS, self.buckets):
+            seen += n
+            if seen >= rank:
+                return bound
+        return self.max
+
+
+class Registry:
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+        self.caches = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def count(self, name, n):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def cache(self, name, hit, n=1):
+        with self._lock:
+            hits_misses = self.caches.setdefault(name, [0, 0])
+            hits_misses[0 if hit else 1] += n
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+            self.counters.clear()
+            self.caches.clear()
+
+
+REGISTRY = Registry()
+
+
+# =====================================================
+# RECORDING
+# =====================================================
+class _Timer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        REGISTRY.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+_NOOP = nullcontext()
+
+
+def enable(on=True):
+    global ENABLED
+    ENABLED = on
+
+
+def timed(stage):
+    """Context manager timing one stage"""
+    if not ENABLED:
+        return _NOOP
+    return _Timer(stage)
+
+
+def instrument(stage):
+    """Decorator timing every call of a function as one stage"""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                REGISTRY.observe(stage, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def observe(stage, seconds):
+    if ENABLED:
+        REGISTRY.observe(stage, seconds)
+
+
+def count(name, n=1):
+    if ENABLED:
+        REGISTRY.count(name, n)
+
+
+def cache(name, hit, n=1):
+    if ENABLED and n:
+        REGISTRY.cache(name, hit, n)
+
+
+# =====================================================
+# EXPORT
+# =====================================================
+def snapshot():
+    """Plain-dict copy of everything recorded so far; times in milliseconds"""
+    with REGISTRY._lock:
+        stages = {
+            stage: {
+                "count": h.count,
+                "total_ms": h.total * 1000,
+                "mean_ms": h.total / h.count * 1000,
+                "p50_ms": h.quantile(0.5) * 1000,
+                "p99_ms": h.quantile(0.99) * 1000,
+                "max_ms": h.max * 1000,
+            }
+            for stage, h in REGISTRY.stages.items()
+        }
+        caches = {
+            name: {"hits": hits, "misses": misses, "hit_ratio": hits / (hits + misses)}
+            for name, (hits, misses) in REGISTRY.caches.items()
+        }
+        return {"time": time.time(), "pid": os.getpid(), "stages": stages,
+                "counters": dict(REGISTRY.counters), "caches": caches}
+
+
+def prometheus_text():
+    """Everything recorded so far in the Prometheus text exposition format"""
+    lines = [
+        "# HELP ipl_stage_seconds Time spent per pipeline stage.",
+        "# TYPE ipl_stage_seconds histogram",
+    ]
+    with REGISTRY._lock:
+        for stage, h in sorted(REGISTRY.stages.items()):
+            cumulative = 0
+            for bound, n in zip(BUCKETS, h.buckets):
+                cumulative += n
+                lines.append(f'ipl_stage_seconds_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'ipl_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+            lines.append(f'ipl_stage_seconds_sum{{stage="{stage}"}} {h.total:.9f}')
+            lines.append(f'ipl_stage_seconds_count{{stage="{stage}"}} {h.count}')
+
+        lines += ["# HELP ipl_events_total Event counters.", "# TYPE ipl_events_total counter"]
+        for name, value in sorted(REGISTRY.counters.items()):
+            lines.append(f'ipl_events_total{{name="{name}"}} {value}')
+
+        lines += ["# HELP ipl_cache_requests_total Cache lookups by result.",
+                  "# TYPE ipl_cache_requests_total counter"]
+        for name, (hits, misses) in sorted(REGISTRY.caches.items()):
+            lines.append(f'ipl_cache_requests_total{{cache="{name}",result="hit"}} {hits}')
+            lines.append(f'ipl_cache_requests_total{{cache="{name}",result="miss"}} {misses}')
+    return "\n".join(lines) + "\n"
+
+
+def write_json_log(path=None):
+    """Append one snapshot as a JSON line"""
+    path = Path(path or LOG_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        f.write(json.dumps(snapshot()) + "\n")
+
+
+if LOG_PATH:
+    atexit.register(write_json_log)
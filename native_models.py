@@ -0,0 +1,460 @@
+"""Fast-loading native format for the win and margin models.
+
+Unpickling the models imports scikit-learn and XGBoost, and that import is most
+of the cold-start time. The converters below dump every boosted tree into flat
+NumPy arrays, plus the isotonic calibration curves of the win model, once.
+After that a process only needs NumPy to load and evaluate them.
+
+For prediction the trees are compiled once more, in memory, into per-tree leaf
+lookup tables (TreeTables) that evaluate every booster of a model in one pass.
+
+    python native_models.py
+    python -m pytest tests/test_native_models.py     # raw parity with the pickled models
+
+Each model is stored in its own .npz under build/native_models/, tagged with
+a hash of the pickle it was converted from. A stale or missing file is
+re-converted from the pickle on first use.
+"""
+import json
+from functools import cached_property
+
+import numpy as np
+
+import metrics
+from prediction import BUILD_DIR, MARGIN_MODEL_PATH, WIN_MODEL_PATH, artifact_hash
+
+NATIVE_DIR = BUILD_DIR / "native_models"
+WIN_NATIVE_PATH = NATIVE_DIR / "win_model.npz"
+MARGIN_NATIVE_PATH = NATIVE_DIR / "margin_model.npz"
+
+TREE_FIELDS = ("feature", "threshold", "left", "right", "default_left", "leaf_value", "roots")
+
+# Deeper trees would need 2 ** (2 ** depth - 1) table entries per tree.
+TABLE_MAX_DEPTH = 3
+EVAL_CHUNK = 1024
+
+
+# =====================================================
+# TREE ENSEMBLES AS ARRAYS
+# =====================================================
+class CompiledTrees:
+    """One XGBoost booster as flat node arrays.
+
+    Leaves point back at themselves, so walking max_depth steps from every
+    root always ends on a leaf. Leaf sums are accumulated in float64, so results
+    can differ from XGBoost's float32 accumulation in the last bit.
+    """
+
+    def __init__(self, feature, threshold, left, right, default_left, leaf_value, roots,
+                 base_margin, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.leaf_value = leaf_value
+        self.roots = roots
+        self.base_margin = np.float32(base_margin)
+        self.max_depth = int(max_depth)
+
+    @classmethod
+    def from_booster(cls, booster):
+        model = json.loads(booster.save_raw("json"))["learner"]
+        trees = model["gradient_booster"]["model"]["trees"]
+        base_score = float(model["learner_model_param"]["base_score"].strip("[]"))
+        if model["objective"]["name"] == "binary:logistic":
+            base_margin = np.log(np.float32(base_score) / (1 - np.float32(base_score)))
+        else:
+            base_margin = base_score
+
+        columns = {name: [] for name in TREE_FIELDS}
+        offset, max_depth = 0, 0
+        for tree in trees:
+            left = np.array(tree["left_children"])
+            right = np.array(tree["right_children"])
+            nodes = np.arange(len(left))
+            is_leaf = left < 0
+
+            columns["roots"].append([offset])
+            columns["feature"].append(np.where(is_leaf, 0, tree["split_indices"]))
+            columns["threshold"].append(np.where(is_leaf, 0, tree["split_conditions"]))
+            columns["left"].append(np.where(is_leaf, nodes, left) + offset)
+            columns["right"].append(np.where(is_leaf, nodes, right) + offset)
+            columns["default_left"].append(tree["default_left"])
+            columns["leaf_value"].append(np.where(is_leaf, tree["split_conditions"], 0))
+            max_depth = max(max_depth, _tree_depth(left, right))
+            offset += len(left)
+
+        dtypes = {"feature": np.int32, "threshold": np.float32, "left": np.int32,
+                  "right": np.int32, "default_left": bool, "leaf_value": np.float32,
+                  "roots": np.int32}
+        arrays = {name: np.concatenate(columns[name]).astype(dtypes[name]) for name in TREE_FIELDS}
+        return cls(base_margin=base_margin, max_depth=max_depth, **arrays)
+
+    def raw_predict(self, X):
+        """Base margin plus the leaf value of every tree, walking all trees one level at a time"""
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        node = np.repeat(self.roots[None, :], len(X), axis=0)
+        for _ in range(self.max_depth):
+            value = X[rows, self.feature[node]]
+            go_left = np.where(np.isnan(value), self.default_left[node], value < self.threshold[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.base_margin + self.leaf_value[node].sum(axis=1, dtype=np.float64).astype(np.float32)
+
+    def to_arrays(self, prefix):
+        arrays = {f"{prefix}{name}": getattr(self, name) for name in TREE_FIELDS}
+        arrays[f"{prefix}base_margin"] = np.array(self.base_margin)
+        arrays[f"{prefix}max_depth"] = np.array(self.max_depth)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix):
+        fields = {name: arrays[f"{prefix}{name}"] for name in TREE_FIELDS}
+        return cls(
+            base_margin=arrays[f"{prefix}base_margin"][()],
+            max_depth=arrays[f"{prefix}max_depth"][()],
+            **fields,
+        )
+
+
+class TreeTables:
+    """Several boosters compiled for batch evaluation.
+
+    Every tree is padded to a perfect binary tree of the ensemble's depth
+    (leaves point back at themselves, so a short branch repeats its leaf).
+    The distinct (feature, threshold, default_left) splits are evaluated once
+    per row, and the go-right bits of a tree's internal nodes index a table
+    holding the leaf each bit pattern reaches. All boosters must have the same
+    number of trees.
+    """
+
+    def __init__(self, boosters):
+        self.depth = max(booster.max_depth for booster in boosters)
+        n_nodes = 2 ** self.depth - 1
+
+        features, thresholds, default_lefts, leaves = [], [], [], []
+        for booster in boosters:
+            slots = np.empty((len(booster.roots), 2 * n_nodes + 1), dtype=np.int64)
+            slots[:, 0] = booster.roots
+            for i in range(n_nodes):
+                slots[:, 2 * i + 1] = booster.left[slots[:, i]]
+                slots[:, 2 * i + 2] = booster.right[slots[:, i]]
+            internal = slots[:, :n_nodes]
+            padding = booster.left[internal] == internal
+            features.append(np.where(padding, -1, booster.feature[internal]))
+            thresholds.append(np.where(padding, 0, booster.threshold[internal]))
+            default_lefts.append(booster.default_left[internal] & ~padding)
+            leaves.append(booster.leaf_value[slots[:, n_nodes:]])
+
+        splits = np.empty(sum(len(f) for f in features) * n_nodes,
+                          dtype=[("feature", np.int32), ("threshold", np.float32), ("default_left", bool)])
+        splits["feature"] = np.concatenate(features).ravel()
+        splits["threshold"] = np.concatenate(thresholds).ravel()
+        splits["default_left"] = np.concatenate(default_lefts).ravel()
+        unique, node_split = np.unique(splits, return_inverse=True)
+
+        # Padding nodes lead to the same leaf either way; point them at any real split.
+        real = unique["feature"] >= 0
+        index = np.cumsum(real) - 1
+        node_split = np.where(real[node_split], index[node_split], 0)
+        self.split_feature = unique["feature"][real].astype(np.intp)
+        self.split_threshold = unique["threshold"][real]
+        self.split_default_left = unique["default_left"][real]
+        self.node_split = np.ascontiguousarray(node_split.reshape(-1, n_nodes).T)
+
+        # Leaf slot reached by each go-right bit pattern, bit i being internal node i.
+        patterns = np.arange(2 ** n_nodes)
+        node = np.zeros_like(patterns)
+        for _ in range(self.depth):
+            node = 2 * node + 1 + ((patterns >> node) & 1)
+        leaf_values = np.concatenate(leaves)
+        self.n_trees = len(leaf_values)
+        self.leaf_table = np.ascontiguousarray(leaf_values[:, node - n_nodes], dtype=np.float32).ravel()
+        self.table_offsets = (np.arange(self.n_trees, dtype=np.int32) * len(patterns))[:, None]
+
+        self.n_boosters = len(boosters)
+        self.base_margins = np.array([booster.base_margin for booster in boosters], dtype=np.float32)
+
+    def raw_predict(self, X):
+        """Raw margins, shape (rows, boosters); matches CompiledTrees.raw_predict per booster.
+
+        X may be a CSR matrix, densified one chunk at a time (absent entries are zeros).
+        """
+        sparse = _is_csr(X)
+        if not sparse:
+            X = np.asarray(X, dtype=np.float32)
+        out = np.empty((X.shape[0], self.n_boosters), dtype=np.float32)
+        for start in range(0, X.shape[0], EVAL_CHUNK):
+            chunk = X[start:start + EVAL_CHUNK]
+            if sparse:
+                chunk = chunk.toarray().astype(np.float32)
+            values = chunk[:, self.split_feature]
+            rows = len(values)
+            go_right = ~(values < self.split_threshold)
+            missing = np.isnan(values)
+            if missing.any():
+                go_right = np.where(missing, ~self.split_default_left, go_right)
+
+            # One byte per row, eight rows per uint64 word: shifting a 0/1 byte
+            # left by at most 7 never carries into the next row.
+            words = -(-rows // 8)
+            bits = np.zeros((len(go_right.T), words * 8), dtype=np.uint8)
+            bits[:, :rows] = go_right.T
+            bits = bits.view(np.uint64)
+            pattern = np.zeros((self.n_trees, words), dtype=np.uint64)
+            for bit, splits in enumerate(self.node_split):
+                pattern |= bits[splits] << np.uint64(bit)
+            pattern = pattern.view(np.uint8)[:, :rows]
+
+            leaves = np.take(self.leaf_table, pattern + self.table_offsets)
+            sums = leaves.reshape(self.n_boosters, -1, rows).sum(axis=1, dtype=np.float64)
+            out[start:start + rows] = (self.base_margins[:, None] + sums.astype(np.float32)).T
+        return out
+
+
+def compile_tables(boosters):
+    """TreeTables for the boosters, or None when they cannot be tabled"""
+    if max(booster.max_depth for booster in boosters) > TABLE_MAX_DEPTH:
+        return None
+    if len({len(booster.roots) for booster in boosters}) > 1:
+        return None
+    return TreeTables(boosters)
+
+
+def _tree_depth(left, right):
+    depth, frontier = 0, [0]
+    while True:
+        frontier = [child for node in frontier if left[node] >= 0 for child in (left[node], right[node])]
+        if not frontier:
+            return depth
+        depth += 1
+
+
+def _is_csr(X):
+    return getattr(X, "format", None) == "csr"
+
+
+def _dense(X):
+    return X.toarray() if _is_csr(X) else X
+
+
+def _sigmoid(margin):
+    return np.float32(1) / (np.float32(1) + np.exp(-margin))
+
+
+# =====================================================
+# MODEL WRAPPERS
+# =====================================================
+class NativeWinModel:
+    """Drop-in for the calibrated win classifier: predict_proba on a raw feature matrix (dense or CSR)"""
+
+    accepts_arrays = True
+
+    def __init__(self, feature_names, boosters, calibrators):
+        self.feature_names_in_ = np.asarray(feature_names)
+        self.boosters = boosters
+        self.calibrators = calibrators
+
+    @cached_property
+    def tables(self):
+        return compile_tables(self.boosters)
+
+    def raw_predict(self, X):
+        """Raw margins of every booster, shape (rows, boosters)"""
+        if self.tables is not None:
+            return self.tables.raw_predict(X)
+        X = _dense(X)
+        return np.stack([booster.raw_predict(X) for booster in self.boosters], axis=1)
+
+    def predict_proba(self, X):
+        proba = np.zeros((X.shape[0], 2))
+        margins = self.raw_predict(X)
+        for i, (x_thresholds, y_thresholds) in enumerate(self.calibrators):
+            raw = _sigmoid(margins[:, i])
+            raw = np.clip(raw, x_thresholds[0], x_thresholds[-1])
+            calibrated = np.zeros((X.shape[0], 2))
+            calibrated[:, 1] = np.interp(raw, x_thresholds, y_thresholds).astype(raw.dtype)
+            calibrated[:, 0] = 1.0 - calibrated[:, 1]
+            proba += calibrated
+        return proba / len(self.boosters)
+
+
+class NativeMarginModel:
+    """Drop-in for the margin regressor: predict on a raw feature matrix (dense or CSR)"""
+
+    accepts_arrays = True
+
+    def __init__(self, feature_names, booster):
+        self.feature_names_in_ = np.asarray(feature_names)
+        self.booster = booster
+
+    @cached_property
+    def tables(self):
+        return compile_tables([self.booster])
+
+    def predict(self, X):
+        if self.tables is not None:
+            return self.tables.raw_predict(X)[:, 0]
+        return self.booster.raw_predict(_dense(X))
+
+
+# =====================================================
+# CONVERSION & LOADING
+# =====================================================
+def win_model_arrays(win_model):
+    """Flatten the calibrated win classifier into a dict of arrays"""
+    arrays = {"feature_names": np.asarray(win_model.feature_names_in_, dtype=str),
+              "n_boosters": np.array(len(win_model.calibrated_classifiers_))}
+    for i, calibrated in enumerate(win_model.calibrated_classifiers_):
+        if calibrated.method != "isotonic" or len(calibrated.calibrators) != 1:
+            raise ValueError("only binary isotonic calibration can be converted")
+        booster = CompiledTrees.from_booster(calibrated.estimator.get_booster())
+        arrays.update(booster.to_arrays(f"booster{i}_"))
+        arrays[f"booster{i}_x_thresholds"] = calibrated.calibrators[0].X_thresholds_
+        arrays[f"booster{i}_y_thresholds"] = calibrated.calibrators[0].y_thresholds_
+    return arrays
+
+
+def margin_model_arrays(margin_model):
+    """Flatten the margin regressor into a dict of arrays"""
+    booster = CompiledTrees.from_booster(margin_model.get_booster())
+    arrays = {"feature_names": np.asarray(margin_model.feature_names_in_, dtype=str)}
+    arrays.update(booster.to_arrays("booster_"))
+    return arrays
+
+
+def win_model_from_arrays(arrays):
+    n_boosters = int(arrays["n_boosters"])
+    boosters = [CompiledTrees.from_arrays(arrays, f"booster{i}_") for i in range(n_boosters)]
+    calibrators = [(arrays[f"booster{i}_x_thresholds"], arrays[f"booster{i}_y_thresholds"])
+                   for i in range(n_boosters)]
+    return NativeWinModel(arrays["feature_names"], boosters, calibrators)
+
+
+def margin_model_from_arrays(arrays):
+    return NativeMarginModel(arrays["feature_names"], CompiledTrees.from_arrays(arrays, "booster_"))
+
+
+def convert_win_model(win_model, source_hash, path=WIN_NATIVE_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(path, source_hash=np.array(source_hash), **win_model_arrays(win_model))
+
+
+def convert_margin_model(margin_model, source_hash, path=MARGIN_NATIVE_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(path, source_hash=np.array(source_hash), **margin_model_arrays(margin_model))
+
+
+def _load_npz(path, source_hash):
+    """Arrays of a converted model, or None if missing or converted from another pickle"""
+    try:
+        with np.load(path) as data:
+            if str(data["source_hash"]) != source_hash:
+                return None
+            return dict(data)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _load_or_convert(path, pickle_path, convert):
+    source_hash = artifact_hash([pickle_path])
+    arrays = _load_npz(path, source_hash)
+    metrics.cache("native_models", hit=arrays is not None)
+    if arrays is None:
+        import joblib
+
+        convert(joblib.load(pickle_path), source_hash, path)
+        arrays = _load_npz(path, source_hash)
+    return arrays
+
+
+def load_win_arrays(path=WIN_NATIVE_PATH, pickle_path=WIN_MODEL_PATH):
+    return _load_or_convert(path, pickle_path, convert_win_model)
+
+
+def load_margin_arrays(path=MARGIN_NATIVE_PATH, pickle_path=MARGIN_MODEL_PATH):
+    return _load_or_convert(path, pickle_path, convert_margin_model)
+
+
+def load_win_model(path=WIN_NATIVE_PATH, pickle_path=WIN_MODEL_PATH):
+    return win_model_from_arrays(load_win_arrays(path, pickle_path))
+
+
+def load_margin_model(path=MARGIN_NATIVE_PATH, pickle_path=MARGIN_MODEL_PATH):
+    return margin_model_from_arrays(load_margin_arrays(path, pickle_path))
+
+
+class LazyModels:
+    """Loads each native model on first access, so callers that never predict pay nothing"""
+
+    @cached_property
+    def win_model(self):
+        return load_win_model()
+
+    @cached_property
+    def margin_model(self):
+        return load_margin_model()
+
+
+# =====================================================
+# PARITY CHECK
+# =====================================================
+# Both sides add up the same float32 leaf values, but in a different order,
+# XGBoost in float32 throughout and the tables in float64 before rounding,
+# so raw outputs may differ by a few float32 rounding steps at their
+# magnitude (5-13 observed). 64 ULPs of the largest output is ~7.6e-6 for a
+# probability and ~5e-4 runs for a 100-run margin.
+PARITY_ULPS = 64
+PARITY_RANDOM_ROWS = 5000
+PARITY_MISSING_FRACTION = 0.1
+
+
+def parity_rows(feature_names, city_stats, random_rows=PARITY_RANDOM_ROWS, seed=0):
+    """{label: feature matrix}: every city x score the app accepts, and perturbed copies with NaNs"""
+    from prediction import build_feature_matrix
+    from prediction_table import SCORE_MAX, SCORE_MIN
+
+    score_range = range(SCORE_MIN, SCORE_MAX + 1)
+    cities = [city for city in city_stats for _ in score_range]
+    scores = [score for _ in city_stats for score in score_range]
+    grid, _ = build_feature_matrix(feature_names, city_stats, cities, scores)
+
+    rng = np.random.default_rng(seed)
+    noisy = grid[rng.integers(0, len(grid), random_rows)]
+    noisy = noisy + rng.normal(0, 0.3, noisy.shape) * np.maximum(np.abs(noisy), 1)
+    noisy[rng.random(noisy.shape) < PARITY_MISSING_FRACTION] = np.nan
+    return {"grid": grid, "random": noisy}
+
+
+def parity_tolerance(reference, ulps=PARITY_ULPS):
+    return ulps * float(np.spacing(np.float32(np.nanmax(np.abs(reference)))))
+
+
+def raw_parity(win_model, margin_model, native_win, native_margin, X):
+    """{output: (max |native - pickled|, tolerance)} for the raw P(win) and margin of each row"""
+    from prediction import model_input
+
+    outputs = {
+        "win_prob": (win_model.predict_proba(model_input(win_model, X))[:, 1], native_win.predict_proba(X)[:, 1]),
+        "margin": (margin_model.predict(model_input(margin_model, X)), native_margin.predict(X)),
+    }
+    return {name: (float(np.abs(np.asarray(native, dtype=float) - pickled).max()), parity_tolerance(pickled))
+            for name, (pickled, native) in outputs.items()}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.parse_args()
+
+    import joblib
+
+    convert_win_model(joblib.load(WIN_MODEL_PATH), artifact_hash([WIN_MODEL_PATH]))
+    convert_margin_model(joblib.load(MARGIN_MODEL_PATH), artifact_hash([MARGIN_MODEL_PATH]))
+    print(f"Converted models to {NATIVE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
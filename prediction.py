@@ -0,0 +1,373 @@
+"""Prediction core shared by the Streamlit app, the HTTP service and batch scoring.
+
+Nothing here imports Streamlit, so it can be used from any process. joblib and
+pandas are imported on first use only, so callers of the native models
+(native_models.py) never pay for them.
+"""
+import hashlib
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+
+import metrics
+from score_distributions import SCORE_DISTRIBUTIONS_PATH, ScoreDistributions
+from venue_index import venue_index
+
+BASE_DIR = Path(__file__).resolve().parent
+WIN_MODEL_PATH = BASE_DIR / "win_probability_model.pkl"
+MARGIN_MODEL_PATH = BASE_DIR / "margin_model.pkl"
+CITY_STATS_PATH = BASE_DIR / "city_stats.json"
+ARTIFACT_PATHS = (WIN_MODEL_PATH, MARGIN_MODEL_PATH, CITY_STATS_PATH, SCORE_DISTRIBUTIONS_PATH)
+# Hashed when present; without it every score_percentile is UNKNOWN_PERCENTILE.
+OPTIONAL_ARTIFACT_PATHS = {SCORE_DISTRIBUTIONS_PATH}
+BUILD_DIR = BASE_DIR / "build"
+
+PREDICTION_YEAR = 2025
+# The models are trained on the real second-innings total, which live chase
+# mode fills with its projection. Before the chase there is none; 0 is what the
+# app has always sent, and the blend constants were tuned around it.
+PRE_MATCH_SCORE_2ND = 0
+# First-innings totals callers accept; the highest T20 total is under 350.
+MIN_SCORE = 0
+MAX_SCORE = 400
+
+
+# =====================================================
+# ARTIFACTS
+# =====================================================
+@metrics.instrument("artifacts.load_pickle")
+def load_artifacts():
+    import joblib
+
+    win_model = joblib.load(WIN_MODEL_PATH)
+    margin_model = joblib.load(MARGIN_MODEL_PATH)
+    return win_model, margin_model, load_city_stats()
+
+
+def load_city_stats():
+    with open(CITY_STATS_PATH) as f:
+        return json.load(f)
+
+
+# (file version, distributions) of the last load.
+_score_distributions = (None, None)
+
+
+def _file_version(path):
+    """(mtime, size) of path, or None if it does not exist"""
+    try:
+        stat = Path(path).stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_score_distributions():
+    """The per-city first-innings distributions, reread whenever the file changes.
+
+    A rebuilt file changes artifact_hash(), so long-lived workers must not keep
+    serving percentiles from the old one under the new hash.
+    """
+    global _score_distributions
+    version = _file_version(SCORE_DISTRIBUTIONS_PATH)
+    loaded_version, distributions = _score_distributions
+    if distributions is None or version != loaded_version:
+        distributions = ScoreDistributions.load(SCORE_DISTRIBUTIONS_PATH)
+        _score_distributions = version, distributions
+    return distributions
+
+
+def artifact_hash(paths=ARTIFACT_PATHS):
+    """SHA-256 over the contents of the model and stats files"""
+    digest = hashlib.sha256()
+    for path in paths:
+        path = Path(path)
+        if path in OPTIONAL_ARTIFACT_PATHS and not path.exists():
+            continue
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+# =====================================================
+# CRICKET-REALISTIC BLENDING
+# =====================================================
+# The win probability blends a logistic curve in score - avg_winning_score,
+# rescaled to [prob_floor, prob_ceiling], with the model's probability and
+# clips the result to [clip_low, clip_high]. The margin blends
+# margin_rate * (score - avg_winning_score) with the model's margin.
+# Hand-tuned; backtest.py measures them against played matches.
+PROBABILITY_PARAMS = {
+    "slope": 0.12,
+    "prob_floor": 0.30,
+    "prob_ceiling": 0.97,
+    "cricket_weight": 0.65,
+    "model_weight": 0.35,
+    "clip_low": 0.03,
+    "clip_high": 0.97,
+}
+MARGIN_PARAMS = {
+    "margin_rate": 0.6,
+    "base_weight": 0.7,
+    "model_weight": 0.3,
+}
+
+
+def cricket_realistic_probability(score, avg_win, ml_prob, params=PROBABILITY_PARAMS):
+    p = params
+    diff = score - avg_win
+    logistic = 1 / (1 + math.exp(-p["slope"] * diff))
+    cricket_prob = p["prob_floor"] + logistic * (p["prob_ceiling"] - p["prob_floor"])
+    final = p["cricket_weight"] * cricket_prob + p["model_weight"] * ml_prob
+    return max(p["clip_low"], min(final, p["clip_high"]))
+
+
+def cricket_realistic_margin(score, avg_win, ml_margin, params=MARGIN_PARAMS):
+    p = params
+    diff = score - avg_win
+    if diff <= 0:
+        return None
+    base = diff * p["margin_rate"]
+    final = p["base_weight"] * base + p["model_weight"] * ml_margin
+    return max(1, round(final))
+
+
+def cricket_realistic_probability_array(scores, avg_wins, ml_probs, params=PROBABILITY_PARAMS):
+    """Array form of cricket_realistic_probability"""
+    p = params
+    diff = np.asarray(scores, dtype=float) - avg_wins
+    logistic = 1 / (1 + np.exp(-p["slope"] * diff))
+    cricket_prob = p["prob_floor"] + logistic * (p["prob_ceiling"] - p["prob_floor"])
+    final = p["cricket_weight"] * cricket_prob + p["model_weight"] * np.asarray(ml_probs, dtype=float)
+    return np.clip(final, p["clip_low"], p["clip_high"])
+
+
+def cricket_realistic_margin_array(scores, avg_wins, ml_margins, params=MARGIN_PARAMS):
+    """Array form of cricket_realistic_margin; NaN where the scalar returns None"""
+    p = params
+    diff = np.asarray(scores, dtype=float) - avg_wins
+    base = diff * p["margin_rate"]
+    final = p["base_weight"] * base + p["model_weight"] * np.asarray(ml_margins, dtype=float)
+    margins = np.maximum(1, np.round(final))
+    return np.where(diff > 0, margins, np.nan)
+
+
+# =====================================================
+# FEATURE MATRIX
+# =====================================================
+# Constant feature values; the city one-hot is set per city and the
+# SCORE_COLUMNS are written per request.
+CONSTANT_FEATURES = {
+    "year": PREDICTION_YEAR,
+    "innings_1st": 1,
+    "innings_2nd": 2,
+    "innings_score_2nd": PRE_MATCH_SCORE_2ND,
+    "toss_winner_batted_first": 1,
+}
+SCORE_COLUMNS = ("innings_score_1st", "score_vs_avg", "score_vs_winning_avg", "is_high_score", "innings_momentum",
+                 "score_percentile")
+MAX_ENCODERS = 16
+
+
+class FeatureEncoder:
+    """Feature rows in feature_names order, copied from a per-city base row.
+
+    A city's base row holds the constants and its one-hot column and is built
+    the first time the city is seen. Encoding a request copies base rows and
+    writes only the SCORE_COLUMNS; score_percentile is looked up in the
+    city's first-innings distribution. Names that are not city_stats keys
+    (aliases, stadiums, misspellings) are resolved through the venue index
+    and share the row of the city they resolve to.
+    """
+
+    def __init__(self, feature_names, city_stats, distributions=None):
+        self.city_stats = city_stats
+        self.distributions = distributions if distributions is not None else load_score_distributions()
+        self.columns = {name: i for i, name in enumerate(feature_names)}
+        self.template = np.zeros(len(self.columns))
+        for name, value in CONSTANT_FEATURES.items():
+            self.template[self.columns[name]] = value
+        self.score_cols = [self.columns[name] for name in SCORE_COLUMNS]
+
+        self.index = {}
+        self.keys = []
+        self.base = np.empty((0, len(self.columns)))
+        self.city_col = np.empty(0, dtype=np.intp)
+        self.cdf_row = np.empty(0, dtype=np.intp)
+        self.avg_score = np.empty(0)
+        self.avg_win = np.empty(0)
+
+    def _add_city(self, name):
+        city = name if name in self.city_stats else venue_index(self.city_stats).stats_key(name)
+        if city in self.index:
+            i = self.index[name] = self.index[city]
+            return i
+        stats = self.city_stats[city]
+        i = len(self.keys)
+        if i == len(self.base):
+            capacity = max(16, 2 * i)
+            self.base = np.resize(self.base, (capacity, len(self.columns)))
+            self.city_col = np.resize(self.city_col, capacity)
+            self.cdf_row = np.resize(self.cdf_row, capacity)
+            self.avg_score = np.resize(self.avg_score, capacity)
+            self.avg_win = np.resize(self.avg_win, capacity)
+        self.base[i] = self.template
+        self.city_col[i] = self.columns.get(f"city_{city}", -1)
+        if self.city_col[i] >= 0:
+            self.base[i, self.city_col[i]] = 1
+        self.cdf_row[i] = self.distributions.row(city)
+        self.avg_score[i] = stats["avg_score"]
+        self.avg_win[i] = stats["avg_winning_score"]
+        self.keys.append(city)
+        self.index[city] = self.index[name] = i
+        return i
+
+    def city_indices(self, cities):
+        index = self.index
+        return np.array([index[c] if c in index else self._add_city(c) for c in cities], dtype=np.intp)
+
+    def _score_values(self, scores, avg_score, avg_win, percentile):
+        """Columns of SCORE_COLUMNS, in order"""
+        return (scores, scores - avg_score, scores - avg_win, scores >= avg_win, (scores - 120) / 120, percentile)
+
+    def _percentiles(self, idx, scores):
+        return self.distributions.percentiles_at(self.cdf_row[idx], scores)
+
+    def encode(self, cities, scores):
+        """(X, avg_win): one dense row per match"""
+        idx = self.city_indices(cities)
+        scores = np.asarray(scores, dtype=float)
+        X = self.base[idx]
+        avg_win = self.avg_win[idx]
+        values = self._score_values(scores, self.avg_score[idx], avg_win, self._percentiles(idx, scores))
+        for col, column in zip(self.score_cols, values):
+            X[:, col] = column
+        return X, avg_win
+
+    def encode_one(self, city, score):
+        """encode for a single match, without the batch bookkeeping"""
+        i = self.index[city] if city in self.index else self._add_city(city)
+        X = self.base[i:i + 1].copy()
+        score = float(score)
+        values = self._score_values(score, self.avg_score[i], self.avg_win[i],
+                                    self.distributions.percentile(self.keys[i], score))
+        for col, value in zip(self.score_cols, values):
+            X[0, col] = value
+        return X, self.avg_win[i:i + 1]
+
+    def encode_sparse(self, cities, scores):
+        """(X, avg_win) with X a scipy CSR matrix holding the non-zero constants,
+        the score columns and the city one-hot of each row.
+
+        Entries left out are zeros, not missing values: the native models read
+        them as 0, and model_input densifies CSR input for XGBoost, which would
+        otherwise treat them as missing.
+        """
+        from scipy.sparse import csr_matrix
+
+        idx = self.city_indices(cities)
+        scores = np.asarray(scores, dtype=float)
+        avg_win = self.avg_win[idx]
+
+        constant_cols = [col for col in np.flatnonzero(self.template) if col not in self.score_cols]
+        fixed_cols = np.array(constant_cols + self.score_cols, dtype=np.int32)
+        fixed = np.empty((len(idx), len(fixed_cols)))
+        fixed[:, :len(constant_cols)] = self.template[constant_cols]
+        values = self._score_values(scores, self.avg_score[idx], avg_win, self._percentiles(idx, scores))
+        for k, column in enumerate(values):
+            fixed[:, len(constant_cols) + k] = column
+
+        # Every row stores the fixed columns, then its one-hot column if it has one.
+        city_col = self.city_col[idx]
+        has_city = city_col >= 0
+        indptr = np.zeros(len(idx) + 1, dtype=np.int64)
+        np.cumsum(len(fixed_cols) + has_city, out=indptr[1:])
+        data = np.empty(indptr[-1])
+        indices = np.empty(indptr[-1], dtype=np.int32)
+        positions = indptr[:-1, None] + np.arange(len(fixed_cols))
+        data[positions] = fixed
+        indices[positions] = fixed_cols
+        one_hot = indptr[1:][has_city] - 1
+        data[one_hot] = 1
+        indices[one_hot] = city_col[has_city]
+        return csr_matrix((data, indices, indptr), shape=(len(idx), len(self.columns))), avg_win
+
+
+_encoders = {}
+
+
+def feature_encoder(feature_names, city_stats):
+    """The FeatureEncoder for these columns, kept while city_stats is the same object and the distributions unchanged"""
+    key = (id(city_stats), tuple(feature_names))
+    encoder = _encoders.get(key)
+    distributions = load_score_distributions()
+    if encoder is None or encoder.city_stats is not city_stats or encoder.distributions is not distributions:
+        if len(_encoders) >= MAX_ENCODERS:
+            _encoders.clear()
+        encoder = _encoders[key] = FeatureEncoder(feature_names, city_stats, distributions)
+    return encoder
+
+
+def build_feature_matrix(feature_names, city_stats, cities, scores):
+    """Dense feature matrix in feature_names order, one row per match, and each row's avg_winning_score"""
+    return feature_encoder(feature_names, city_stats).encode(cities, scores)
+
+
+def model_input(model, X):
+    """Native models take the raw matrix (dense or CSR); sklearn estimators want named columns"""
+    if getattr(model, "accepts_arrays", False):
+        return X
+    import pandas as pd
+
+    if getattr(X, "format", None) == "csr":
+        X = X.toarray()
+
+    return pd.DataFrame(X, columns=model.feature_names_in_, copy=False)
+
+
+# =====================================================
+# PREDICTION
+# =====================================================
+def predict_match(win_model, margin_model, city_stats, city, score):
+    """Win probability and expected margin (or None) for one first-innings score"""
+    with metrics.timed("predict.features"):
+        X, avg_win = feature_encoder(win_model.feature_names_in_, city_stats).encode_one(city, score)
+
+    with metrics.timed("model.win.predict_proba"):
+        ml_prob = win_model.predict_proba(model_input(win_model, X))[0][1]
+    with metrics.timed("model.margin.predict"):
+        ml_margin = margin_model.predict(model_input(margin_model, X))[0]
+
+    prob = cricket_realistic_probability(score, avg_win[0], ml_prob)
+    margin = cricket_realistic_margin(score, avg_win[0], ml_margin)
+
+    return prob, margin
+
+
+def model_outputs(win_model, margin_model, city_stats, cities, scores, sparse=False):
+    """(avg_winning_score, model win probability, model margin) per row, before blending"""
+    scores = np.asarray(scores, dtype=float)
+    with metrics.timed("predict.features"):
+        encoder = feature_encoder(win_model.feature_names_in_, city_stats)
+        X, avg_win = encoder.encode_sparse(cities, scores) if sparse else encoder.encode(cities, scores)
+    with metrics.timed("model.win.predict_proba"):
+        ml_probs = win_model.predict_proba(model_input(win_model, X))[:, 1]
+    with metrics.timed("model.margin.predict"):
+        ml_margins = margin_model.predict(model_input(margin_model, X))
+    metrics.count("predict.rows", len(scores))
+    return avg_win, ml_probs, ml_margins
+
+
+def predict_matches(win_model, margin_model, city_stats, cities, scores, sparse=False):
+    """Batch predict_match: one predict_proba and one predict call for all rows.
+
+    Returns (probabilities, margins) as float arrays; margins are NaN where
+    predict_match would return None. With sparse=True the features are encoded
+    as a CSR matrix, which the native models densify EVAL_CHUNK rows at a time.
+    """
+    scores = np.asarray(scores, dtype=float)
+    avg_win, ml_probs, ml_margins = model_outputs(win_model, margin_model, city_stats, cities, scores, sparse)
+    probs = cricket_realistic_probability_array(scores, avg_win, ml_probs)
+    margins = cricket_realistic_margin_array(scores, avg_win, ml_margins)
+    return probs, margins
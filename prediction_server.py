@@ -0,0 +1,460 @@
+"""Headless HTTP/JSON prediction service with request micro-batching.
+
+Requests that arrive within a short window are merged into one vectorized
+predict_matches call, so concurrent clients share a single model pass.
+
+    python prediction_server.py --port 8000 --batch-window-ms 2
+    python prediction_server.py --backend pickle     # unpickled scikit-learn / XGBoost models
+
+The default backend evaluates the native tree arrays from the shared artifact
+store (see native_models.py); tests/test_native_models.py checks they match
+the pickles.
+
+POST /predict accepts either one match or a list of them:
+
+    {"city": "Mumbai", "score": 185}
+    {"matches": [{"city": "Mumbai", "score": 185}, {"city": "Delhi", "score": 160}]}
+
+Scores must be finite numbers from MIN_SCORE to MAX_SCORE; anything else
+(including the NaN and Infinity json.loads accepts) is a 400 before it
+reaches the batcher or the cache.
+
+POST /simulate runs a Monte Carlo chase (see simulation.py) and returns win,
+tie and margin distributions:
+
+    {"city": "Mumbai", "score": 185, "simulations": 100000, "seed": 7}
+
+"city" may be a city_stats key or any venue name, alias or close misspelling
+the venue index resolves (see venue_index.py): "Bangalore" and "Wankhede"
+work, and responses carry the canonical city. GET /venues?q=wank&league=IPL
+&season=2025 searches venues by name.
+
+Predictions go through the two-level result cache (result_cache.py), shared
+with other workers and restarts; --no-cache turns it off.
+
+GET /leaderboard?stat=runs&k=10&city=Mumbai&season=2024 answers top-k player
+queries (stat: runs, wickets, strike_rate, economy; optional city, season,
+team, opponent and min_balls filters) from the table city_stats_pipeline.py
+writes (see leaderboard.py).
+
+GET /toss?city=Mumbai&from=2021&to=2025&day_night=night&team=... returns
+bat-first and chase win rates with 95% intervals from the toss index (see
+toss_analytics.py); every filter is optional.
+
+GET /health returns {"status": "ok"}. GET /cache returns the result cache's
+hit and eviction counts. GET /metrics returns Prometheus text when the server
+runs with IPL_METRICS=1 (see metrics.py).
+"""
+import argparse
+import asyncio
+import json
+import math
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import parse_qs
+
+import numpy as np
+
+import metrics
+from leaderboard import MIN_BALLS, STATS, Leaderboard
+from prediction import MAX_SCORE, MIN_SCORE, artifact_hash, load_artifacts, predict_matches
+from result_cache import ResultCache
+from simulation import simulate_chase
+from toss_analytics import TossIndex
+from venue_index import SEARCH_LIMIT, venue_index
+
+BACKENDS = ("native", "pickle")
+MAX_BODY_BYTES = 1 << 20
+MAX_SIMULATIONS = 2_000_000
+DEFAULT_SIMULATIONS = 100_000
+MAX_VENUE_RESULTS = 100
+MAX_LEADERBOARD_K = 500
+
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# =====================================================
+# MICRO-BATCHING
+# =====================================================
+class MicroBatcher:
+    """Merge predictions submitted within `window` seconds into one model call.
+
+    A window of 0 disables merging: every submission gets its own call.
+    """
+
+    def __init__(self, predict_fn, window=0.002, max_batch=4096):
+        self.predict_fn = predict_fn
+        self.window = window
+        self.max_batch = max_batch
+        self.batches_run = 0
+        self.rows_scored = 0
+        self._pending = []
+        self._pending_rows = 0
+        self._timer = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="predict")
+
+    def submit(self, cities, scores):
+        """Queue rows for scoring; returns a future of (probs, margins) for them"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((cities, scores, future))
+        self._pending_rows += len(scores)
+
+        if self.window <= 0 or self._pending_rows >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_rows = self._pending, [], 0
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        cities = [city for entry in batch for city in entry[0]]
+        scores = [score for entry in batch for score in entry[1]]
+        loop = asyncio.get_running_loop()
+        try:
+            probs, margins = await loop.run_in_executor(
+                self._executor, self.predict_fn, cities, scores
+            )
+        except Exception as exc:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        self.batches_run += 1
+        self.rows_scored += len(scores)
+        metrics.count("server.batches")
+        start = 0
+        for _, entry_scores, future in batch:
+            end = start + len(entry_scores)
+            if not future.done():
+                future.set_result((probs[start:end], margins[start:end]))
+            start = end
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+# =====================================================
+# REQUEST HANDLING
+# =====================================================
+def resolve_city(city, city_stats):
+    """The city_stats key for a city or venue name; 400 if nothing resolves"""
+    if isinstance(city, str):
+        if city in city_stats:
+            return city
+        try:
+            return venue_index(city_stats).stats_key(city)
+        except KeyError:
+            pass
+    raise RequestError(400, f"unknown city: {city!r}")
+
+
+def parse_score(score):
+    """score if it is a finite number from MIN_SCORE to MAX_SCORE; 400 otherwise"""
+    if isinstance(score, bool) or not isinstance(score, (int, float)):
+        raise RequestError(400, f"score must be a number, got {score!r}")
+    if not math.isfinite(score) or not MIN_SCORE <= score <= MAX_SCORE:
+        raise RequestError(400, f"score must be from {MIN_SCORE} to {MAX_SCORE}, got {score!r}")
+    return score
+
+
+def parse_matches(payload, city_stats):
+    """Validate a /predict body and return (cities, scores)"""
+    if isinstance(payload, dict) and "matches" in payload:
+        matches = payload["matches"]
+    else:
+        matches = [payload]
+    if not isinstance(matches, list) or not matches:
+        raise RequestError(400, "expected a match object or a non-empty 'matches' list")
+
+    cities, scores = [], []
+    for match in matches:
+        if not isinstance(match, dict):
+            raise RequestError(400, "each match must be an object")
+        city, score = resolve_city(match.get("city"), city_stats), parse_score(match.get("score"))
+        cities.append(city)
+        scores.append(score)
+    return cities, scores
+
+
+def parse_simulation(payload, city_stats):
+    """Validate a /simulate body and return (city, score, simulations, seed)"""
+    if not isinstance(payload, dict):
+        raise RequestError(400, "expected a simulation object")
+    city, score = resolve_city(payload.get("city"), city_stats), parse_score(payload.get("score"))
+    simulations = payload.get("simulations", DEFAULT_SIMULATIONS)
+    seed = payload.get("seed")
+    if isinstance(simulations, bool) or not isinstance(simulations, int) or not 0 < simulations <= MAX_SIMULATIONS:
+        raise RequestError(400, f"simulations must be an integer from 1 to {MAX_SIMULATIONS}")
+    if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int) or seed < 0):
+        raise RequestError(400, "seed must be a non-negative integer")
+    return city, score, simulations, seed
+
+
+def parse_venue_query(query):
+    """(q, league, season, limit) from a /venues query string"""
+    params = {name: values[-1] for name, values in parse_qs(query).items()}
+    season = params.get("season")
+    try:
+        season = int(season) if season is not None else None
+        limit = int(params.get("limit", SEARCH_LIMIT))
+    except ValueError:
+        raise RequestError(400, "season and limit must be integers") from None
+    if not 0 < limit <= MAX_VENUE_RESULTS:
+        raise RequestError(400, f"limit must be from 1 to {MAX_VENUE_RESULTS}")
+    return params.get("q", ""), params.get("league"), season, limit
+
+
+def parse_leaderboard_query(query, city_stats):
+    """Keyword arguments for Leaderboard.top from a /leaderboard query string"""
+    params = {name: values[-1] for name, values in parse_qs(query).items()}
+    stat = params.get("stat", "runs")
+    if stat not in STATS:
+        raise RequestError(400, f"stat must be one of {', '.join(STATS)}")
+    try:
+        k = int(params.get("k", 10))
+        min_balls = int(params.get("min_balls", MIN_BALLS))
+    except ValueError:
+        raise RequestError(400, "k and min_balls must be integers") from None
+    if not 0 < k <= MAX_LEADERBOARD_K:
+        raise RequestError(400, f"k must be from 1 to {MAX_LEADERBOARD_K}")
+    season = params.get("season")
+    return {
+        "stat": stat, "k": k, "min_balls": min_balls,
+        "city": resolve_city(params["city"], city_stats) if "city" in params else None,
+        "season": int(season) if season is not None and season.isdigit() else season,
+        "team": params.get("team"), "opponent": params.get("opponent"),
+    }
+
+
+def parse_toss_query(query, city_stats):
+    """Keyword arguments for TossIndex.summary from a /toss query string"""
+    params = {name: values[-1] for name, values in parse_qs(query).items()}
+    try:
+        seasons = tuple(int(params[end]) if end in params else None for end in ("from", "to"))
+    except ValueError:
+        raise RequestError(400, "from and to must be years") from None
+    return {
+        "city": resolve_city(params["city"], city_stats) if "city" in params else None,
+        "seasons": seasons, "day_night": params.get("day_night"), "team": params.get("team"),
+    }
+
+
+def format_venues(matches):
+    return [
+        {"id": venue.id, "name": venue.name, "city": venue.stats, "leagues": list(venue.leagues),
+         "seasons": list(venue.seasons), "score": round(score, 4)}
+        for venue, score in matches
+    ]
+
+
+def format_predictions(cities, scores, probs, margins):
+    return [
+        {
+            "city": city,
+            "score": score,
+            "win_probability": float(prob),
+            "margin": None if np.isnan(margin) else int(margin),
+        }
+        for city, score, prob, margin in zip(cities, scores, probs, margins)
+    ]
+
+
+class PredictionServer:
+    def __init__(self, batcher, city_stats, result_cache=None, leaderboard=None, toss_index=None):
+        self.batcher = batcher
+        self.city_stats = city_stats
+        self.result_cache = result_cache
+        self.leaderboard = leaderboard
+        self.toss_index = toss_index
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                keep_alive = await self._handle_request(request_line, reader, writer)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(self, request_line, reader, writer):
+        try:
+            method, path, version = request_line.decode("latin-1").split()
+        except ValueError:
+            self._respond(writer, 400, {"error": "malformed request line"}, keep_alive=False)
+            return False
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" and (version == "HTTP/1.1" or connection == "keep-alive")
+        try:
+            length = int(headers.get("content-length", 0) or 0)
+        except ValueError:
+            self._respond(writer, 400, {"error": "invalid Content-Length"}, keep_alive=False)
+            return False
+        if length > MAX_BODY_BYTES:
+            self._respond(writer, 413, {"error": "request body too large"}, keep_alive=False)
+            return False
+        body = await reader.readexactly(length) if length else b""
+
+        try:
+            status, payload = await self._route(method, path, body)
+        except RequestError as exc:
+            status, payload = exc.status, {"error": str(exc)}
+        except Exception as exc:
+            status, payload = 500, {"error": f"prediction failed: {exc}"}
+        self._respond(writer, status, payload, keep_alive)
+        return keep_alive
+
+    async def _route(self, method, target, body):
+        path, _, query = target.partition("?")
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path == "/metrics":
+            return 200, metrics.prometheus_text()
+        if path == "/cache":
+            if self.result_cache is None:
+                raise RequestError(404, "the result cache is disabled")
+            return 200, self.result_cache.stats()
+        if path == "/venues":
+            q, league, season, limit = parse_venue_query(query)
+            venues = venue_index(self.city_stats)
+            if q:
+                matches = venues.search(q, limit, league, season, with_stats=True)
+            else:
+                matches = [(venue, 1.0) for venue in venues.filter(league, season, with_stats=True)[:limit]]
+            return 200, {"venues": format_venues(matches)}
+        if path == "/leaderboard":
+            if not self.leaderboard:
+                raise RequestError(404, "no leaderboard; run city_stats_pipeline.py first")
+            query = parse_leaderboard_query(query, self.city_stats)
+            leaders = self.leaderboard.top(**query)
+            return 200, {**query, "leaders": [{"player": player, "value": value} for player, value in leaders]}
+        if path == "/toss":
+            if not self.toss_index:
+                raise RequestError(404, "no toss index; run city_stats_pipeline.py first")
+            query = parse_toss_query(query, self.city_stats)
+            return 200, {**query, **self.toss_index.summary(**query)}
+        if path not in ("/predict", "/simulate"):
+            raise RequestError(404, f"no route for {path}")
+        if method != "POST":
+            raise RequestError(405, f"use POST {path}")
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            raise RequestError(400, "body is not valid JSON") from None
+
+        if path == "/simulate":
+            city, score, simulations, seed = parse_simulation(payload, self.city_stats)
+            loop = asyncio.get_running_loop()
+            with metrics.timed("server.simulate"):
+                result = await loop.run_in_executor(
+                    None, partial(simulate_chase, self.city_stats[city], score, simulations, seed)
+                )
+            return 200, {"city": city, **result.summary()}
+
+        cities, scores = parse_matches(payload, self.city_stats)
+        with metrics.timed("server.predict"):
+            probs, margins = await self.batcher.submit(cities, scores)
+        return 200, {"predictions": format_predictions(cities, scores, probs, margins)}
+
+    @staticmethod
+    def _respond(writer, status, payload, keep_alive):
+        if isinstance(payload, str):
+            body, content_type = payload.encode(), "text/plain; version=0.0.4"
+        else:
+            body, content_type = json.dumps(payload).encode(), "application/json"
+        head = (
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+
+
+def load_backend(backend):
+    """(win_model, margin_model, city_stats) for one of BACKENDS"""
+    if backend == "pickle":
+        return load_artifacts()
+    from artifact_store import attach_artifact_store
+
+    store = attach_artifact_store()
+    return store.win_model, store.margin_model, store.city_stats
+
+
+async def serve(host="127.0.0.1", port=8000, batch_window=0.002, max_batch=4096, backend="native",
+                use_cache=True):
+    win_model, margin_model, city_stats = load_backend(backend)
+    predict_fn = partial(predict_matches, win_model, margin_model, city_stats)
+    result_cache = ResultCache(artifact_hash()) if use_cache else None
+    if result_cache is not None:
+        predict_fn = partial(result_cache.predict_matches, predict_fn)
+    batcher = MicroBatcher(predict_fn, window=batch_window, max_batch=max_batch)
+    server = PredictionServer(batcher, city_stats, result_cache, Leaderboard.load(), TossIndex.load())
+
+    listener = await asyncio.start_server(server.handle_connection, host, port)
+    print(f"Serving predictions on http://{host}:{port} "
+          f"({backend} models, batch window {batch_window * 1000:g} ms)", flush=True)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        batcher.close()
+        if result_cache is not None:
+            result_cache.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--batch-window-ms", type=float, default=2.0,
+                        help="merge requests arriving within this window; 0 disables batching")
+    parser.add_argument("--max-batch", type=int, default=4096,
+                        help="flush early once this many rows are queued")
+    parser.add_argument("--backend", choices=BACKENDS, default="native")
+    parser.add_argument("--no-cache", action="store_true", help="score every request with the models")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.batch_window_ms / 1000, args.max_batch, args.backend,
+                          use_cache=not args.no_cache))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Precomputed (city, score) -> (win probability, margin) lookup table.
+
+Every input the app accepts is discrete: one of the cities in city_stats.json
+and an integer first-innings score between SCORE_MIN and SCORE_MAX. The table
+evaluates all of them once and stores the results as two (city, score) arrays,
+tagged with the artifact hash they were built from. A what-if sweep over every
+score for a set of cities is a slice of those arrays, kept per city set.
+
+Build it with:
+
+    python prediction_table.py
+"""
+import numpy as np
+
+import metrics
+from prediction import BUILD_DIR, artifact_hash, load_artifacts, predict_matches
+
+SCORE_MIN = 100
+SCORE_MAX = 300
+TABLE_PATH = BUILD_DIR / "prediction_table.npz"
+MAX_SWEEPS = 64
+
+
+class PredictionTable:
+    """Array-backed table indexed by city index and score offset"""
+
+    def __init__(self, cities, probs, margins, source_hash, score_min=SCORE_MIN):
+        self.cities = list(cities)
+        self.city_index = {city: i for i, city in enumerate(self.cities)}
+        self.probs = probs
+        self.margins = margins
+        self.source_hash = source_hash
+        self.score_min = score_min
+        self.scores = np.arange(score_min, score_min + probs.shape[1])
+        self._sweeps = {}
+
+    def lookup(self, city, score):
+        """(prob, margin) like predict_match, or None if the input is outside the table"""
+        row = self.city_index.get(city)
+        offset = score - self.score_min
+        if row is None or offset != int(offset) or not 0 <= offset < self.probs.shape[1]:
+            return None
+        offset = int(offset)
+        margin = self.margins[row, offset]
+        return float(self.probs[row, offset]), None if np.isnan(margin) else int(margin)
+
+    def sweep(self, cities=None):
+        """(cities, scores, probs, margins) for every score in the table, one row per city.
+
+        No model calls: the rows are sliced from the table, which belongs to
+        one artifact hash, and kept per city set. Unknown cities raise KeyError.
+        """
+        key = tuple(self.cities if cities is None else cities)
+        sweep = self._sweeps.get(key)
+        if sweep is None:
+            if len(self._sweeps) >= MAX_SWEEPS:
+                self._sweeps.clear()
+            rows = [self.city_index[city] for city in key]
+            sweep = self._sweeps[key] = (list(key), self.scores, self.probs[rows], self.margins[rows])
+        return sweep
+
+    def save(self, path=TABLE_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            path,
+            cities=np.array(self.cities),
+            probs=self.probs,
+            margins=self.margins,
+            source_hash=np.array(self.source_hash),
+            score_min=np.array(self.score_min),
+        )
+
+
+def build_prediction_table(win_model, margin_model, city_stats, source_hash):
+    """Evaluate every (city, score) pair with one batched model pass"""
+    cities = sorted(city_stats)
+    scores = np.arange(SCORE_MIN, SCORE_MAX + 1)
+    probs, margins = predict_matches(
+        win_model, margin_model, city_stats,
+        np.repeat(cities, len(scores)), np.tile(scores, len(cities)),
+    )
+    shape = (len(cities), len(scores))
+    return PredictionTable(cities, probs.reshape(shape), margins.reshape(shape), source_hash)
+
+
+def load_prediction_table(source_hash, path=TABLE_PATH):
+    """Load the saved table, or None if it is missing or was built from other artifacts"""
+    try:
+        data = np.load(path)
+    except (OSError, ValueError):
+        return None
+    with data:
+        if str(data["source_hash"]) != source_hash:
+            return None
+        return PredictionTable(
+            data["cities"].tolist(), data["probs"], data["margins"],
+            source_hash, int(data["score_min"]),
+        )
+
+
+def load_or_build_prediction_table(models, city_stats, source_hash=None):
+    """Return a table matching the current artifacts, rebuilding and saving it if stale.
+
+    `models` exposes win_model and margin_model attributes; they are only
+    touched when the table has to be rebuilt.
+    """
+    source_hash = source_hash or artifact_hash()
+    table = load_prediction_table(source_hash)
+    metrics.cache("prediction_table.file", hit=table is not None)
+    if table is None:
+        table = build_prediction_table(models.win_model, models.margin_model, city_stats, source_hash)
+        try:
+            table.save()
+        except OSError:
+            pass
+    return table
+
+
+if __name__ == "__main__":
+    win_model, margin_model, city_stats = load_artifacts()
+    table = build_prediction_table(win_model, margin_model, city_stats, artifact_hash())
+    table.save()
+    print(f"Wrote {table.probs.size} predictions for {len(table.cities)} cities to {TABLE_PATH}")
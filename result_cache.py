@@ -0,0 +1,266 @@
+"""Two-level cache of prediction results shared by every worker.
+
+Level 1 is an in-process LRU of (city, score) -> (win probability, margin).
+Level 2 is a SQLite file under build/ that every worker process and every
+restart reads and writes. Entries are stored under artifact_hash(), which
+covers the two model pickles, city_stats.json and, if present,
+score_distributions.json, so a retrain or a rebuilt stats file never serves
+stale results: the new hash simply misses. Old entries are removed by the
+disk cache's size bound, oldest first.
+
+    cache = ResultCache(artifact_hash())
+    probs, margins = cache.predict_matches(predict_fn, cities, scores)
+    cache.stats()      # hits, misses, evictions and hit ratio per level
+
+    python result_cache.py             # entry counts per artifact hash
+    python result_cache.py --clear
+"""
+import argparse
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import metrics
+from prediction import BUILD_DIR, artifact_hash
+
+CACHE_PATH = BUILD_DIR / "prediction_cache.sqlite"
+LRU_SIZE = 4096
+MAX_DISK_ENTRIES = 1_000_000
+# SQLite's default limit on bound parameters is 999 on older builds.
+QUERY_CHUNK = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (id INTEGER PRIMARY KEY, source_hash TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS results (
+    artifact INTEGER NOT NULL,
+    city TEXT NOT NULL,
+    score REAL NOT NULL,
+    prob REAL NOT NULL,
+    margin REAL,
+    UNIQUE (artifact, city, score)
+);
+"""
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used key"""
+
+    def __init__(self, max_size=LRU_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        return _counter_stats(self.hits, self.misses, self.evictions, size=len(self.entries))
+
+
+class DiskCache:
+    """SQLite-backed results for one artifact hash, bounded to max_entries rows.
+
+    Rows are evicted in insertion order, so results of an older artifact hash
+    go first.
+    """
+
+    def __init__(self, source_hash, path=CACHE_PATH, max_entries=MAX_DISK_ENTRIES):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.db.execute("INSERT OR IGNORE INTO artifacts (source_hash) VALUES (?)", (source_hash,))
+        (self.artifact,) = self.db.execute(
+            "SELECT id FROM artifacts WHERE source_hash = ?", (source_hash,)
+        ).fetchone()
+
+    def get_many(self, keys):
+        """{key: (prob, margin)} for the keys found on disk"""
+        by_city = {}
+        for city, score in keys:
+            by_city.setdefault(city, []).append(score)
+
+        found = {}
+        for city, scores in by_city.items():
+            for start in range(0, len(scores), QUERY_CHUNK):
+                chunk = scores[start:start + QUERY_CHUNK]
+                rows = self.db.execute(
+                    "SELECT score, prob, margin FROM results WHERE artifact = ? AND city = ? "
+                    f"AND score IN ({','.join('?' * len(chunk))})",
+                    (self.artifact, city, *chunk),
+                )
+                for score, prob, margin in rows:
+                    found[(city, score)] = (prob, np.nan if margin is None else margin)
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        """Store (key, (prob, margin)) pairs, then evict down to max_entries"""
+        rows = [
+            (self.artifact, city, score, prob, None if np.isnan(margin) else margin)
+            for (city, score), (prob, margin) in items
+        ]
+        with self.db:
+            self.db.execute("BEGIN")
+            self.db.executemany(
+                "INSERT OR IGNORE INTO results (artifact, city, score, prob, margin) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            # rowids only grow, so max - min + 1 bounds the row count from above.
+            low, high = self.db.execute("SELECT min(rowid), max(rowid) FROM results").fetchone()
+            if high is not None and high - low + 1 > self.max_entries:
+                deleted = self.db.execute(
+                    "DELETE FROM results WHERE rowid <= ?", (high - self.max_entries,)
+                ).rowcount
+                self.evictions += deleted
+                metrics.count("result_cache.disk.evictions", deleted)
+
+    def size(self):
+        return self.db.execute("SELECT count(*) FROM results").fetchone()[0]
+
+    def stats(self):
+        return _counter_stats(self.hits, self.misses, self.evictions, size=self.size())
+
+    def close(self):
+        self.db.close()
+
+
+def _counter_stats(hits, misses, evictions, **extra):
+    lookups = hits + misses
+    return {"hits": hits, "misses": misses, "evictions": evictions,
+            "hit_ratio": hits / lookups if lookups else None, **extra}
+
+
+class ResultCache:
+    """LRU in front of the shared disk cache; safe to use from several threads"""
+
+    def __init__(self, source_hash, path=CACHE_PATH, lru_size=LRU_SIZE, max_disk_entries=MAX_DISK_ENTRIES):
+        self.source_hash = source_hash
+        self.lru = LRUCache(lru_size)
+        self.disk = DiskCache(source_hash, path, max_disk_entries)
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        """{key: (prob, margin)} for the keys found at either level"""
+        with self._lock:
+            found = {}
+            for key in keys:
+                value = self.lru.get(key)
+                if value is not None:
+                    found[key] = value
+            missing = [key for key in keys if key not in found]
+            from_disk = self.disk.get_many(missing) if missing else {}
+            evictions = self.lru.evictions
+            for key, value in from_disk.items():
+                self.lru.put(key, value)
+                found[key] = value
+        metrics.cache("result_cache.lru", True, len(keys) - len(missing))
+        metrics.cache("result_cache.lru", False, len(missing))
+        metrics.cache("result_cache.disk", True, len(from_disk))
+        metrics.cache("result_cache.disk", False, len(missing) - len(from_disk))
+        metrics.count("result_cache.lru.evictions", self.lru.evictions - evictions)
+        return found
+
+    def put_many(self, items):
+        items = list(items)
+        with self._lock:
+            evictions = self.lru.evictions
+            for key, value in items:
+                self.lru.put(key, value)
+            self.disk.put_many(items)
+        metrics.count("result_cache.lru.evictions", self.lru.evictions - evictions)
+
+    def predict_matches(self, predict_fn, cities, scores):
+        """predict_fn(cities, scores) -> (probs, margins), run only for the rows not cached"""
+        keys = [(city, float(score)) for city, score in zip(cities, scores)]
+        unique_keys = list(dict.fromkeys(keys))
+        found = self.get_many(unique_keys)
+
+        missing = [key for key in unique_keys if key not in found]
+        if missing:
+            probs, margins = predict_fn([city for city, _ in missing], [score for _, score in missing])
+            computed = [(key, (float(p), float(m))) for key, p, m in zip(missing, probs, margins)]
+            self.put_many(computed)
+            found.update(computed)
+
+        probs = np.array([found[key][0] for key in keys], dtype=float)
+        margins = np.array([found[key][1] for key in keys], dtype=float)
+        return probs, margins
+
+    def predict_match(self, predict_fn, city, score):
+        """Cached predict_match(city, score) -> (prob, margin or None)"""
+        probs, margins = self.predict_matches(
+            lambda cities, scores: _as_arrays(predict_fn(cities[0], scores[0])), [city], [score]
+        )
+        return float(probs[0]), None if np.isnan(margins[0]) else int(margins[0])
+
+    def stats(self):
+        with self._lock:
+            lru, disk = self.lru.stats(), self.disk.stats()
+        lookups = lru["hits"] + lru["misses"]
+        return {
+            "lru": lru,
+            "disk": disk,
+            "hit_ratio": (lru["hits"] + disk["hits"]) / lookups if lookups else None,
+        }
+
+    def close(self):
+        self.disk.close()
+
+
+def _as_arrays(prediction):
+    prob, margin = prediction
+    return [prob], [np.nan if margin is None else margin]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clear", action="store_true", help="delete every cached result")
+    args = parser.parse_args()
+
+    cache = DiskCache(artifact_hash())
+    if args.clear:
+        with cache.db:
+            cache.db.execute("BEGIN")
+            cache.db.execute("DELETE FROM results")
+        print(f"Cleared {CACHE_PATH}")
+        return
+    counts = cache.db.execute(
+        "SELECT source_hash, count(results.rowid) FROM artifacts "
+        "LEFT JOIN results ON results.artifact = artifacts.id GROUP BY artifacts.id"
+    ).fetchall()
+    print(json.dumps({
+        "path": str(CACHE_PATH),
+        "current_hash": cache.db.execute("SELECT source_hash FROM artifacts WHERE id = ?",
+                                         (cache.artifact,)).fetchone()[0],
+        "entries": {source_hash: count for source_hash, count in counts},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Per-venue empirical distributions of first-innings totals.
+
+Each city keeps its distinct totals in sorted order with a count for each, so
+memory grows with the number of distinct totals (a few hundred at most), not
+with the number of matches, and adding a match updates one count. For
+lookups all cities are flattened into one sorted key array (city row *
+KEY_STRIDE + total) with running counts, so a batch of (city, score) pairs is
+one np.searchsorted, O(log n) per row.
+
+The percentile of a score is its mid-rank: the share of historical totals
+below it plus half the share equal to it. Unknown cities, and cities with no
+history, get UNKNOWN_PERCENTILE.
+
+    dist = ScoreDistributions.load()
+    dist.percentile("Mumbai", 185)
+    dist.percentiles(["Mumbai", "Chennai"], [185, 160])
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+
+SCORE_DISTRIBUTIONS_PATH = Path(__file__).resolve().parent / "score_distributions.json"
+UNKNOWN_PERCENTILE = 0.5
+# Keys are row * KEY_STRIDE + total; totals are clipped into [0, KEY_STRIDE).
+KEY_STRIDE = 4096.0
+
+
+class ScoreDistributions:
+    """Sorted (total, count) arrays per city with vectorized percentile lookup"""
+
+    def __init__(self, cities=None):
+        # city -> (sorted distinct totals, count of each)
+        self.cities = {}
+        # Lookup rows in insertion order, so a row never changes once handed out.
+        self.rows = {}
+        for city, (values, counts) in (cities or {}).items():
+            self.cities[city] = (np.asarray(values, dtype=float), np.asarray(counts, dtype=np.int64))
+            self.rows[city] = len(self.rows)
+        self._flat = None
+
+    # -----------------------------
+    # UPDATES
+    # -----------------------------
+    def add(self, city, total, count=1):
+        values, counts = self.cities.get(city, (np.empty(0), np.empty(0, dtype=np.int64)))
+        i = np.searchsorted(values, total)
+        if i < len(values) and values[i] == total:
+            counts = counts.copy()
+            counts[i] += count
+        else:
+            values, counts = np.insert(values, i, total), np.insert(counts, i, count)
+        self.cities[city] = (values, counts)
+        self.rows.setdefault(city, len(self.rows))
+        self._flat = None
+
+    def add_many(self, cities, totals):
+        for city, total in zip(cities, totals):
+            self.add(city, float(total))
+
+    def merge(self, other):
+        for city, (values, counts) in other.cities.items():
+            for value, count in zip(values, counts):
+                self.add(city, value, int(count))
+
+    # -----------------------------
+    # LOOKUP
+    # -----------------------------
+    def _flatten(self):
+        """(keys, running counts, per-row start offsets, per-row totals) over every city"""
+        if self._flat is None:
+            parts = [self.cities[city] for city in self.rows]
+            keys = np.concatenate([i * KEY_STRIDE + values for i, (values, _) in enumerate(parts)] or [np.empty(0)])
+            counts = np.concatenate([counts for _, counts in parts] or [np.empty(0, dtype=np.int64)])
+            cum = np.zeros(len(counts) + 1, dtype=np.int64)
+            np.cumsum(counts, out=cum[1:])
+            starts = np.cumsum([0] + [len(values) for values, _ in parts])
+            n = np.array([counts.sum() for _, counts in parts] + [0], dtype=np.int64)
+            self._flat = keys, cum, starts, n
+        return self._flat
+
+    def row(self, city):
+        """Lookup row of a city, or -1 if it has no history"""
+        return self.rows.get(city, -1)
+
+    def percentiles_at(self, rows, scores):
+        """Vectorized mid-rank percentiles for lookup rows (see row) and scores"""
+        keys, cum, starts, n = self._flatten()
+        rows = np.asarray(rows, dtype=np.intp)
+        scores = np.clip(np.asarray(scores, dtype=float), 0, KEY_STRIDE - 1)
+        known = rows >= 0
+        safe_rows = np.where(known, rows, len(n) - 1)
+        query = safe_rows * KEY_STRIDE + scores
+        left = np.searchsorted(keys, query, side="left")
+        right = np.searchsorted(keys, query, side="right")
+        below = cum[left] - cum[starts[safe_rows]]
+        equal = cum[right] - cum[left]
+        totals = n[safe_rows]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            pct = (below + 0.5 * equal) / totals
+        return np.where(known & (totals > 0), pct, UNKNOWN_PERCENTILE)
+
+    def percentiles(self, cities, scores):
+        rows = np.array([self.rows.get(city, -1) for city in cities], dtype=np.intp)
+        return self.percentiles_at(rows, scores)
+
+    def percentile(self, city, score):
+        row = self.rows.get(city, -1)
+        keys, cum, starts, n = self._flatten()
+        if row < 0 or not n[row]:
+            return UNKNOWN_PERCENTILE
+        query = row * KEY_STRIDE + min(max(float(score), 0.0), KEY_STRIDE - 1)
+        left, right = keys.searchsorted(query, side="left"), keys.searchsorted(query, side="right")
+        return float((cum[left] - cum[starts[row]] + 0.5 * (cum[right] - cum[left])) / n[row])
+
+    # -----------------------------
+    # STORAGE
+    # -----------------------------
+    def to_json(self):
+        return {city: {"totals": values.tolist(), "counts": counts.tolist()}
+                for city, (values, counts) in sorted(self.cities.items())}
+
+    @classmethod
+    def from_json(cls, data):
+        return cls({city: (entry["totals"], entry["counts"]) for city, entry in data.items()})
+
+    def save(self, path=SCORE_DISTRIBUTIONS_PATH):
+        Path(path).write_text(json.dumps(self.to_json()))
+
+    @classmethod
+    def load(cls, path=SCORE_DISTRIBUTIONS_PATH):
+        """The saved distributions, or empty ones (every lookup UNKNOWN_PERCENTILE) if there is no file"""
+        try:
+            return cls.from_json(json.loads(Path(path).read_text()))
+        except FileNotFoundError:
+            return cls()
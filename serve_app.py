@@ -0,0 +1,33 @@
+"""app2.py as an ASGI app whose static assets are served with cache headers.
+
+Streamlit's own app/static route sends neither Cache-Control nor 304s. This
+mounts a Starlette StaticFiles on the same path in front of it: the files in
+static/ carry a content hash in their name (see assets.py), so they are marked
+immutable for a year, and a revalidation with the ETag is answered with 304.
+
+    streamlit run serve_app.py
+    uvicorn serve_app:app --port 8501
+"""
+import streamlit as st
+from starlette.routing import Mount
+from starlette.staticfiles import StaticFiles
+
+from assets import STATIC_DIR, STATIC_URL
+
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles for content-hashed names; the manifest is always revalidated"""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if not str(full_path).endswith(".json"):
+            response.headers["Cache-Control"] = CACHE_CONTROL
+        return response
+
+
+app = st.App(
+    "app2.py",
+    routes=[Mount(f"/{STATIC_URL}", ImmutableStaticFiles(directory=STATIC_DIR, check_dir=False))],
+)
@@ -0,0 +1,266 @@
+"""Monte Carlo second-innings simulation for full outcome distributions.
+
+Every trajectory is a ball-by-ball chase in which each ball is a wicket or
+0/1/2/3/4/6 runs. Venue parameters come from city_stats: the scoring rate is
+set so the mean total matches avg_second_score, and each simulated innings
+gets a form multiplier whose spread puts highest_chase about HIGHEST_CHASE_Z
+standard deviations above that mean.
+
+Innings are simulated without stopping at the target. Runs only go up, so the
+chase of any target t succeeds exactly when that uncapped total reaches t
+before the tenth wicket, and one batch of totals answers every target:
+
+    result = simulate_chase(city_stats["Mumbai"], first_innings_score=185, n=100_000, seed=7)
+    result.chase_win_prob, result.tie_prob, result.score_bands, result.chase_curve(range(150, 231))
+
+Work is split into fixed-size chunks, each seeded from one SeedSequence, so a
+seeded run gives the same numbers whether the chunks run in this process or
+in the process pool used for large requests.
+"""
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property, lru_cache
+from statistics import NormalDist
+
+import numpy as np
+
+BALLS = 120
+WICKETS = 10
+WICKET_PROB = 0.05
+RUN_VALUES = np.array([0, 1, 2, 3, 4, 6])
+BASE_RUN_WEIGHTS = np.array([36, 38, 8, 1, 12, 5], dtype=float)
+FORM_LEVELS = 16
+HIGHEST_CHASE_Z = 2.0
+PERCENTILES = (5, 25, 50, 75, 95)
+
+CHUNK_SIZE = 25_000
+PARALLEL_MIN_SIMS = 200_000
+
+# Per-ball outcome code: runs in the low 10 bits, one WICKET_CODE per wicket.
+# Cumulative int16 sums of the codes carry both running totals in one array;
+# they overflow only past 31 wickets in 120 balls, which has probability
+# below 1e-15 at WICKET_PROB.
+WICKET_CODE = 1024
+RUNS_MASK = WICKET_CODE - 1
+TABLE_SIZE = 1 << 16
+
+
+# =====================================================
+# VENUE PARAMETERS
+# =====================================================
+@lru_cache(maxsize=None)
+def expected_scoring_balls(wicket_prob=WICKET_PROB):
+    """Expected number of non-wicket balls bowled before the tenth wicket"""
+    total = 0.0
+    for ball in range(BALLS):
+        alive = sum(
+            math.comb(ball, k) * wicket_prob ** k * (1 - wicket_prob) ** (ball - k)
+            for k in range(min(ball, WICKETS - 1) + 1)
+        )
+        total += alive * (1 - wicket_prob)
+    return total
+
+
+def tilted_run_probs(mean_runs):
+    """Base run distribution exponentially tilted to the given mean runs per ball"""
+    lo, hi = -10.0, 10.0
+    for _ in range(60):
+        theta = (lo + hi) / 2
+        weights = BASE_RUN_WEIGHTS * np.exp(theta * RUN_VALUES)
+        if weights @ RUN_VALUES / weights.sum() < mean_runs:
+            lo = theta
+        else:
+            hi = theta
+    return weights / weights.sum()
+
+
+def venue_parameters(stats, wicket_prob=WICKET_PROB):
+    """Run probabilities per form level, shape (FORM_LEVELS, 6), for one venue"""
+    mean_total = float(stats["avg_second_score"])
+    scoring_balls = expected_scoring_balls(wicket_prob)
+    mean_runs = mean_total / scoring_balls
+
+    probs = tilted_run_probs(mean_runs)
+    within_var = scoring_balls * (probs @ RUN_VALUES ** 2 - mean_runs ** 2)
+    target_sd = max(float(stats["highest_chase"]) - mean_total, 0) / HIGHEST_CHASE_Z
+    form_sd = math.sqrt(max(target_sd ** 2 - within_var, 0)) / mean_total
+
+    z = np.array([NormalDist().inv_cdf((k + 0.5) / FORM_LEVELS) for k in range(FORM_LEVELS)])
+    form = np.exp(form_sd * z)
+    form /= form.mean()
+    return np.array([tilted_run_probs(mean_runs * f) for f in form])
+
+
+def outcome_tables(run_probs, wicket_prob=WICKET_PROB):
+    """One uint16 -> outcome-code lookup table per form level"""
+    tables = np.empty((len(run_probs), TABLE_SIZE), dtype=np.int16)
+    wicket_slots = round(wicket_prob * TABLE_SIZE)
+    for table, probs in zip(tables, run_probs):
+        table[:wicket_slots] = WICKET_CODE
+        bounds = wicket_slots + np.round(np.cumsum(probs) * (TABLE_SIZE - wicket_slots)).astype(int)
+        starts = np.concatenate([[wicket_slots], bounds[:-1]])
+        for runs, start, end in zip(RUN_VALUES, starts, bounds):
+            table[start:end] = runs
+    return tables
+
+
+# =====================================================
+# SIMULATION
+# =====================================================
+def simulate_chunk(tables, target, n, seed):
+    """Simulate n innings with the given outcome_tables.
+
+    Returns (totals, over_runs, win_wickets, win_balls_left): the uncapped total
+    of each innings; runs after each over capped at target, shape (n, 20); and
+    wickets lost and balls left at the moment the target was reached, -1 where
+    it never was.
+    """
+    rng = np.random.Generator(np.random.SFC64(seed))
+    u = rng.integers(0, TABLE_SIZE, size=(n, BALLS), dtype=np.uint16)
+
+    codes = np.empty((n, BALLS), dtype=np.int16)
+    start = 0
+    for table, count in zip(tables, rng.multinomial(n, [1 / len(tables)] * len(tables))):
+        codes[start:start + count] = table[u[start:start + count]]
+        start += count
+    cum = np.cumsum(codes, axis=1, dtype=np.int16)
+
+    # Balls before the tenth wicket; the wicket ball itself scores nothing.
+    alive_balls = np.full(n, BALLS)
+    all_out = np.flatnonzero(cum[:, -1] >= WICKETS * WICKET_CODE)
+    alive_balls[all_out] = np.count_nonzero(cum[all_out] < WICKETS * WICKET_CODE, axis=1)
+    totals = cum[:, -1] & RUNS_MASK
+    totals[all_out] = cum[all_out, alive_balls[all_out]] & RUNS_MASK
+
+    over_ends = cum[:, 5::6] & RUNS_MASK
+    over_ends = np.where(np.arange(5, BALLS, 6)[None, :] < alive_balls[:, None], over_ends, totals[:, None])
+    over_runs = np.minimum(over_ends, target)
+
+    win_wickets = np.full(n, -1, dtype=np.int8)
+    win_balls_left = np.full(n, -1, dtype=np.int16)
+    won = np.flatnonzero(totals >= target)
+    if len(won):
+        ball = np.count_nonzero((cum[won] & RUNS_MASK) < target, axis=1)
+        win_wickets[won] = cum[won, ball] // WICKET_CODE
+        win_balls_left[won] = BALLS - 1 - ball
+    return totals, over_runs, win_wickets, win_balls_left
+
+
+_pool = None
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _pool
+
+
+def run_chunks(fn, args, n, seed=None, parallel=None, chunk_size=CHUNK_SIZE):
+    """fn(*args, size, seed) for each chunk of n, in chunk order.
+
+    Chunks run in the process pool when parallel is True, or when it is None
+    and n is large and there is more than one CPU. Chunk seeds are spawned
+    from one SeedSequence, so the results do not depend on where they ran.
+    """
+    sizes = [chunk_size] * (n // chunk_size) + ([n % chunk_size] if n % chunk_size else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if parallel is None:
+        parallel = n >= PARALLEL_MIN_SIMS and (os.cpu_count() or 1) > 1
+    if parallel:
+        columns = [[arg] * len(sizes) for arg in args]
+        return list(_get_pool().map(fn, *columns, sizes, seeds))
+    return [fn(*args, size, s) for size, s in zip(sizes, seeds)]
+
+
+def simulate(run_probs, target, n, seed=None, parallel=None):
+    """Run n innings in CHUNK_SIZE chunks"""
+    chunks = run_chunks(simulate_chunk, (outcome_tables(run_probs), target), n, seed, parallel)
+    return tuple(np.concatenate(parts) for parts in zip(*chunks))
+
+
+def int_percentiles(values, percentiles=PERCENTILES):
+    """Percentiles of small non-negative integers from their counts (lower interpolation)"""
+    if len(values) == 0:
+        return [None] * len(percentiles)
+    cdf = np.cumsum(np.bincount(values))
+    ranks = np.ceil(np.array(percentiles) / 100 * len(values)).clip(1, len(values))
+    return np.searchsorted(cdf, ranks).tolist()
+
+
+# =====================================================
+# RESULTS
+# =====================================================
+class SimulationResult:
+    def __init__(self, first_innings_score, totals, over_runs, win_wickets, win_balls_left):
+        self.first_innings_score = first_innings_score
+        self.target = first_innings_score + 1
+        self.totals = totals
+        self.over_runs = over_runs
+        self.win_wickets = win_wickets
+        self.win_balls_left = win_balls_left
+        self.n = len(totals)
+
+    @cached_property
+    def _sorted_totals(self):
+        return np.sort(self.totals)
+
+    @property
+    def chase_win_prob(self):
+        return float(np.count_nonzero(self.totals >= self.target) / self.n)
+
+    @property
+    def tie_prob(self):
+        return float(np.count_nonzero(self.totals == self.first_innings_score) / self.n)
+
+    @property
+    def defend_prob(self):
+        return float(np.count_nonzero(self.totals < self.first_innings_score) / self.n)
+
+    def chase_curve(self, targets):
+        """Chase-success probability for each target"""
+        targets = np.asarray(targets)
+        return 1 - np.searchsorted(self._sorted_totals, targets, side="left") / self.n
+
+    @cached_property
+    def score_bands(self):
+        """Percentiles of the second-innings total as played (stopping at the target)"""
+        return dict(zip(PERCENTILES, int_percentiles(np.minimum(self.totals, self.target))))
+
+    @cached_property
+    def margin_bands(self):
+        """Percentiles of the winning margin, for each way the match can be won"""
+        defended = self.totals < self.first_innings_score
+        chased = self.win_wickets >= 0
+        return {
+            "runs": dict(zip(PERCENTILES, int_percentiles(self.first_innings_score - self.totals[defended]))),
+            "wickets": dict(zip(PERCENTILES, int_percentiles(WICKETS - self.win_wickets[chased]))),
+            "balls": dict(zip(PERCENTILES, int_percentiles(self.win_balls_left[chased]))),
+        }
+
+    @cached_property
+    def over_bands(self):
+        """Percentiles of runs after each over (the chase worm), shape (len(PERCENTILES), 20)"""
+        return np.array([int_percentiles(column) for column in self.over_runs.T]).T
+
+    def summary(self):
+        return {
+            "simulations": self.n,
+            "first_innings_score": self.first_innings_score,
+            "chase_win_prob": self.chase_win_prob,
+            "defend_prob": self.defend_prob,
+            "tie_prob": self.tie_prob,
+            "score_bands": self.score_bands,
+            "margin_bands": self.margin_bands,
+            "over_bands": dict(zip(PERCENTILES, self.over_bands.tolist())),
+        }
+
+
+def simulate_chase(stats, first_innings_score, n=100_000, seed=None, parallel=None):
+    """Simulate n chases of first_innings_score + 1 at a venue described by one city_stats entry"""
+    run_probs = venue_parameters(stats)
+    first_innings_score = int(first_innings_score)
+    return SimulationResult(
+        first_innings_score, *simulate(run_probs, first_innings_score + 1, n, seed, parallel)
+    )
@@ -0,0 +1,32 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+sys.path.insert(0, str(REPO_DIR / "benchmarks"))
+
+
+@pytest.fixture(scope="session")
+def city_stats():
+    from prediction import load_city_stats
+
+    return load_city_stats()
+
+
+@pytest.fixture(scope="session")
+def native_win_model():
+    from native_models import load_win_model
+
+    return load_win_model()
+
+
+@pytest.fixture(scope="session")
+def ipl_data(tmp_path_factory):
+    """Directory with two synthetic seasons of matches.csv and deliveries.csv"""
+    from synthetic_ipl import generate
+
+    path = tmp_path_factory.mktemp("ipl")
+    generate(path, seasons=2)
+    return path
@@ -0,0 +1,22 @@
+"""Margin MAE uses one sign convention, and an empty search split is an error."""
+import numpy as np
+import pytest
+
+from backtest import REPLAY_FIELDS, margin_mae, save_replay, search
+
+
+def test_margin_mae_only_scores_matches_batting_first_won():
+    margins = np.array([20.0, 20.0, np.nan, 10.0])
+    actual = np.array([25.0, -4.0, 30.0, 10.0])
+    won = np.array([1.0, 0.0, 1.0, 1.0])
+    assert margin_mae(margins, actual, won) == (2.5, 2)
+    assert margin_mae(margins, actual, np.zeros(4)) == (None, 0)
+
+
+def test_search_rejects_an_empty_split(tmp_path):
+    rng = np.random.default_rng(0)
+    data = {field: rng.random(8) for field in REPLAY_FIELDS}
+    path = tmp_path / "replay.npz"
+    save_replay(path, data)
+    with pytest.raises(ValueError, match="no matches"):
+        search(path, rows=np.array([], dtype=np.intp), workers=1)
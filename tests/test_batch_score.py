@@ -0,0 +1,36 @@
+"""Rows that cannot be scored get empty outputs instead of stopping the run."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_score import score_file
+
+ROWS = [
+    ("Mumbai", "185", True),
+    ("ipl-mumbai", "170", True),
+    ("Wankhede  Stadium", "160", True),
+    ("Delhi", "185*", False),
+    ("Delhi", "DNB", False),
+    ("Delhi", "", False),
+    ("Delhi", "-5", False),
+    ("Delhi", "1e308", False),
+    ("Nowhere At All", "150", False),
+]
+
+
+@pytest.fixture
+def fixtures(tmp_path):
+    path = tmp_path / "fixtures.csv"
+    pd.DataFrame({"city": [r[0] for r in ROWS], "score": [r[1] for r in ROWS]}).to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet"])
+def test_invalid_rows_get_empty_outputs(fixtures, tmp_path, suffix):
+    output = tmp_path / f"scored{suffix}"
+    # Three-row chunks: the first is all numbers, later ones mix in text.
+    assert score_file(fixtures, output, workers=1, chunksize=3) == len(ROWS)
+    scored = pd.read_parquet(output) if suffix == ".parquet" else pd.read_csv(output)
+    expected = np.array([r[2] for r in ROWS])
+    assert np.array_equal(scored["win_probability"].notna().to_numpy(), expected)
+    assert scored["city_key"].tolist()[:3] == ["Mumbai"] * 3
@@ -0,0 +1,56 @@
+"""Incremental aggregation matches a full rebuild, and TopK matches a full sort."""
+import random
+
+import pandas as pd
+import pytest
+
+from city_stats_pipeline import CityStatsAggregator, TopK
+
+
+def aggregates(aggregator):
+    return (aggregator.city_stats(), aggregator.score_distributions.to_json(), aggregator.toss_index.to_json(),
+            aggregator.seen_matches)
+
+
+@pytest.fixture(scope="module")
+def full(ipl_data):
+    aggregator = CityStatsAggregator()
+    aggregator.ingest(ipl_data / "matches.csv", ipl_data / "deliveries.csv", chunksize=5000)
+    return aggregator
+
+
+def test_incremental_ingest_equals_full_ingest(ipl_data, full, tmp_path):
+    matches = pd.read_csv(ipl_data / "matches.csv")
+    matches.head(len(matches) // 2).to_csv(tmp_path / "first_half.csv", index=False)
+    first = CityStatsAggregator()
+    first.ingest(tmp_path / "first_half.csv", ipl_data / "deliveries.csv", chunksize=5000)
+    first.save_state(tmp_path / "state.json")
+
+    restored = CityStatsAggregator.load_state(tmp_path / "state.json")
+    restored.ingest(ipl_data / "matches.csv", ipl_data / "deliveries.csv", chunksize=7000)
+    assert aggregates(restored) == aggregates(full)
+
+
+def test_add_match_skips_seen_matches(ipl_data, full, tmp_path):
+    matches = pd.read_csv(ipl_data / "matches.csv")
+    deliveries = pd.read_csv(ipl_data / "deliveries.csv")
+    matches.head(len(matches) - 1).to_csv(tmp_path / "all_but_last.csv", index=False)
+    aggregator = CityStatsAggregator()
+    aggregator.ingest(tmp_path / "all_but_last.csv", ipl_data / "deliveries.csv")
+
+    match = matches.iloc[-1].to_dict()
+    balls = deliveries[deliveries["match_id"] == match["id"]].to_dict("records")
+    aggregator.add_match(match, balls)
+    aggregator.add_match(match, balls)
+    assert aggregates(aggregator) == aggregates(full)
+
+
+def test_topk_matches_full_sort_with_ties():
+    rng = random.Random(0)
+    for _ in range(500):
+        top, totals = TopK(3), {}
+        for _ in range(30):
+            player = rng.choice("abcdefgh")
+            totals[player] = totals.get(player, 0) + rng.randint(0, 2)
+            top.offer(player, totals[player])
+        assert top.ranked() == sorted(totals.items(), key=lambda item: (-item[1], item[0]))[:3]
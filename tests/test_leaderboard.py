@@ -0,0 +1,70 @@
+"""Leaderboard.top agrees with a brute-force sort, before and after updates."""
+import random
+
+import pytest
+
+from leaderboard import FIELDS, STATS, Leaderboard
+
+PLAYERS = [f"P{i:02d}" for i in range(40)]
+CITIES = ["Mumbai", "Delhi", "Chennai"]
+TEAMS = ["A", "B", "C"]
+
+
+def random_records(rng, n):
+    records = []
+    for _ in range(n):
+        team, opponent = rng.sample(TEAMS, 2)
+        # Small totals, so players tie often.
+        totals = {field: rng.randint(0, 4) * (10 if "balls" in field else 1) for field in FIELDS}
+        records.append((rng.choice(PLAYERS), rng.choice(CITIES), rng.choice([2023, 2024]), team, opponent, totals))
+    return records
+
+
+def brute_force(records, stat, k, min_balls, **filters):
+    dims = ("city", "season", "team", "opponent")
+    sums = {}
+    for player, *key, totals in records:
+        if all(filters.get(dim) in (None, value) for dim, value in zip(dims, key)):
+            player_sums = sums.setdefault(player, dict.fromkeys(FIELDS, 0))
+            for field, value in totals.items():
+                player_sums[field] += value
+    spec = STATS[stat]
+    rows = []
+    for player, totals in sums.items():
+        if spec.balls is None:
+            if totals[spec.numerator] > 0:
+                rows.append((player, totals[spec.numerator]))
+        elif totals[spec.balls] >= max(min_balls, 1):
+            rows.append((player, spec.scale * totals[spec.numerator] / totals[spec.balls]))
+    sign = -1 if spec.higher_is_better else 1
+    return sorted(rows, key=lambda row: (sign * row[1], row[0]))[:k]
+
+
+QUERIES = [{}, {"city": "Mumbai"}, {"season": 2024, "team": "A"}, {"city": "Delhi", "opponent": "C"},
+           {"city": "Nowhere"}]
+
+
+@pytest.mark.parametrize("stat", list(STATS))
+def test_top_matches_brute_force_after_updates(stat):
+    rng = random.Random(stat)
+    board, records = Leaderboard(), []
+    for _ in range(3):
+        batch = random_records(rng, 300)
+        board.add_many(batch)
+        records += batch
+        for filters in QUERIES:
+            for k in (1, 5, 50):
+                top = board.top(stat, k, min_balls=30, **filters)
+                expected = brute_force(records, stat, k, 30, **filters)
+                assert [p for p, _ in top] == [p for p, _ in expected]
+                assert [v for _, v in top] == pytest.approx([v for _, v in expected])
+
+
+def test_saved_table_answers_the_same(tmp_path):
+    board = Leaderboard()
+    board.add_many(random_records(random.Random(1), 500))
+    board.save(tmp_path / "leaderboard.npz")
+    loaded = Leaderboard.load(tmp_path / "leaderboard.npz")
+    for stat in STATS:
+        for filters in QUERIES:
+            assert loaded.top(stat, 10, **filters) == board.top(stat, 10, **filters)
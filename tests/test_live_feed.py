@@ -0,0 +1,61 @@
+"""Feed events are applied in order, within a batch and when a file is replayed."""
+import asyncio
+import json
+
+import pytest
+
+from live_feed import LiveFeedProcessor, LiveMatchBoard, read_feed_file
+
+
+@pytest.fixture
+def processor(native_win_model, city_stats):
+    return LiveFeedProcessor(LiveMatchBoard(native_win_model, city_stats, capacity=4))
+
+
+def start(match_id, score=180):
+    return {"type": "start", "match_id": match_id, "city": "Mumbai", "first_innings_score": score}
+
+
+def ball(match_id, balls_remaining, runs=1):
+    return {"type": "ball", "match_id": match_id, "runs": runs, "balls_remaining": balls_remaining}
+
+
+def end(match_id):
+    return {"type": "end", "match_id": match_id}
+
+
+def test_history_dropped_on_end(processor):
+    processor.process([start("m1"), ball("m1", 119)])
+    assert len(processor.snapshot("m1")) == 2
+    processor.process([end("m1")])
+    assert processor.history == {}
+    assert "m1" not in processor.board.slots
+
+
+def test_restart_after_end_in_one_batch(processor):
+    processor.process([start("m1"), ball("m1", 119, runs=6)])
+    processor.process([end("m1"), start("m1", score=150), ball("m1", 119, runs=2)])
+    row = processor.board.slots["m1"]
+    assert processor.board.runs[row] == 2
+    assert processor.board.first_score[row] == 150
+    assert [bowled for bowled, _ in processor.snapshot("m1")] == [0, 1]
+
+
+def test_ball_after_end_in_one_batch_is_dropped(processor):
+    processor.process([start("m1"), ball("m1", 119), end("m1"), ball("m1", 118)])
+    assert processor.deliveries == 1
+    assert processor.dropped == 1
+    assert "m1" not in processor.board.slots
+
+
+def test_replayed_file_shows_each_delivery(processor, tmp_path):
+    events = [start("m1"), ball("m1", 119), ball("m1", 118, runs=4), ball("m1", 117), end("m1")]
+    path = tmp_path / "feed.jsonl"
+    path.write_text("".join(json.dumps(event) + "\n" for event in events))
+    curves = []
+    processor.subscribe(lambda match_ids, probs: curves.append(processor.snapshot("m1")) if match_ids else None)
+
+    asyncio.run(processor.run(read_feed_file(path)))
+    assert [len(curve) for curve in curves] == [1, 2, 3, 4]
+    assert processor.deliveries == 3
+    assert processor.history == {}
@@ -0,0 +1,36 @@
+"""The native models reproduce the pickled models' raw outputs.
+
+Compares predict_proba and predict before any blending or rounding, on every
+city x score the app accepts and on perturbed rows with missing values.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+pytest.importorskip("xgboost")
+
+from native_models import PARITY_ULPS, load_margin_model, load_win_model, parity_rows, raw_parity  # noqa: E402
+from prediction import load_artifacts  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def models():
+    win_model, margin_model, city_stats = load_artifacts()
+    return win_model, margin_model, load_win_model(), load_margin_model(), city_stats
+
+
+@pytest.fixture(scope="module")
+def rows(models):
+    return parity_rows(models[0].feature_names_in_, models[-1])
+
+
+def test_random_rows_have_missing_values(rows):
+    assert np.isnan(rows["random"]).any()
+    assert not np.isnan(rows["grid"]).any()
+
+
+@pytest.mark.parametrize("label", ["grid", "random"])
+@pytest.mark.parametrize("output", ["win_prob", "margin"])
+def test_raw_outputs_match_pickles(models, rows, label, output):
+    diff, tolerance = raw_parity(*models[:4], rows[label])[output]
+    assert diff <= tolerance, f"{output} on {label} rows differs by {diff:.3g} (> {PARITY_ULPS} ULPs = {tolerance:.3g})"
@@ -0,0 +1,37 @@
+"""score_percentile follows score_distributions.json when it is rebuilt."""
+import os
+
+import pytest
+
+import prediction
+from score_distributions import UNKNOWN_PERCENTILE, ScoreDistributions
+
+
+@pytest.fixture
+def distributions_path(tmp_path, monkeypatch):
+    path = tmp_path / "score_distributions.json"
+    monkeypatch.setattr(prediction, "SCORE_DISTRIBUTIONS_PATH", path)
+    monkeypatch.setattr(prediction, "_score_distributions", (None, None))
+    return path
+
+
+def write(path, totals, mtime):
+    distributions = ScoreDistributions()
+    distributions.add_many(["Mumbai"] * len(totals), totals)
+    distributions.save(path)
+    os.utime(path, ns=(mtime, mtime))
+
+
+def percentile(native_win_model, city_stats):
+    encoder = prediction.feature_encoder(native_win_model.feature_names_in_, city_stats)
+    X, _ = encoder.encode(["Mumbai"], [180.0])
+    return X[0, encoder.columns["score_percentile"]]
+
+
+def test_rebuilt_distributions_are_reloaded(distributions_path, native_win_model, city_stats):
+    assert percentile(native_win_model, city_stats) == UNKNOWN_PERCENTILE
+    write(distributions_path, [150, 160, 170], mtime=1_000_000_000)
+    assert percentile(native_win_model, city_stats) == 1.0
+    write(distributions_path, [190, 200, 210], mtime=2_000_000_000)
+    assert percentile(native_win_model, city_stats) == 0.0
+    assert prediction.load_score_distributions() is prediction.load_score_distributions()
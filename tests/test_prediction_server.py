@@ -0,0 +1,49 @@
+"""Request validation: bad scores are a 400 before they reach the models."""
+import asyncio
+import json
+from functools import partial
+
+import pytest
+
+from prediction import predict_matches
+from prediction_server import MicroBatcher, PredictionServer, RequestError
+
+
+@pytest.fixture(scope="module")
+def route(native_win_model, city_stats):
+    from native_models import load_margin_model
+
+    predict_fn = partial(predict_matches, native_win_model, load_margin_model(), city_stats)
+
+    def route(path, body):
+        async def run():
+            batcher = MicroBatcher(predict_fn, window=0)
+            try:
+                return await PredictionServer(batcher, city_stats)._route("POST", path, body.encode())
+            finally:
+                batcher.close()
+        return asyncio.run(run())
+
+    return route
+
+
+def test_valid_prediction(route):
+    status, payload = route("/predict", json.dumps({"matches": [{"city": "Bangalore", "score": 185},
+                                                                {"city": "Mumbai", "score": 0}]}))
+    assert status == 200
+    assert [p["city"] for p in payload["predictions"]] == ["Bengaluru", "Mumbai"]
+
+
+# json.loads accepts NaN and Infinity, so they arrive as floats.
+@pytest.mark.parametrize("score", ["NaN", "Infinity", "-Infinity", "1e308", "-1", "400.5", '"185"', "true", "null"])
+@pytest.mark.parametrize("path", ["/predict", "/simulate"])
+def test_bad_scores_are_rejected(route, path, score):
+    with pytest.raises(RequestError) as error:
+        route(path, f'{{"city": "Mumbai", "score": {score}, "simulations": 10}}')
+    assert error.value.status == 400
+
+
+def test_unknown_city_is_rejected(route):
+    with pytest.raises(RequestError) as error:
+        route("/predict", '{"city": "Atlantis", "score": 150}')
+    assert error.value.status == 400
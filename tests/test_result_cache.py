@@ -0,0 +1,66 @@
+"""Results are served from either level and evicted oldest first."""
+import numpy as np
+import pytest
+
+from result_cache import DiskCache, LRUCache, ResultCache
+
+
+class CountingPredictor:
+    def __init__(self):
+        self.rows = []
+
+    def __call__(self, cities, scores):
+        self.rows += list(zip(cities, scores))
+        return np.asarray(scores) / 1000, np.where(np.asarray(scores) > 150, np.asarray(scores) - 150, np.nan)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResultCache("hash-a", path=tmp_path / "cache.sqlite", lru_size=2)
+    yield cache
+    cache.close()
+
+
+def test_repeated_rows_are_computed_once(cache):
+    predict = CountingPredictor()
+    first = cache.predict_matches(predict, ["Mumbai", "Delhi", "Mumbai"], [180, 140, 180])
+    second = cache.predict_matches(predict, ["Delhi", "Mumbai"], [140, 180])
+    assert predict.rows == [("Mumbai", 180.0), ("Delhi", 140.0)]
+    np.testing.assert_array_equal(first[0], [0.18, 0.14, 0.18])
+    np.testing.assert_array_equal(second[1], [np.nan, 30.0])
+    assert cache.stats()["lru"]["hits"] == 2
+
+
+def test_disk_level_survives_a_new_process_but_not_a_new_hash(cache, tmp_path):
+    cache.predict_matches(CountingPredictor(), ["Mumbai"], [180])
+    restarted = ResultCache("hash-a", path=tmp_path / "cache.sqlite")
+    retrained = ResultCache("hash-b", path=tmp_path / "cache.sqlite")
+    try:
+        predict = CountingPredictor()
+        restarted.predict_matches(predict, ["Mumbai"], [180])
+        assert predict.rows == [] and restarted.stats()["disk"]["hits"] == 1
+        retrained.predict_matches(predict, ["Mumbai"], [180])
+        assert predict.rows == [("Mumbai", 180.0)]
+    finally:
+        restarted.close()
+        retrained.close()
+
+
+def test_lru_evicts_least_recently_used():
+    lru = LRUCache(max_size=2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    lru.get("a")
+    lru.put("c", 3)
+    assert list(lru.entries) == ["a", "c"] and lru.evictions == 1
+
+
+def test_disk_cache_evicts_oldest_rows(tmp_path):
+    disk = DiskCache("hash-a", path=tmp_path / "cache.sqlite", max_entries=3)
+    try:
+        disk.put_many([(("Mumbai", float(score)), (0.5, np.nan)) for score in range(5)])
+        assert disk.size() == 3 and disk.evictions == 2
+        assert sorted(disk.get_many([("Mumbai", float(score)) for score in range(5)])) == [
+            ("Mumbai", 2.0), ("Mumbai", 3.0), ("Mumbai", 4.0)]
+    finally:
+        disk.close()
@@ -0,0 +1,28 @@
+"""A seeded simulation gives the same numbers wherever its chunks run."""
+import numpy as np
+
+from simulation import CHUNK_SIZE, simulate_chase
+
+N = 2 * CHUNK_SIZE + 1000
+
+
+def test_same_seed_same_result(city_stats):
+    first = simulate_chase(city_stats["Mumbai"], 185, N, seed=7, parallel=False)
+    again = simulate_chase(city_stats["Mumbai"], 185, N, seed=7, parallel=False)
+    other = simulate_chase(city_stats["Mumbai"], 185, N, seed=8, parallel=False)
+    assert first.summary() == again.summary()
+    assert np.array_equal(first.totals, again.totals)
+    assert not np.array_equal(first.totals, other.totals)
+
+
+def test_process_pool_matches_in_process(city_stats):
+    local = simulate_chase(city_stats["Delhi"], 170, N, seed=3, parallel=False)
+    pooled = simulate_chase(city_stats["Delhi"], 170, N, seed=3, parallel=True)
+    assert np.array_equal(local.totals, pooled.totals)
+    assert np.array_equal(local.over_runs, pooled.over_runs)
+
+
+def test_outcomes_add_up(city_stats):
+    result = simulate_chase(city_stats["Chennai"], 160, 10_000, seed=1, parallel=False)
+    assert result.n == 10_000
+    assert abs(result.chase_win_prob + result.defend_prob + result.tie_prob - 1) < 1e-12
@@ -0,0 +1,61 @@
+"""Wilson intervals, and toss summaries that stay correct as matches are added."""
+import pytest
+
+from toss_analytics import TossIndex, wilson_interval
+
+
+@pytest.mark.parametrize("successes, n, expected", [
+    (5, 10, (0.2366, 0.7634)),
+    (0, 10, (0.0, 0.2775)),
+    (10, 10, (0.7225, 1.0)),
+    (81, 263, (0.2553, 0.3662)),
+    (0, 0, (0.0, 1.0)),
+])
+def test_wilson_interval(successes, n, expected):
+    assert wilson_interval(successes, n) == pytest.approx(expected, abs=1e-4)
+
+
+def add(index, city, season, winner="A", day_night="night"):
+    index.add_match(city, season, "A", "B", "A", "bat", winner, day_night)
+
+
+@pytest.fixture
+def index():
+    index = TossIndex()
+    for season in (2020, 2021, 2024):
+        add(index, "Mumbai", season)
+    add(index, "Mumbai", 2024, winner="B")
+    add(index, "Delhi", 2024, winner="B")
+    return index
+
+
+def test_summary_counts(index):
+    mumbai = index.summary("Mumbai")
+    assert mumbai["matches"] == 4
+    assert (mumbai["bat_first"]["wins"], mumbai["chase"]["wins"]) == (3, 1)
+    assert mumbai["recommendation"] == "BAT FIRST" and not mumbai["significant"]
+    assert index.summary(team="B")["chase"] == index.summary()["chase"]
+    assert index.summary("Mumbai", seasons=(2021, None))["matches"] == 3
+
+
+def test_memo_forgets_only_matching_queries(index):
+    mumbai, early, delhi = index.summary("Mumbai"), index.summary("Mumbai", (2020, 2021)), index.summary("Delhi")
+    assert index.summary("Mumbai") is mumbai
+
+    add(index, "Mumbai", 2025, winner="B")
+    assert index.summary("Mumbai", (2020, 2021)) is early
+    assert index.summary("Delhi") is delhi
+    updated = index.summary("Mumbai")
+    assert updated is not mumbai
+    assert updated["matches"] == 5 and updated["chase"]["wins"] == 2
+
+    add(index, "Delhi", 2025, day_night="day")
+    assert index.summary("Delhi")["matches"] == 2
+    assert index.summary("Delhi", day_night="night")["matches"] == 1
+
+
+def test_saved_index_answers_the_same(index, tmp_path):
+    index.save(tmp_path / "toss.json")
+    loaded = TossIndex.load(tmp_path / "toss.json")
+    for query in [{}, {"city": "Mumbai"}, {"seasons": (2021, 2024)}, {"team": "A"}]:
+        assert loaded.summary(**query) == index.summary(**query)
@@ -0,0 +1,50 @@
+"""Venue names, aliases, IDs and misspellings resolve to city_stats keys."""
+import pytest
+
+from venue_index import Venue, VenueIndex, normalize, venue_index
+
+
+@pytest.fixture(scope="module")
+def venues(city_stats):
+    return venue_index(city_stats)
+
+
+@pytest.mark.parametrize("name, key", [
+    ("Mumbai", "Mumbai"),
+    ("ipl-mumbai", "Mumbai"),
+    ("Bangalore", "Bengaluru"),
+    ("  bangalore!", "Bengaluru"),
+    ("Wankhede", "Mumbai"),
+    ("Chinaswamy", "Bengaluru"),
+    ("Mumbay", "Mumbai"),
+    ("Kolkatta", "Kolkata"),
+])
+def test_names_resolve(venues, name, key):
+    assert venues.stats_key(name) == key
+
+
+@pytest.mark.parametrize("name", ["xyzzy", "wankede", "delhi capitals stadium"])
+def test_weak_or_ambiguous_names_do_not_resolve(venues, name):
+    with pytest.raises(KeyError):
+        venues.stats_key(name)
+
+
+def test_suggest_drops_weak_matches(venues):
+    assert venues.suggest("Bangalore") == ["Bengaluru"]
+    assert venues.suggest("wankede") == ["Mumbai"]
+    assert venues.suggest("xyzzy") == []
+
+
+def test_fuzzy_match_must_beat_the_runner_up():
+    index = VenueIndex([Venue("a", "Eden Park", "A"), Venue("b", "Eden Parks", "B"), Venue("c", "Lords", "C")])
+    assert index.resolve("Lordz").id == "c"
+    assert index.resolve("Eden Prk").id == "a"
+    # 0.74 against 0.70: too close to call.
+    assert index.resolve("Eden Pak") is None
+    assert index.resolve("eden park").id == "a"
+
+
+def test_filters(venues):
+    assert all("IPL" in venue.leagues for venue in venues.filter(league="IPL"))
+    assert venues.filter(league="No Such League") == []
+    assert normalize("São  Paulo-Stadium") == "sao paulo stadium"
@@ -0,0 +1,238 @@
+"""Toss and batting-order win rates computed from match records.
+
+Every finished match adds to counters keyed by (city, season, day/night,
+team): one row for the match as a whole (team ALL_TEAMS) and one row for
+each side from its own point of view. A query sums the counter rows that
+pass its filters (city, a season window, day or night, a team) and returns
+win rates with sample sizes and Wilson score intervals:
+
+    toss = TossIndex.load()
+    toss.summary("Mumbai", seasons=(2021, 2025), day_night="night")
+    toss.summary("Chennai", team="Chennai Super Kings")
+
+Counters live in column-major numpy arrays, one column per (city, season,
+day/night, team) row, and only ever increase: adding a match adds to three
+columns in place, and a query is one mask and one sum.
+Results are memoized per filter combination; adding a match forgets only the
+combinations that match it. city_stats_pipeline.py keeps the index up to
+date and saves it to TOSS_INDEX_PATH.
+"""
+import json
+import math
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+TOSS_INDEX_PATH = Path(__file__).resolve().parent / "build" / "toss_index.json"
+ALL_TEAMS = ""
+UNKNOWN_SESSION = "unknown"
+# 95% two-sided normal quantile.
+Z_95 = 1.959964
+MEMO_SIZE = 512
+
+# bat_first and chases count decided matches only; ties and no-results are left out.
+COUNTERS = ("matches", "bat_first", "bat_first_wins", "chases", "chase_wins",
+            "toss_won", "toss_bat", "toss_bat_wins", "toss_field_wins")
+COUNTER_INDEX = {name: i for i, name in enumerate(COUNTERS)}
+
+
+def wilson_interval(successes, n, z=Z_95):
+    """Wilson score interval for a binomial rate; (0, 1) with no trials"""
+    if n <= 0:
+        return 0.0, 1.0
+    p = successes / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+def rate(successes, n):
+    low, high = wilson_interval(successes, n)
+    return {"wins": int(successes), "matches": int(n), "rate": successes / n if n else None, "ci95": [low, high]}
+
+
+def season_year(season):
+    """First year of a season such as 2024 or "2007/08"; None if there is none"""
+    text = str(season)[:4]
+    return int(text) if text.isdigit() else None
+
+
+# Key positions with value codes; the season is kept as its first year instead.
+CODED = {"city": 0, "day_night": 1, "team": 2}
+
+
+def _grow(array, used, capacity):
+    grown = np.zeros((array.shape[0], capacity), dtype=array.dtype)
+    grown[:, :used] = array[:, :used]
+    return grown
+
+
+class TossIndex:
+    def __init__(self):
+        # (city, season, day_night, team) -> column of keys, years and counts
+        self.rows = {}
+        self.codes = {dim: {} for dim in CODED}
+        self.keys = np.empty((len(CODED), 0), dtype=np.intp)
+        self.years = np.empty(0)
+        self.counts = np.empty((len(COUNTERS), 0), dtype=np.int64)
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.rows)
+
+    # -----------------------------
+    # UPDATES
+    # -----------------------------
+    def _row(self, key):
+        row = self.rows.get(key)
+        if row is not None:
+            return row
+        row = self.rows[key] = len(self.rows)
+        if row == len(self.years):
+            capacity = max(256, 2 * row)
+            self.keys = _grow(self.keys, row, capacity)
+            self.counts = _grow(self.counts, row, capacity)
+            self.years = np.resize(self.years, capacity)
+        city, season, day_night, team = key
+        for dim, value in zip(CODED, (city, day_night, team)):
+            codes = self.codes[dim]
+            self.keys[CODED[dim], row] = codes.setdefault(value, len(codes))
+        year = season_year(season)
+        self.years[row] = np.nan if year is None else year
+        return row
+
+    def add_match(self, city, season, batting_first, chasing, toss_winner, toss_decision, winner,
+                  day_night=None):
+        """Count one finished match; winner is None for a tie or no result"""
+        season = getattr(season, "item", lambda: season)()
+        day_night = day_night or UNKNOWN_SESSION
+        sides = [team for team in (batting_first, chasing) if team]
+        decided = winner is not None and batting_first is not None
+
+        for team in (ALL_TEAMS, *sides):
+            c = [0] * len(COUNTERS)
+            c[COUNTER_INDEX["matches"]] = 1
+            bats_first = team in (ALL_TEAMS, batting_first)
+            chases = team in (ALL_TEAMS, chasing)
+            if decided and bats_first:
+                c[COUNTER_INDEX["bat_first"]] += 1
+                c[COUNTER_INDEX["bat_first_wins"]] += winner == batting_first
+            if decided and chases:
+                c[COUNTER_INDEX["chases"]] += 1
+                c[COUNTER_INDEX["chase_wins"]] += winner == chasing
+            if team in (ALL_TEAMS, toss_winner):
+                c[COUNTER_INDEX["toss_won"]] += 1
+                bat = toss_decision == "bat"
+                c[COUNTER_INDEX["toss_bat"]] += bat
+                if winner is not None and winner == toss_winner:
+                    c[COUNTER_INDEX["toss_bat_wins" if bat else "toss_field_wins"]] += 1
+            row = self._row((city, season, day_night, team))
+            self.counts[:, row] += c
+        self._forget(city, season_year(season), day_night, sides)
+
+    def _forget(self, city, year, day_night, teams):
+        with self._lock:
+            for query in list(self._memo):
+                q_city, first, last, q_day_night, q_team = query
+                if ((q_city is None or q_city == city)
+                        and (year is None or (first is None or year >= first) and (last is None or year <= last))
+                        and (q_day_night is None or q_day_night == day_night)
+                        and (q_team is None or q_team in teams)):
+                    del self._memo[query]
+
+    # -----------------------------
+    # QUERIES
+    # -----------------------------
+    def counters(self, city=None, seasons=None, day_night=None, team=None):
+        """{counter: total} over the rows passing the filters; seasons is (first, last), either end open"""
+        first, last = seasons or (None, None)
+        n = len(self.rows)
+        team = ALL_TEAMS if team is None else team
+        mask = self.keys[CODED["team"], :n] == self.codes["team"].get(team, -1)
+        for dim, value in (("city", city), ("day_night", day_night)):
+            if value is not None:
+                mask &= self.keys[CODED[dim], :n] == self.codes[dim].get(value, -1)
+        if first is not None:
+            mask &= self.years[:n] >= first
+        if last is not None:
+            mask &= self.years[:n] <= last
+        return dict(zip(COUNTERS, self.counts[:, :n][:, mask].sum(axis=1).tolist()))
+
+    def summary(self, city=None, seasons=None, day_night=None, team=None):
+        """Bat-first, chase and toss-decision win rates with 95% intervals, and a recommendation.
+
+        The recommendation is the batting order with the higher win rate
+        ("EITHER" on a tie); "significant" says whether the two intervals
+        are disjoint.
+        """
+        first, last = seasons or (None, None)
+        query = (city, first, last, day_night, team)
+        with self._lock:
+            cached = self._memo.get(query)
+            if cached is not None:
+                self._memo.move_to_end(query)
+                return cached
+
+        c = self.counters(city, (first, last), day_night, team)
+        bat_first = rate(c["bat_first_wins"], c["bat_first"])
+        chase = rate(c["chase_wins"], c["chases"])
+        result = {
+            "matches": c["matches"],
+            "bat_first": bat_first,
+            "chase": chase,
+            "toss_bat": rate(c["toss_bat_wins"], c["toss_bat"]),
+            "toss_field": rate(c["toss_field_wins"], c["toss_won"] - c["toss_bat"]),
+            "recommendation": None,
+            "significant": False,
+        }
+        if bat_first["matches"] and chase["matches"] and bat_first["rate"] == chase["rate"]:
+            result["recommendation"] = "EITHER"
+        elif bat_first["matches"] and chase["matches"]:
+            bat_better = bat_first["rate"] > chase["rate"]
+            result["recommendation"] = "BAT FIRST" if bat_better else "BOWL FIRST"
+            better, worse = (bat_first, chase) if bat_better else (chase, bat_first)
+            result["significant"] = better["ci95"][0] > worse["ci95"][1]
+
+        with self._lock:
+            self._memo[query] = result
+            if len(self._memo) > MEMO_SIZE:
+                self._memo.popitem(last=False)
+        return result
+
+    def values(self, dimension):
+        """Distinct cities, seasons, day_night sessions or teams seen so far"""
+        position = ("city", "season", "day_night", "team").index(dimension)
+        found = {key[position] for key in self.rows}
+        found.discard(ALL_TEAMS)
+        return sorted(found, key=str)
+
+    # -----------------------------
+    # STORAGE
+    # -----------------------------
+    def to_json(self):
+        return [[*key, self.counts[:, row].tolist()] for key, row in self.rows.items()]
+
+    @classmethod
+    def from_json(cls, rows):
+        index = cls()
+        for *key, counts in rows:
+            row = index._row(tuple(key))
+            index.counts[:, row] = counts
+        return index
+
+    def save(self, path=TOSS_INDEX_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_json()))
+
+    @classmethod
+    def load(cls, path=TOSS_INDEX_PATH):
+        """The saved index, or an empty one if there is no file"""
+        try:
+            return cls.from_json(json.loads(Path(path).read_text()))
+        except FileNotFoundError:
+            return cls()
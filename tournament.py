@@ -0,0 +1,188 @@
+"""League-stage tournament simulator: playoff and top-2 odds from the remaining fixtures.
+
+Each remaining fixture gets a win probability from the prediction models. All
+fixtures are scored in one predict_matches call. The season is then
+simulated millions of times: one uniform draw per fixture per season, points
+added by a matrix product, and teams ranked on points. Ties on points are
+broken by the current net run rate when the points table has one, otherwise
+at random.
+
+Fixtures (JSON list or CSV) need team1, team2 and city. Optional fields:
+
+- batting_first: the side batting first. The models have no team features,
+  so they only separate two sides once the batting order is known. Without
+  it the fixture is a 50/50.
+- score: projected first-innings score (default: the venue's avg_score)
+- win_prob: probability that team1 wins, used as given
+
+The points table is JSON ({team: points} or {team: {"points": p, "nrr": r}})
+or CSV with team, points and optional nrr columns.
+
+    python tournament.py --fixtures fixtures.json --table table.json --seasons 1000000 --seed 1
+"""
+import argparse
+import csv
+import json
+from pathlib import Path
+
+import numpy as np
+
+from simulation import run_chunks
+
+POINTS_PER_WIN = 2
+PLAYOFF_SPOTS = 4
+SEASON_CHUNK = 50_000
+
+
+# =====================================================
+# INPUT
+# =====================================================
+def read_records(path):
+    path = Path(path)
+    if path.suffix == ".csv":
+        with open(path, newline="") as f:
+            return list(csv.DictReader(f))
+    return json.loads(path.read_text())
+
+
+def parse_points_table(table):
+    """{team: (points, nrr or None)} from either JSON layout or CSV rows"""
+    if isinstance(table, list):
+        table = {row["team"]: row for row in table}
+    parsed = {}
+    for team, entry in table.items():
+        if isinstance(entry, dict):
+            nrr = entry.get("nrr")
+            parsed[team] = (int(entry.get("points", 0)), None if nrr in (None, "") else float(nrr))
+        else:
+            parsed[team] = (int(entry), None)
+    return parsed
+
+
+def fixture_probabilities(fixtures, win_model, margin_model, city_stats):
+    """P(team1 wins) for every fixture, with one batched model call"""
+    from prediction import predict_matches
+
+    probs = np.full(len(fixtures), 0.5)
+    modelled = [
+        i for i, f in enumerate(fixtures)
+        if f.get("win_prob") in (None, "") and f.get("batting_first") not in (None, "")
+    ]
+    for i, fixture in enumerate(fixtures):
+        if fixture.get("win_prob") not in (None, ""):
+            probs[i] = float(fixture["win_prob"])
+        if fixture["city"] not in city_stats:
+            raise ValueError(f"unknown city {fixture['city']!r} in fixture {i}")
+        if fixture.get("batting_first") not in (None, "", fixture["team1"], fixture["team2"]):
+            raise ValueError(f"fixture {i}: batting_first must be team1 or team2")
+
+    if modelled:
+        cities = [fixtures[i]["city"] for i in modelled]
+        scores = [
+            float(fixtures[i]["score"]) if fixtures[i].get("score") not in (None, "")
+            else city_stats[fixtures[i]["city"]]["avg_score"]
+            for i in modelled
+        ]
+        bat_first_probs, _ = predict_matches(win_model, margin_model, city_stats, cities, scores)
+        for i, prob in zip(modelled, bat_first_probs):
+            probs[i] = prob if fixtures[i]["batting_first"] == fixtures[i]["team1"] else 1 - prob
+    return probs
+
+
+# =====================================================
+# SIMULATION
+# =====================================================
+def simulate_season_chunk(p_team1, swing, base_points, tiebreak, size, seed):
+    """Finishing-position counts, shape (teams, teams), and summed points for `size` seasons.
+
+    swing[f, t] is +1 if team t is team1 in fixture f and -1 if it is team2, so
+    POINTS_PER_WIN * (wins @ swing + team2 fixture counts) is each team's
+    points from the simulated results.
+    """
+    rng = np.random.Generator(np.random.SFC64(seed))
+    n_teams = len(base_points)
+    team1_wins = (rng.random((size, len(p_team1)), dtype=np.float32) < p_team1).astype(np.float32)
+
+    points = base_points + POINTS_PER_WIN * (team1_wins @ swing + (swing == -1).sum(axis=0))
+    key = points + (tiebreak if tiebreak is not None else 0.5 * rng.random((size, n_teams), dtype=np.float32))
+    order = np.argsort(-key, axis=1, kind="stable")
+
+    positions = np.stack([np.bincount(order[:, k], minlength=n_teams) for k in range(n_teams)], axis=1)
+    return positions, points.sum(axis=0, dtype=np.float64)
+
+
+class TournamentResult:
+    def __init__(self, teams, positions, points_sum, seasons):
+        self.teams = teams
+        self.seasons = seasons
+        self.position_probs = positions / seasons
+        self.expected_points = points_sum / seasons
+
+    def finish_prob(self, top):
+        """P(finishing in the top `top` places) per team"""
+        return self.position_probs[:, :top].sum(axis=1)
+
+    def table(self, playoff_spots=PLAYOFF_SPOTS):
+        qualify, top2 = self.finish_prob(playoff_spots), self.finish_prob(2)
+        rows = [
+            {"team": team, "expected_points": float(points), "qualify_prob": float(q), "top2_prob": float(t)}
+            for team, points, q, t in zip(self.teams, self.expected_points, qualify, top2)
+        ]
+        return sorted(rows, key=lambda row: (-row["qualify_prob"], -row["top2_prob"], row["team"]))
+
+
+def simulate_tournament(fixtures, points_table, p_team1, seasons=1_000_000, seed=None, parallel=None):
+    """Simulate the remaining fixtures `seasons` times from the current points table"""
+    table = parse_points_table(points_table)
+    teams = sorted(set(table) | {f["team1"] for f in fixtures} | {f["team2"] for f in fixtures})
+    index = {team: i for i, team in enumerate(teams)}
+
+    swing = np.zeros((len(fixtures), len(teams)), dtype=np.float32)
+    for f, fixture in enumerate(fixtures):
+        swing[f, index[fixture["team1"]]] = 1
+        swing[f, index[fixture["team2"]]] = -1
+    base_points = np.array([table.get(team, (0, None))[0] for team in teams], dtype=np.float32)
+
+    # NRR only orders teams level on points: ranks scaled into [0, 0.5).
+    nrr = [table.get(team, (0, None))[1] for team in teams]
+    tiebreak = None
+    if all(value is not None for value in nrr):
+        tiebreak = (np.argsort(np.argsort(nrr)) / (2 * len(teams))).astype(np.float32)
+
+    chunks = run_chunks(
+        simulate_season_chunk,
+        (np.asarray(p_team1, dtype=np.float32), swing, base_points, tiebreak),
+        seasons, seed, parallel, chunk_size=SEASON_CHUNK,
+    )
+    positions = sum(chunk[0] for chunk in chunks)
+    points_sum = sum(chunk[1] for chunk in chunks)
+    return TournamentResult(teams, positions, points_sum, seasons)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", type=Path, required=True)
+    parser.add_argument("--table", type=Path, required=True)
+    parser.add_argument("--seasons", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", action="store_true", help="print the result table as JSON")
+    args = parser.parse_args()
+
+    from artifact_store import attach_artifact_store
+
+    store = attach_artifact_store()
+    fixtures = read_records(args.fixtures)
+    p_team1 = fixture_probabilities(fixtures, store.win_model, store.margin_model, store.city_stats)
+    result = simulate_tournament(fixtures, read_records(args.table), p_team1, args.seasons, args.seed)
+
+    rows = result.table()
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{'Team':<30} {'Exp. Pts':>8} {'Playoffs':>9} {'Top 2':>7}")
+    for row in rows:
+        print(f"{row['team']:<30} {row['expected_points']:8.1f} {row['qualify_prob']:9.1%} {row['top2_prob']:7.1%}")
+
+
+if __name__ == "__main__":
+    main()
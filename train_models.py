@@ -0,0 +1,361 @@
+"""Rebuild win_probability_model.pkl and margin_model.pkl from raw match data.
+
+Input is the same matches / deliveries layout city_stats_pipeline.py reads.
+Every completed match becomes one row with the features predict_match
+builds (see FEATURE_COLUMNS). City averages and score percentiles come from
+the training data itself, the percentiles through the same ScoreDistributions
+lookup predict_match uses. In the search they are rebuilt for each fold from
+its training rows alone (CITY_FEATURES), so a held-out match never shapes its
+own features. The targets are whether the side batting first
+won, and the first-innings total minus the second-innings total.
+innings_score_2nd is the real chase total, as in the shipped models: live
+chase mode (live_feed.py) writes its projected chase total into that column,
+and a model trained on a constant there would ignore it.
+
+The feature matrix is cached under build/training/, keyed by a hash of the
+raw files, so repeated searches skip parsing the deliveries. The
+hyperparameter search is a grid of XGBoost settings scored by k-fold cross
+validation, with one (candidate, fold) fit per task across a process pool.
+The best settings are refit on all rows: the win model is wrapped in
+isotonic calibration like the shipped one.
+
+With --warm-start the search is skipped. Each model keeps the settings and
+column layout of the current pickles and boosts --warm-rounds more trees on
+the new data, starting from the previous booster:
+
+    python train_models.py --matches matches.csv --deliveries deliveries.csv --workers 4
+    python train_models.py --matches matches.csv --deliveries deliveries.csv --warm-start
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from city_stats_pipeline import read_table
+from prediction import BASE_DIR, BUILD_DIR, MARGIN_MODEL_PATH, WIN_MODEL_PATH
+from score_distributions import ScoreDistributions
+
+TRAINING_DIR = BUILD_DIR / "training"
+FEATURE_VERSION = 4
+CV_FOLDS = 5
+SEED = 42
+
+FEATURE_COLUMNS = (
+    "year", "innings_1st", "innings_score_1st", "innings_2nd", "innings_score_2nd",
+    "toss_winner_batted_first", "score_vs_avg", "score_vs_winning_avg", "score_percentile",
+    "is_high_score", "innings_momentum",
+)
+# Built from per-city averages and distributions; the search refits them on each training fold.
+CITY_FEATURES = ("score_vs_avg", "score_vs_winning_avg", "score_percentile", "is_high_score")
+# Settings shared by both models, as in the shipped pickles.
+BASE_PARAMS = {"subsample": 0.8, "colsample_bytree": 0.8, "random_state": SEED, "n_jobs": 1}
+# Depths above 3 train fine but lose the native models' leaf-table fast path.
+PARAM_GRID = {
+    "max_depth": [2, 3],
+    "learning_rate": [0.05, 0.1],
+    "n_estimators": [80, 120, 200],
+    "min_child_weight": [1, 3],
+}
+WARM_ROUNDS = 40
+# Live chase mode moves the win probability through this column alone.
+LIVE_FEATURE = "innings_score_2nd"
+
+
+# =====================================================
+# FEATURES
+# =====================================================
+def match_table(matches_path, deliveries_path, chunksize=100_000):
+    """One row per completed match: city, season, toss, both innings totals, winner"""
+    matches = pd.concat(read_table(matches_path, chunksize), ignore_index=True)
+    innings = []
+    for chunk in read_table(deliveries_path, chunksize):
+        chunk = chunk[chunk["inning"] <= 2]
+        innings.append(chunk.groupby(["match_id", "inning"]).agg(
+            runs=("total_runs", "sum"), team=("batting_team", "first")
+        ))
+    # A match split across two chunks appears twice; runs add up, the team is the same.
+    innings = pd.concat(innings).groupby(level=[0, 1]).agg(runs=("runs", "sum"), team=("team", "first"))
+    first = innings.xs(1, level="inning")
+    second = innings.xs(2, level="inning")
+
+    table = matches.set_index("id").join(first.add_suffix("_1st"), how="inner").join(
+        second.add_suffix("_2nd"), how="inner")
+    # Ties and no-results have no winner to learn from.
+    table = table[(table["winner"] == table["team_1st"]) | (table["winner"] == table["team_2nd"])]
+    return table.reset_index()
+
+
+def city_columns(table):
+    """One-hot columns in get_dummies(drop_first=True) order, plus the Wankhede group"""
+    cities = sorted(table["city"].unique())
+    return [f"city_{city}" for city in cities[1:]] + ["stadium_group_Wankhede"]
+
+
+def city_features(cities, scores, bat_first_won, fit_rows=None):
+    """{CITY_FEATURES name: array} for every row, from the averages and distributions of fit_rows (default all).
+
+    A city with no fit rows gets the fit rows' overall average and UNKNOWN_PERCENTILE.
+    """
+    cities = pd.Series(np.asarray(cities, dtype=str))
+    scores = pd.Series(np.asarray(scores, dtype=float))
+    fit = np.ones(len(scores), dtype=bool)
+    if fit_rows is not None:
+        fit = np.zeros(len(scores), dtype=bool)
+        fit[fit_rows] = True
+    won = fit & np.asarray(bat_first_won, dtype=bool)
+    avg_score = cities.map(scores[fit].groupby(cities[fit]).mean()).fillna(scores[fit].mean())
+    avg_win = cities.map(scores[won].groupby(cities[won]).mean()).fillna(avg_score)
+    return {
+        "score_vs_avg": (scores - avg_score).to_numpy(),
+        "score_vs_winning_avg": (scores - avg_win).to_numpy(),
+        "score_percentile": score_distributions(cities[fit], scores[fit]).percentiles(cities, scores),
+        "is_high_score": (scores >= avg_win).astype(int).to_numpy(),
+    }
+
+
+def build_features(table, feature_names=None):
+    """(X DataFrame, win target, margin target) in feature_names order"""
+    scores = table["runs_1st"].astype(float)
+    bat_first_won = table["winner"] == table["team_1st"]
+
+    features = {
+        "year": table["season"].astype(str).str[:4].astype(int),
+        "innings_1st": 1,
+        "innings_score_1st": scores,
+        "innings_2nd": 2,
+        # The live chase projection is fed here; predict_match sends PRE_MATCH_SCORE_2ND.
+        "innings_score_2nd": table["runs_2nd"].astype(float),
+        # Whatever the toss decision, the toss winner batted first exactly when it is team_1st.
+        "toss_winner_batted_first": (table["toss_winner"] == table["team_1st"]).astype(int),
+        **city_features(table["city"], scores, bat_first_won),
+        "innings_momentum": (scores - 120) / 120,
+    }
+    for city in table["city"].unique():
+        features[f"city_{city}"] = (table["city"] == city).astype(int)
+    venue = table["venue"] if "venue" in table else table["city"].where(table["city"] != "Mumbai", "Wankhede")
+    features["stadium_group_Wankhede"] = venue.astype(str).str.contains("Wankhede").astype(int)
+
+    names = list(feature_names) if feature_names is not None else list(FEATURE_COLUMNS) + city_columns(table)
+    X = pd.DataFrame({name: features.get(name, 0) for name in names}, index=table.index).astype(float)
+    return X, bat_first_won.astype(int).to_numpy(), (table["runs_1st"] - table["runs_2nd"]).to_numpy(float)
+
+
+def score_distributions(cities, totals):
+    """First-innings distributions of (city, total) pairs"""
+    distributions = ScoreDistributions()
+    distributions.add_many(cities, totals)
+    return distributions
+
+
+def features_hash(paths, feature_names=None):
+    digest = hashlib.sha256(json.dumps([FEATURE_VERSION, feature_names]).encode())
+    for path in paths:
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()
+
+
+def load_or_build_features(matches_path, deliveries_path, feature_names=None, cache_dir=TRAINING_DIR):
+    """(path of the cached matrix, X, win target, margin target); parses the raw files only on a miss"""
+    names = None if feature_names is None else [str(name) for name in feature_names]
+    path = cache_dir / f"features_{features_hash([matches_path, deliveries_path], names)[:16]}.npz"
+    if not path.exists():
+        table = match_table(matches_path, deliveries_path)
+        X, y_win, y_margin = build_features(table, names)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        np.savez(path, X=X.to_numpy(), columns=np.array(X.columns, dtype=str), y_win=y_win, y_margin=y_margin,
+                 cities=table["city"].to_numpy(dtype=str))
+    X, y_win, y_margin = read_features(path)
+    return path, X, y_win, y_margin
+
+
+def read_features(path):
+    with np.load(path) as data:
+        X = pd.DataFrame(data["X"], columns=data["columns"].tolist())
+        return X, data["y_win"], data["y_margin"]
+
+
+# =====================================================
+# SEARCH
+# =====================================================
+_features = None
+_cities = None
+
+
+def _load_worker_features(path):
+    global _features, _cities
+    _features = read_features(path)
+    with np.load(path) as data:
+        _cities = data["cities"]
+
+
+def fold_features(train_idx):
+    """The worker's feature matrix with CITY_FEATURES rebuilt from the training rows only"""
+    X, y_win, _ = _features
+    refit = city_features(_cities, X["innings_score_1st"].to_numpy(), y_win, train_idx)
+    return X.assign(**{name: refit[name] for name in CITY_FEATURES if name in X})
+
+
+def fit_fold(kind, params, train_idx, test_idx):
+    """Held-out loss of one candidate on one fold: log loss (win) or RMSE (margin)"""
+    from sklearn.metrics import log_loss, mean_squared_error
+    from xgboost import XGBClassifier, XGBRegressor
+
+    _, y_win, y_margin = _features
+    X = fold_features(train_idx)
+    if kind == "win":
+        model = XGBClassifier(**BASE_PARAMS, **params, eval_metric="logloss")
+        model.fit(X.iloc[train_idx], y_win[train_idx])
+        return log_loss(y_win[test_idx], model.predict_proba(X.iloc[test_idx])[:, 1], labels=[0, 1])
+    model = XGBRegressor(**BASE_PARAMS, **params)
+    model.fit(X.iloc[train_idx], y_margin[train_idx])
+    return mean_squared_error(y_margin[test_idx], model.predict(X.iloc[test_idx])) ** 0.5
+
+
+def grid_candidates(grid=PARAM_GRID):
+    return [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+
+
+def search(features_path, y_win, workers=None, grid=PARAM_GRID, folds=CV_FOLDS):
+    """{kind: (best params, best mean CV loss)} over every grid candidate.
+
+    Every (model, candidate, fold) fit is one task. Workers load the cached
+    feature matrix once, so tasks carry only parameters and row indices; each
+    task rebuilds the CITY_FEATURES from its fold's training rows.
+    """
+    from sklearn.model_selection import KFold, StratifiedKFold
+
+    rows = np.arange(len(y_win))
+    splits = {
+        "win": list(StratifiedKFold(folds, shuffle=True, random_state=SEED).split(rows, y_win)),
+        "margin": list(KFold(folds, shuffle=True, random_state=SEED).split(rows)),
+    }
+    candidates = grid_candidates(grid)
+    tasks = [(kind, params, train, test)
+             for kind in splits for params in candidates for train, test in splits[kind]]
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1:
+        with ProcessPoolExecutor(workers, initializer=_load_worker_features, initargs=(features_path,)) as pool:
+            losses = list(pool.map(fit_fold, *zip(*tasks), chunksize=max(1, len(tasks) // (4 * workers))))
+    else:
+        _load_worker_features(features_path)
+        losses = [fit_fold(*task) for task in tasks]
+
+    best = {}
+    for (kind, start) in [("win", 0), ("margin", len(candidates) * folds)]:
+        means = np.asarray(losses[start:start + len(candidates) * folds]).reshape(len(candidates), folds).mean(axis=1)
+        best[kind] = (candidates[int(np.argmin(means))], float(means.min()))
+    return best
+
+
+# =====================================================
+# FINAL FIT
+# =====================================================
+def fit_models(X, y_win, y_margin, win_params, margin_params, previous=None):
+    """(calibrated win model, margin model) on every row.
+
+    With previous = (win model, margin model), boosting continues from their
+    boosters; the win model's first calibrated fold is the starting point of
+    every new fold, so all folds keep the same tree count.
+    """
+    from sklearn.calibration import CalibratedClassifierCV
+    from xgboost import XGBClassifier, XGBRegressor
+
+    win_model = CalibratedClassifierCV(
+        XGBClassifier(**{**BASE_PARAMS, **win_params}, eval_metric="logloss"), cv=CV_FOLDS, method="isotonic"
+    )
+    margin_model = XGBRegressor(**{**BASE_PARAMS, **margin_params})
+    if previous is None:
+        win_model.fit(X, y_win)
+        margin_model.fit(X, y_margin)
+    else:
+        previous_win, previous_margin = previous
+        win_model.fit(X, y_win, xgb_model=previous_win.calibrated_classifiers_[0].estimator.get_booster())
+        margin_model.fit(X, y_margin, xgb_model=previous_margin.get_booster())
+    return win_model, margin_model
+
+
+def warm_start_params(model, rounds):
+    """The tree settings of a fitted (possibly calibrated) model, for `rounds` more trees"""
+    estimator = getattr(model, "estimator", model)
+    params = {name: estimator.get_params()[name] for name in PARAM_GRID}
+    params["n_estimators"] = rounds
+    return params
+
+
+def train(matches_path, deliveries_path, workers=None, warm_start=False, warm_rounds=WARM_ROUNDS,
+          grid=PARAM_GRID):
+    """(win model, margin model, report) for the raw files"""
+    import joblib
+
+    timings = {}
+    start = time.perf_counter()
+    previous = None
+    if warm_start:
+        previous = joblib.load(WIN_MODEL_PATH), joblib.load(MARGIN_MODEL_PATH)
+        feature_names = previous[0].feature_names_in_
+    else:
+        feature_names = None
+    features_path, X, y_win, y_margin = load_or_build_features(matches_path, deliveries_path, feature_names)
+    if LIVE_FEATURE in X and X[LIVE_FEATURE].nunique() < 2:
+        raise ValueError(f"{LIVE_FEATURE} is constant in the training data; models fit on it would "
+                         "ignore the live chase projection (live_feed.py)")
+    timings["features"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if previous is None:
+        best = search(features_path, y_win, workers, grid)
+        win_params, margin_params = best["win"][0], best["margin"][0]
+    else:
+        best = None
+        win_params = warm_start_params(previous[0], warm_rounds)
+        margin_params = warm_start_params(previous[1], warm_rounds)
+    timings["search"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    win_model, margin_model = fit_models(X, y_win, y_margin, win_params, margin_params, previous)
+    timings["fit"] = time.perf_counter() - start
+
+    report = {
+        "matches": len(X),
+        "features": list(X.columns),
+        "warm_start": warm_start,
+        "win_params": win_params,
+        "margin_params": margin_params,
+        "cv_loss": None if best is None else {"win_log_loss": best["win"][1], "margin_rmse": best["margin"][1]},
+        "seconds": {name: round(seconds, 3) for name, seconds in timings.items()},
+    }
+    return win_model, margin_model, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--matches", type=Path, required=True)
+    parser.add_argument("--deliveries", type=Path, required=True)
+    parser.add_argument("--workers", type=int, default=None, help="search processes (default: all CPUs)")
+    parser.add_argument("--warm-start", action="store_true",
+                        help="skip the search and boost more trees onto the current pickles")
+    parser.add_argument("--warm-rounds", type=int, default=WARM_ROUNDS)
+    parser.add_argument("--output-dir", type=Path, default=BASE_DIR)
+    args = parser.parse_args()
+
+    import joblib
+
+    win_model, margin_model, report = train(args.matches, args.deliveries, args.workers,
+                                            args.warm_start, args.warm_rounds)
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    joblib.dump(win_model, args.output_dir / WIN_MODEL_PATH.name)
+    joblib.dump(margin_model, args.output_dir / MARGIN_MODEL_PATH.name)
+    print(json.dumps(report, indent=2))
+    print(f"Wrote {WIN_MODEL_PATH.name} and {MARGIN_MODEL_PATH.name} to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""Venue index: canonical IDs, aliases, fuzzy search and league/season filters.
+
+Venues come from venues.json, one entry per venue:
+
+    {"id": "ipl-bengaluru", "name": "Bengaluru", "stats": "Bengaluru",
+     "leagues": ["IPL"], "seasons": [2023, 2024, 2025],
+     "aliases": ["Bangalore", "M Chinnaswamy Stadium"]}
+
+"stats" is the city_stats key whose numbers the venue uses. Any city_stats
+key without an entry gets one of its own, so the index always covers every
+city the models know.
+
+Names are normalized (case, accents and punctuation dropped) before any
+comparison. resolve() accepts an ID, a name or an alias, and falls back to
+the best fuzzy match above RESOLVE_MIN_SCORE, unless another venue is
+nearly as close. search() ranks venues by
+prefix matches on any word of a name or alias, then by trigram similarity.
+Prefixes are found by bisecting a sorted list of word suffixes, and trigram
+overlap is counted over numpy posting lists, so a query over thousands of
+venues takes microseconds:
+
+    venues = venue_index(city_stats)
+    venues.resolve("Bangalore").stats          # "Bengaluru"
+    venues.search("wankhede", league="IPL", season=2025)
+"""
+import bisect
+import json
+import re
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+VENUES_PATH = Path(__file__).resolve().parent / "venues.json"
+SEARCH_LIMIT = 10
+RESOLVE_MIN_SCORE = 0.6
+# Weakest match worth offering as a suggestion: misspellings such as
+# "wankede" score about 0.5, unrelated names ("Bangalore" vs Mumbai) under 0.35.
+SUGGEST_MIN_SCORE = 0.4
+# A fuzzy match must beat the next venue by this much to resolve.
+RESOLVE_MARGIN = 0.05
+# Trigrams in more than this share of all names ("sta", "ium", ...) are not
+# used to find candidates, only to score them.
+COMMON_TRIGRAM_SHARE = 0.02
+MAX_CANDIDATES = 64
+MAX_PREFIX_MATCHES = 512
+
+
+def normalize(name):
+    """Lower-case ASCII words separated by single spaces"""
+    text = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode()
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def slug(name):
+    return normalize(name).replace(" ", "-")
+
+
+class Venue:
+    __slots__ = ("id", "name", "stats", "leagues", "seasons", "aliases")
+
+    def __init__(self, id, name, stats=None, leagues=(), seasons=(), aliases=()):
+        self.id = id
+        self.name = name
+        self.stats = stats
+        self.leagues = tuple(leagues)
+        self.seasons = tuple(seasons)
+        self.aliases = tuple(aliases)
+
+    def __repr__(self):
+        return f"Venue({self.id!r}, {self.name!r})"
+
+
+class VenueIndex:
+    def __init__(self, venues):
+        self.venues = list(venues)
+        self.by_id = {venue.id: venue for venue in self.venues}
+        if len(self.by_id) != len(self.venues):
+            raise ValueError("venue IDs must be unique")
+
+        # Every name and alias, normalized; exact lookups go through `exact`.
+        self.alias_venue = []
+        self.alias_text = []
+        self.exact = {}
+        for row, venue in enumerate(self.venues):
+            for name in dict.fromkeys(normalize(n) for n in (venue.id, venue.name, *venue.aliases)):
+                if name:
+                    self.exact.setdefault(name, []).append(row)
+                    self.alias_venue.append(row)
+                    self.alias_text.append(name)
+        self.alias_venue = np.array(self.alias_venue, dtype=np.int32)
+        self.alias_length = np.array([len(text) for text in self.alias_text])
+        self.no_aliases = np.empty(0, dtype=np.int32)
+
+        # Suffixes starting at each word of each alias, for prefix search.
+        suffixes = []
+        for i, text in enumerate(self.alias_text):
+            suffixes.extend((text[m.start():], i) for m in re.finditer(r"[a-z0-9]+", text))
+        suffixes.sort()
+        self.suffix_text = [text for text, _ in suffixes]
+        self.suffix_alias = np.array([i for _, i in suffixes], dtype=np.int32)
+
+        postings = {}
+        self.alias_trigrams = np.empty(len(self.alias_text), dtype=np.int32)
+        for i, text in enumerate(self.alias_text):
+            grams = trigrams(text)
+            self.alias_trigrams[i] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self.postings = {gram: np.array(rows, dtype=np.int32) for gram, rows in postings.items()}
+        common = max(50, COMMON_TRIGRAM_SHARE * len(self.alias_text))
+        self.common = {gram for gram, rows in self.postings.items() if len(rows) > common}
+
+        self.venue_league = [frozenset(venue.leagues) for venue in self.venues]
+        self.venue_season = [frozenset(venue.seasons) for venue in self.venues]
+        self._masks = {}
+
+    # -----------------------------
+    # CONSTRUCTION
+    # -----------------------------
+    @classmethod
+    def from_json(cls, entries):
+        return cls(Venue(**entry) for entry in entries)
+
+    @classmethod
+    def load(cls, city_stats=None, path=VENUES_PATH):
+        """venues.json plus a venue for each city_stats key it does not cover.
+
+        With city_stats given, entries whose stats key it lacks keep their
+        names and aliases but have no stats.
+        """
+        try:
+            entries = json.loads(Path(path).read_text())
+        except FileNotFoundError:
+            entries = []
+        venues = [Venue(**entry) for entry in entries]
+        if city_stats is not None:
+            keys = set(city_stats.keys())
+            for venue in venues:
+                if venue.stats not in keys:
+                    venue.stats = None
+            covered = {venue.stats for venue in venues}
+            venues += [Venue(slug(key), key, key) for key in city_stats.keys() if key not in covered]
+        return cls(venues)
+
+    # -----------------------------
+    # FILTERS
+    # -----------------------------
+    def _mask(self, league, season, with_stats):
+        """Boolean array of the venues passing the filters, or None for no filter"""
+        if league is None and season is None and not with_stats:
+            return None
+        key = (league, season, with_stats)
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = self._masks[key] = np.array([
+                (league is None or league in leagues) and (season is None or season in seasons)
+                and (not with_stats or venue.stats is not None)
+                for venue, leagues, seasons in zip(self.venues, self.venue_league, self.venue_season)
+            ], dtype=bool)
+        return mask
+
+    def filter(self, league=None, season=None, with_stats=False):
+        mask = self._mask(league, season, with_stats)
+        return list(self.venues) if mask is None else [v for v, keep in zip(self.venues, mask) if keep]
+
+    # -----------------------------
+    # SEARCH
+    # -----------------------------
+    def search(self, query, limit=SEARCH_LIMIT, league=None, season=None, with_stats=False, prefixes=True):
+        """[(venue, score)] best first; score is 1.0 for an exact name, above 0.9 for a prefix"""
+        text = normalize(query)
+        if not text:
+            return []
+        mask = self._mask(league, season, with_stats)
+
+        grams = trigrams(text)
+        fuzzy, fuzzy_scores = self._similar(grams)
+
+        # Word prefixes rank above any fuzzy match; a longer matched share ranks higher.
+        start = bisect.bisect_left(self.suffix_text, text)
+        end = bisect.bisect_right(self.suffix_text, text + "\x7f", start)
+        prefix = self.suffix_alias[start:min(end, start + MAX_PREFIX_MATCHES)] if prefixes else self.no_aliases
+        prefix_scores = 0.9 + 0.1 * len(text) / self.alias_length[prefix]
+
+        rows = self.alias_venue[np.concatenate([fuzzy, prefix])]
+        scores = np.concatenate([fuzzy_scores, prefix_scores])
+        if mask is not None:
+            keep = mask[rows]
+            rows, scores = rows[keep], scores[keep]
+        # Best score per venue: the first occurrence in descending score order.
+        order = np.argsort(-scores, kind="stable")
+        rows, scores = rows[order], scores[order]
+        first = np.sort(np.unique(rows, return_index=True)[1])[:limit]
+        return [(self.venues[row], score) for row, score in zip(rows[first].tolist(), scores[first].tolist())]
+
+    def suggest(self, query, limit=SEARCH_LIMIT, min_score=SUGGEST_MIN_SCORE):
+        """city_stats keys of the venues worth offering for a query, best first"""
+        return list(dict.fromkeys(venue.stats for venue, score in self.search(query, limit, with_stats=True)
+                                  if score >= min_score))
+
+    def _similar(self, grams):
+        """(aliases, Dice similarity) for the aliases most likely to share the query's trigrams.
+
+        Candidates are the aliases sharing the most rare trigrams (or, if the
+        query has none, the rarest ones it has); their exact overlap adds the
+        common trigrams each contains.
+        """
+        known = sorted((g for g in grams if g in self.postings), key=lambda g: len(self.postings[g]))
+        if not known:
+            return self.no_aliases, np.empty(0)
+        rare = [g for g in known if g not in self.common] or known[:2]
+        aliases, shared = np.unique(np.concatenate([self.postings[g] for g in rare]), return_counts=True)
+        if len(aliases) > MAX_CANDIDATES:
+            top = np.argpartition(-shared, MAX_CANDIDATES)[:MAX_CANDIDATES]
+            aliases, shared = aliases[top], shared[top]
+        for gram in known:
+            if gram not in rare:
+                posting = self.postings[gram]
+                found = np.minimum(np.searchsorted(posting, aliases), len(posting) - 1)
+                shared = shared + (posting[found] == aliases)
+        return aliases, 2 * shared / (len(grams) + self.alias_trigrams[aliases])
+
+    def resolve(self, name, league=None, season=None, min_score=RESOLVE_MIN_SCORE):
+        """The venue for an ID, name or alias, else the best fuzzy match, else None"""
+        venue = self.by_id.get(name)
+        if venue is not None:
+            return venue
+        mask = self._mask(league, season, False)
+        for row in self.exact.get(normalize(name), ()):
+            if mask is None or mask[row]:
+                return self.venues[row]
+        # A short prefix says little about which venue was meant; only similarity counts here.
+        matches = self.search(name, 2, league, season, prefixes=False)
+        if not matches or matches[0][1] < min_score:
+            return None
+        if len(matches) > 1 and matches[1][1] > matches[0][1] - RESOLVE_MARGIN:
+            return None
+        return matches[0][0]
+
+    def stats_key(self, name):
+        """city_stats key for a venue name; KeyError if it resolves to nothing with stats"""
+        venue = self.resolve(name)
+        if venue is None or venue.stats is None:
+            raise KeyError(f"unknown venue: {name!r}")
+        return venue.stats
+
+
+@lru_cache(maxsize=8)
+def _index_for(keys, path):
+    return VenueIndex.load(dict.fromkeys(keys), path)
+
+
+def venue_index(city_stats, path=VENUES_PATH):
+    """The VenueIndex over venues.json and these city_stats keys, built once per key set"""
+    return _index_for(tuple(city_stats.keys()), path)